@@ -12,14 +12,31 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATABASE_DIR = BASE_DIR / "database"
 DATABASE_DIR.mkdir(exist_ok=True)
 
+# Pointer to the active database file (switched by catalog swaps)
+ACTIVE_DATABASE_FILE = DATABASE_DIR / "active_db.txt"
+DEFAULT_DATABASE_NAME = "iter.db"
+
+def get_active_database_path() -> Path:
+    """Get the database file the app should use (iter.db unless a catalog swap promoted another file)."""
+    if ACTIVE_DATABASE_FILE.exists():
+        name = ACTIVE_DATABASE_FILE.read_text().strip()
+        if name:
+            return DATABASE_DIR / name
+    return DATABASE_DIR / DEFAULT_DATABASE_NAME
+
+def create_database_engine(db_path: Path):
+    """Create a SQLAlchemy engine for a SQLite database file."""
+    return create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False}  # Needed for SQLite
+    )
+
 # SQLite database path
-DATABASE_URL = f"sqlite:///{DATABASE_DIR / 'iter.db'}"
+DATABASE_PATH = get_active_database_path()
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
 
 # Create engine
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+engine = create_database_engine(DATABASE_PATH)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -27,6 +44,26 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for models
 Base = declarative_base()
 
+def sync_active_database():
+    """
+    Rebind SessionLocal if a catalog swap promoted a new database file.
+    
+    Sessions that are already open keep reading the old file until closed;
+    their writes fail, because promotion retires the old file (catalog_swap).
+    """
+    global engine, DATABASE_PATH, DATABASE_URL
+    
+    db_path = get_active_database_path()
+    if db_path != DATABASE_PATH:
+        old_engine = engine
+        engine = create_database_engine(db_path)
+        SessionLocal.configure(bind=engine)
+        DATABASE_PATH = db_path
+        DATABASE_URL = f"sqlite:///{db_path}"
+        old_engine.dispose()
+    
+    return engine
+
 def get_db():
     """Get database session."""
     db = SessionLocal()
@@ -35,11 +72,33 @@ def get_db():
     finally:
         db.close()
 
+def begin_transaction(db):
+    """
+    Open the session's transaction explicitly.
+
+    pysqlite defers BEGIN until the first INSERT/UPDATE, so a SAVEPOINT issued
+    before that would run outside a transaction and be committed on RELEASE.
+    Bulk importers call this before using db.begin_nested() for row isolation.
+    """
+    if db.bind.dialect.name == "sqlite":
+        db.connection().exec_driver_sql("BEGIN")
+
+def dialect_insert(db, model):
+    """
+    INSERT construct of the session's dialect, so callers can use
+    on_conflict_do_update() for single-statement upserts (SQLite and PostgreSQL).
+    """
+    if db.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
 def init_database():
     """Initialize database - create all tables."""
     from app.models import Base  # Import all models
     Base.metadata.create_all(bind=engine)
-    print(f"Database initialized at: {DATABASE_DIR / 'iter.db'}")
+    print(f"Database initialized at: {DATABASE_PATH}")
 
 
 
@@ -10,8 +10,14 @@ from backend.app.models.process import E2EProcess, BusinessProcess
 from backend.app.models.scenario import Scenario
 from backend.app.models.requirement import CustomerRequirement, RequirementHistory
 from backend.app.models.product import ERPSystem
-from backend.app.models.hierarchy import ProcessHierarchy, HierarchyRequirement
+from backend.app.models.hierarchy import (
+    ProcessHierarchy, HierarchyRequirement, ScenarioProduct, AreaProductRollup, SELECTABLE_WORK_ITEM_TYPES
+)
 from backend.app.models.work_item import WorkItem, WorkItemRequirement
+from backend.app.models.import_run import ImportRun
+from backend.app.models.catalog_manifest import CatalogManifest
+from backend.app.models.requirement_revision import RequirementRevision
+from backend.app.models.recommendation_result import RecommendationResult
 
 # Export all models
 __all__ = [
@@ -26,6 +32,13 @@ __all__ = [
     "ERPSystem",
     "ProcessHierarchy",
     "HierarchyRequirement",
+    "ScenarioProduct",
+    "AreaProductRollup",
+    "SELECTABLE_WORK_ITEM_TYPES",
     "WorkItem",
     "WorkItemRequirement",
+    "ImportRun",
+    "CatalogManifest",
+    "RequirementRevision",
+    "RecommendationResult",
 ]
@@ -0,0 +1,27 @@
+"""
+Catalog Manifest Model - Which source workbooks were imported, and when
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, BigInteger
+from sqlalchemy.sql import func
+from backend.app.database import Base
+
+class CatalogManifest(Base):
+    """
+    One row per successful import of a source workbook.
+    
+    Importers compare the file's content hash with the latest row for the
+    same importer/file and skip unchanged workbooks. The highest id is the
+    catalog version used to invalidate caches.
+    """
+    
+    __tablename__ = "catalog_manifest"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    importer = Column(String(100), nullable=False)  # 'import_hierarchy', 'import_bpc_data'
+    source_file = Column(String(500), nullable=False, index=True)  # File name
+    content_hash = Column(String(64), nullable=False)  # SHA-256
+    file_size = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=True)
+    import_seconds = Column(Float, nullable=True)
+    imported_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -2,11 +2,20 @@
 Process Hierarchy Model - Represents the full Title 1-5 hierarchy
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from backend.app.database import Base
 
+# Work item types that can get a MoSCoW priority
+SELECTABLE_WORK_ITEM_TYPES = [
+    'Scenario',
+    'Task',
+    'Configuration deliverable',
+    'Workshop',
+    'Document deliverable',
+]
+
 class ProcessHierarchy(Base):
     """
     Process Hierarchy - represents the full BPC hierarchy.
@@ -50,12 +59,32 @@ class ProcessHierarchy(Base):
     # Original Excel data
     excel_row_index = Column(Integer, nullable=True)
     
+    # Stable content-derived key (see services/node_keys.py) - survives re-imports
+    node_key = Column(String(40), nullable=True, index=True)
+    
+    # Denormalized ancestors (the node itself at its own level), filled by
+    # services/hierarchy_rollups.py on import. Plain ids, not foreign keys,
+    # so the self-referential parent relationship stays unambiguous.
+    e2e_node_id = Column(Integer, nullable=True, index=True)       # Level 1
+    area_node_id = Column(Integer, nullable=True, index=True)      # Level 2
+    process_node_id = Column(Integer, nullable=True, index=True)   # Level 3
+    scenario_node_id = Column(Integer, nullable=True, index=True)  # Level 4
+    
+    # Selectable work items in the subtree, node included (filled on import)
+    selectable_count = Column(Integer, nullable=True)
+    
+    # Nested-set interval in pre-order (display_order): the subtree is exactly
+    # the nodes with tree_left between this node's tree_left and tree_right
+    tree_left = Column(Integer, nullable=True, index=True)
+    tree_right = Column(Integer, nullable=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     parent = relationship("ProcessHierarchy", remote_side=[id], backref="children")
     erp_system = relationship("ERPSystem")
     requirements = relationship("HierarchyRequirement", back_populates="hierarchy_item")
+    products = relationship("ScenarioProduct", back_populates="scenario")
 
 
 class HierarchyRequirement(Base):
@@ -68,14 +97,65 @@ class HierarchyRequirement(Base):
     id = Column(Integer, primary_key=True, index=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     hierarchy_item_id = Column(Integer, ForeignKey("process_hierarchy.id"), nullable=False)
+    hierarchy_node_key = Column(String(40), nullable=True, index=True)  # Used to relink after re-import
     priority = Column(String(20), nullable=False)  # 'must', 'should', 'could', 'wont'
     notes = Column(Text, nullable=True)
     selected_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # One answer per item per organization (target of the bulk upserts)
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'hierarchy_item_id', name='uq_org_hierarchy_item'),
+    )
+    
     # Relationships
     organization = relationship("Organization")
     hierarchy_item = relationship("ProcessHierarchy", back_populates="requirements")
     selected_by_user = relationship("User")
 
+
+class ScenarioProduct(Base):
+    """
+    Scenario <-> product association.
+    
+    A scenario row in the catalog can list several products; each one gets a
+    row here (erp_system_id on ProcessHierarchy only holds the first).
+    """
+    
+    __tablename__ = "scenario_products"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    hierarchy_item_id = Column(Integer, ForeignKey("process_hierarchy.id"), nullable=False, index=True)
+    erp_system_id = Column(Integer, ForeignKey("erp_systems.id"), nullable=False, index=True)
+    
+    # One row per scenario per product
+    __table_args__ = (
+        UniqueConstraint('hierarchy_item_id', 'erp_system_id', name='uq_scenario_product'),
+    )
+    
+    # Relationships
+    scenario = relationship("ProcessHierarchy", back_populates="products")
+    erp_system = relationship("ERPSystem")
+
+
+class AreaProductRollup(Base):
+    """
+    Precomputed catalog coverage per area and product.
+    
+    One row per (Title 2 or Title 3 node, ERP system): how many of the node's
+    scenarios the product covers. Rebuilt by refresh_hierarchy_rollups() on import.
+    """
+    
+    __tablename__ = "area_product_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    area_node_id = Column(Integer, ForeignKey("process_hierarchy.id"), nullable=False, index=True)
+    area_level = Column(Integer, nullable=False, index=True)  # 2 = Area (Title 2), 3 = Process (Title 3)
+    erp_system_id = Column(Integer, ForeignKey("erp_systems.id"), nullable=False)
+    scenario_count = Column(Integer, nullable=False, default=0)  # Scenarios covered by the product
+    area_scenario_count = Column(Integer, nullable=False, default=0)  # All scenarios in the area
+    
+    __table_args__ = (
+        UniqueConstraint('area_node_id', 'erp_system_id', name='uq_area_product'),
+    )
@@ -0,0 +1,36 @@
+"""
+Import Run Model - Checkpoints for long-running catalog imports
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from backend.app.database import Base
+
+class ImportRun(Base):
+    """
+    One run of a catalog import script.
+    
+    The last committed Excel row and the importer's parent_stack are stored
+    together with the imported rows, so an interrupted run can be resumed.
+    """
+    
+    __tablename__ = "import_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    script = Column(String(100), nullable=False)  # 'import_hierarchy'
+    source_file = Column(String(500), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="running")  # 'running', 'completed', 'failed'
+    
+    # Checkpoint
+    last_row_index = Column(Integer, nullable=True)  # Last committed excel_row_index
+    parent_stack = Column(Text, nullable=True)  # JSON: {"1": id, "2": id, ...}
+    
+    imported_count = Column(Integer, default=0)
+    skipped_count = Column(Integer, default=0)
+    merged_count = Column(Integer, default=0)
+    first_item_id = Column(Integer, nullable=True)  # Items with id >= this were created by the run
+    error = Column(Text, nullable=True)
+    
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
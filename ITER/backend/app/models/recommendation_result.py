@@ -0,0 +1,37 @@
+"""
+Recommendation Result Model - Stored output of batch recommendation runs
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Index
+from sqlalchemy.sql import func
+from backend.app.database import Base
+
+class RecommendationResult(Base):
+    """
+    Score of one product for one organization in one batch run.
+    
+    All rows written by a run share run_at, so the latest results of an
+    organization are the rows with its highest run_at.
+    """
+    
+    __tablename__ = "recommendation_results"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)  # Start of the batch run
+    
+    erp_system_code = Column(String(20), nullable=False)
+    total_score = Column(Float, nullable=False)
+    must_coverage = Column(Float, nullable=False)  # Percentages
+    should_coverage = Column(Float, nullable=False)
+    could_coverage = Column(Float, nullable=False)
+    gap_count = Column(Integer, nullable=False, default=0)
+    recommendation_level = Column(String(50), nullable=False)
+    is_primary_choice = Column(Boolean, nullable=False, default=False)  # Recommended primary ERP
+    is_crm_choice = Column(Boolean, nullable=False, default=False)  # Recommended CRM (if needed)
+    
+    computed_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index('ix_recommendation_results_org_run', 'organization_id', 'run_at'),
+    )
@@ -16,6 +16,7 @@ class CustomerRequirement(Base):
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     business_process_id = Column(Integer, ForeignKey("business_processes.id"), nullable=False)
     priority = Column(String(20), nullable=False)  # 'must', 'should', 'optional', 'not_needed'
+    source = Column(String(20), nullable=False, server_default='direct')  # 'direct' (entered) or 'hierarchy' (derived)
     notes = Column(Text, nullable=True)
     selected_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,22 @@
+"""
+Requirement Revision Model - Per-organization counter of requirement writes
+"""
+
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from backend.app.database import Base
+
+class RequirementRevision(Base):
+    """
+    Revision of an organization's requirements.
+
+    Bumped in the same transaction as every requirement write, so caches in
+    any app process (or after a restart) can use it as a key. No foreign key:
+    the app writes requirements for organization ids without a row.
+    """
+
+    __tablename__ = "requirement_revisions"
+
+    organization_id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,221 @@
+"""
+Bundle Recommender - Cheapest product combinations that cover all 'must' scenarios
+
+Works on coverage bitsets (see coverage_engine). The search is a weighted set
+cover:
+1. Greedy (best newly-covered-per-cost first) gives an upper bound on the cost
+2. Bits covered by the same products are merged and dominated bits dropped
+3. Branch-and-bound branches on the uncovered bit with the fewest products,
+   trying only those, and prunes any branch that cannot beat the bound
+
+All covers at the minimum cost are then ranked by their weighted score.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+# Cost of a product when no cost is configured (no price data yet)
+DEFAULT_PRODUCT_COST = 1.0
+
+# Stop collecting equally cheap covers after this many
+MAX_TIED_COVERS = 200
+
+# Floating point slack when comparing costs
+COST_EPSILON = 1e-9
+
+
+def _greedy_cover(target: int, products: Dict[str, int], costs: Dict[str, float]) -> Optional[List[str]]:
+    """Classic greedy set cover. Returns None if the target cannot be covered."""
+    remaining = target
+    chosen = []
+    while remaining:
+        best_code, best_ratio = None, 0.0
+        for code, mask in products.items():
+            gain = (mask & remaining).bit_count()
+            if not gain:
+                continue
+            ratio = gain / costs[code] if costs[code] > 0 else float('inf')
+            if ratio > best_ratio:
+                best_code, best_ratio = code, ratio
+        if best_code is None:
+            return None
+        chosen.append(best_code)
+        remaining &= ~products[best_code]
+    return chosen
+
+
+def _reduce(target: int, products: Dict[str, int]) -> Tuple[Dict[str, int], List[List[str]]]:
+    """
+    Shrink the cover problem without changing its solutions.
+
+    Target bits covered by the same products are merged into one element, and an
+    element whose products are a superset of another element's products is
+    dropped (covering the smaller one covers it too).
+
+    Returns:
+        (product bitsets over the reduced elements, candidate products per element)
+    """
+    codes = list(products)
+    signatures = set()
+    remaining = target
+    while remaining:
+        low = remaining & -remaining
+        remaining ^= low
+        signatures.add(frozenset(code for code in codes if products[code] & low))
+
+    # Smallest first, so every kept signature is checked against all smaller ones
+    kept: List[frozenset] = []
+    for signature in sorted(signatures, key=len):
+        if not any(other <= signature for other in kept):
+            kept.append(signature)
+
+    reduced = {code: 0 for code in codes}
+    for pos, signature in enumerate(kept):
+        for code in signature:
+            reduced[code] |= 1 << pos
+
+    return {code: mask for code, mask in reduced.items() if mask}, [sorted(sig) for sig in kept]
+
+
+def find_min_cost_covers(
+    target: int,
+    products: Dict[str, int],
+    costs: Dict[str, float],
+    max_covers: int = MAX_TIED_COVERS
+) -> List[frozenset]:
+    """
+    Find product sets of minimum total cost whose bitsets cover the target.
+
+    Args:
+        target: Bitset that must be covered
+        products: Dict mapping product code to its bitset
+        costs: Dict mapping product code to its cost
+        max_covers: Max number of equally cheap covers returned
+
+    Returns:
+        List of product code sets (empty if the target cannot be covered)
+    """
+    if not target:
+        return [frozenset()]
+
+    products, element_products = _reduce(target, products)
+    target = (1 << len(element_products)) - 1
+    if not all(element_products):
+        return []
+
+    greedy = _greedy_cover(target, products, costs)
+    if greedy is None:
+        return []
+
+    best_cost = sum(costs[code] for code in greedy)
+    covers = {frozenset(greedy)}
+    min_cost = min(costs[code] for code in products)
+    max_gain = max(mask.bit_count() for mask in products.values())
+
+    # Candidate products per element, cheapest first
+    element_products = [
+        sorted(codes, key=lambda code: (costs[code], -products[code].bit_count(), code))
+        for codes in element_products
+    ]
+
+    def search(remaining: int, chosen: List[str], cost: float):
+        nonlocal best_cost, covers
+
+        if not remaining:
+            if cost < best_cost - COST_EPSILON:
+                best_cost = cost
+                covers = {frozenset(chosen)}
+            elif len(covers) < max_covers:
+                covers.add(frozenset(chosen))
+            return
+
+        # Lower bound: the remaining elements need at least this many more products
+        needed = -(-remaining.bit_count() // max_gain)
+        if cost + needed * min_cost > best_cost + COST_EPSILON:
+            return
+
+        # Branch on the uncovered element with the fewest candidate products
+        branch = None
+        bits = remaining
+        while bits:
+            low = bits & -bits
+            bits ^= low
+            codes = element_products[low.bit_length() - 1]
+            if branch is None or len(codes) < len(branch):
+                branch = codes
+                if len(branch) == 1:
+                    break
+
+        for code in branch:
+            if code in chosen:
+                continue
+            new_cost = cost + costs[code]
+            if new_cost > best_cost + COST_EPSILON:
+                continue
+            chosen.append(code)
+            search(remaining & ~products[code], chosen, new_cost)
+            chosen.pop()
+
+    search(target, [], 0.0)
+    return list(covers)
+
+
+def recommend_bundles(
+    product_masks: Dict[str, int],
+    priority_masks: Dict[str, int],
+    weights: Dict[str, float],
+    costs: Optional[Dict[str, float]] = None,
+    max_bundles: int = 5
+) -> Dict:
+    """
+    Recommend product bundles for one organization.
+
+    Args:
+        product_masks: Dict mapping product code to its coverage bitset
+        priority_masks: Dict mapping priority to the organization's selection bitset
+            (must contain 'must')
+        weights: Dict mapping priority to its score weight (e.g. {'must': 0.7, ...})
+        costs: Dict mapping product code to cost (missing products cost DEFAULT_PRODUCT_COST)
+        max_bundles: Number of bundles returned
+
+    Returns:
+        {
+            'bundles': [{'products', 'cost', 'total_score', 'coverage': {priority: {...}}}],
+            'uncoverable_must': int   # 'must' scenarios no product covers
+        }
+    """
+    costs = {code: (costs or {}).get(code, DEFAULT_PRODUCT_COST) for code in product_masks}
+
+    must = priority_masks.get('must', 0)
+    coverable = 0
+    for mask in product_masks.values():
+        coverable |= mask
+    target = must & coverable
+
+    bundles = []
+    for cover in find_min_cost_covers(target, product_masks, costs):
+        covered = 0
+        for code in cover:
+            covered |= product_masks[code]
+
+        coverage = {}
+        total_score = 0.0
+        for priority, bucket in priority_masks.items():
+            total = bucket.bit_count()
+            hit = (bucket & covered).bit_count()
+            percentage = (hit / total) * 100 if total else 0.0
+            coverage[priority] = {'covered': hit, 'total': total, 'percentage': round(percentage, 2)}
+            total_score += percentage * weights.get(priority, 0.0)
+
+        bundles.append({
+            'products': sorted(cover),
+            'cost': sum(costs[code] for code in cover),
+            'total_score': round(total_score, 2),
+            'coverage': coverage,
+        })
+
+    bundles.sort(key=lambda b: (-b['total_score'], b['cost'], len(b['products']), b['products']))
+
+    return {
+        'bundles': bundles[:max_bundles],
+        'uncoverable_must': (must & ~coverable).bit_count(),
+    }
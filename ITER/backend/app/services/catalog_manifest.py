@@ -0,0 +1,72 @@
+"""
+Catalog Manifest Service - File-change detection and catalog version for imports
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from backend.app.models import CatalogManifest
+
+# Read files in 1 MB chunks when hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file_path: Path) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_latest_entry(db: Session, importer: str, file_path: Path) -> Optional[CatalogManifest]:
+    """Latest manifest row for this importer and file."""
+    return db.query(CatalogManifest).filter(
+        CatalogManifest.importer == importer,
+        CatalogManifest.source_file == file_path.name
+    ).order_by(CatalogManifest.id.desc()).first()
+
+
+def is_unchanged(db: Session, importer: str, file_path: Path, content_hash: str) -> bool:
+    """True if this importer already imported exactly this file content."""
+    entry = get_latest_entry(db, importer, file_path)
+    return bool(
+        entry
+        and entry.content_hash == content_hash
+        and entry.file_size == file_path.stat().st_size
+    )
+
+
+def record_import(
+    db: Session,
+    importer: str,
+    file_path: Path,
+    content_hash: str,
+    row_count: int = None,
+    import_seconds: float = None
+) -> CatalogManifest:
+    """Record a successful import (bumps the catalog version)."""
+    entry = CatalogManifest(
+        importer=importer,
+        source_file=file_path.name,
+        content_hash=content_hash,
+        file_size=file_path.stat().st_size,
+        row_count=row_count,
+        import_seconds=round(import_seconds, 2) if import_seconds is not None else None
+    )
+    db.add(entry)
+    db.commit()
+    return entry
+
+
+def get_catalog_version(db: Session) -> int:
+    """
+    Current catalog version (0 if nothing was recorded yet).
+
+    Changes whenever an importer records a new workbook import, so it can be
+    used as a cache key.
+    """
+    return db.query(func.max(CatalogManifest.id)).scalar() or 0
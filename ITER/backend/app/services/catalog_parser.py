@@ -0,0 +1,126 @@
+"""
+Catalog Parser - Shared parsing of BPC catalog columns for all import scripts
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+# Product name (as written in the 'Products' column) -> ERP system code
+PRODUCT_MAPPING = {
+    "Business Central": "BC",
+    "Supply Chain Management": "D365SCM",
+    "Finance": "D365F",
+    "Finance and Operations": "D365F",
+    "Commerce": "D365COMM",
+    "Sales": "CRM",
+    "Customer Service": "D365CS",
+    "Field Service": "D365FS",
+    "Project Operations": "D365PO",
+    "Human Resources": "D365HR",
+    "Customer Engagement": "CRM",
+}
+
+# XX.XX.XXX or XX.XX.XXX.XXX (e2e.area.process[.scenario])
+SEQUENCE_ID_PATTERN = r'^(?P<e2e>\d+)\.(?P<area>\d+)\.(?P<process>\d+)(?:\.(?P<scenario>\d+))?$'
+SEQUENCE_ID_REGEX = re.compile(SEQUENCE_ID_PATTERN)
+
+SEQUENCE_PART_COLUMNS = ['e2e', 'area', 'process', 'scenario']
+
+
+def parse_sequence_ids(sequence_ids: pd.Series) -> pd.DataFrame:
+    """
+    Parse a whole column of Process Sequence IDs in one pass.
+
+    Args:
+        sequence_ids: Raw 'Process Sequence ID' column
+
+    Returns:
+        DataFrame on the same index with columns:
+        - sequence_id: stripped string (None for empty cells)
+        - process_code: "XX.XX.XXX" (None if invalid)
+        - e2e, area, process, scenario: nullable integers
+          (scenario is <NA> for a 3-part process code)
+        - valid: True if the id matches the XX.XX.XXX[.XXX] format
+    """
+    text = sequence_ids.astype('string').str.strip()
+    text = text.mask(text == '')
+
+    parts = text.str.extract(SEQUENCE_ID_PATTERN)
+
+    result = pd.DataFrame(index=sequence_ids.index)
+    result['sequence_id'] = text.astype(object).where(text.notna(), None)
+    result['valid'] = parts['e2e'].notna()
+
+    process_code = parts['e2e'] + '.' + parts['area'] + '.' + parts['process']
+    result['process_code'] = process_code.astype(object).where(result['valid'], None)
+
+    for col in SEQUENCE_PART_COLUMNS:
+        result[col] = parts[col].astype('Int64')
+
+    return result
+
+
+def parse_sequence_id(sequence_id) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+    """
+    Parse a single sequence ID with the same rules as parse_sequence_ids.
+
+    Returns:
+        Tuple of (process_code, scenario_number, sequence_id)
+    """
+    if sequence_id is None or pd.isna(sequence_id):
+        return None, None, None
+
+    seq_str = str(sequence_id).strip()
+    match = SEQUENCE_ID_REGEX.match(seq_str)
+    if not match:
+        return None, None, None
+
+    process_code = f"{match['e2e']}.{match['area']}.{match['process']}"
+    scenario = int(match['scenario']) if match['scenario'] is not None else None
+    return process_code, scenario, seq_str
+
+
+def get_erp_codes_from_products(product_str) -> List[str]:
+    """
+    Map a 'Products' cell to every ERP code it mentions.
+
+    Example: "Dynamics 365 Finance, Dynamics 365 Supply Chain Management" -> ["D365SCM", "D365F"]
+    (codes are returned in PRODUCT_MAPPING order, without duplicates)
+    """
+    if product_str is None or pd.isna(product_str):
+        return []
+
+    product_str = str(product_str).strip().lower()
+
+    codes = []
+    for key, code in PRODUCT_MAPPING.items():
+        if key.lower() in product_str and code not in codes:
+            codes.append(code)
+
+    return codes
+
+
+def get_erp_code_from_product(product_str) -> Optional[str]:
+    """Map a 'Products' cell to its first ERP code (used for the single erp_system_id column)."""
+    codes = get_erp_codes_from_products(product_str)
+    return codes[0] if codes else None
+
+
+def parse_products(products: pd.Series) -> pd.Series:
+    """
+    Map a whole 'Products' column to lists of ERP codes.
+
+    The catalog repeats a small set of product strings, so each distinct
+    string is parsed once.
+    """
+    cache: Dict[str, List[str]] = {}
+
+    def lookup(value):
+        if value is None or pd.isna(value):
+            return []
+        if value not in cache:
+            cache[value] = get_erp_codes_from_products(value)
+        return cache[value]
+
+    return products.map(lookup)
@@ -0,0 +1,310 @@
+"""
+Catalog Swap Service - Blue/green catalog refresh without stopping the app
+
+Flow:
+1. create_staging_database() creates a new file with the current schema and
+   copies every table except the hierarchy catalog from the active database
+2. Import scripts write the catalog into staging (the app keeps reading the active file)
+3. validate_staging() checks the staged catalog
+4. promote_staging() copies user data written meanwhile, moves requirements to
+   the new hierarchy ids by node key, switches the active_db.txt pointer in
+   one atomic rename and retires the previous file: its user tables reject
+   writes, so a session or script still bound to it fails loudly instead of
+   writing where nobody reads
+
+Because the catalog is rebuilt from scratch, rows removed or renamed in the
+workbook disappear; answers on them cannot be relinked and are dropped (the
+previous database is kept for rollback).
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+from sqlalchemy import delete, exists, and_
+from sqlalchemy.orm import sessionmaker
+from backend.app.database import (
+    DATABASE_DIR, ACTIVE_DATABASE_FILE, Base,
+    get_active_database_path, create_database_engine
+)
+from backend.app.models import ProcessHierarchy, HierarchyRequirement
+from backend.app.services.hierarchy_integrity import check_hierarchy
+from backend.app.services.node_keys import compute_node_keys, relink_requirements
+from backend.app.services.requirement_rollup import sync_process_requirements
+
+# Tables written by the app (not by the importers).
+# These are copied from the active database at promotion time.
+USER_DATA_TABLES = [
+    "organizations",
+    "users",
+    "customer_requirements",
+    "requirement_history",
+    "hierarchy_requirements",
+    "requirement_revisions",
+    "work_item_requirements",
+    "recommendation_results",
+]
+
+# Error raised by writes to a database retired by promote_staging()
+RETIRED_MESSAGE = "database retired by a catalog swap - reopen the session to use the active catalog"
+
+# Tables rebuilt by import_hierarchy. All other tables start as a copy of the
+# active database.
+CATALOG_TABLES = [
+    "process_hierarchy",
+    "scenario_products",
+    "area_product_rollups",
+]
+
+
+class StagingCatalog:
+    """A staging copy of the database that import scripts can write to."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.engine = create_database_engine(path)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    def session(self):
+        """Open a session on the staging database."""
+        return self.SessionLocal()
+
+    def dispose(self):
+        """Close all pooled connections to the staging file."""
+        self.engine.dispose()
+
+
+def create_staging_database() -> StagingCatalog:
+    """
+    Create a new timestamped staging file with the current schema.
+
+    Every table except CATALOG_TABLES is copied from the active database
+    (common columns only), and each requirement gets the node key of the
+    active row it points to, so the import can move it to the new ids.
+    """
+    # Import all models so create_all knows every table
+    import backend.app.models  # noqa: F401
+
+    active_path = get_active_database_path()
+    staging_path = DATABASE_DIR / f"iter_{datetime.now():%Y%m%d_%H%M%S}.db"
+
+    staging = StagingCatalog(staging_path)
+    Base.metadata.create_all(bind=staging.engine)
+    staging.dispose()
+
+    if active_path.exists():
+        tables = [t.name for t in Base.metadata.sorted_tables if t.name not in CATALOG_TABLES]
+        _copy_from_active(staging, active_path, tables)
+
+    return staging
+
+
+def validate_staging(staging: StagingCatalog) -> Dict[str, int]:
+    """
+    Check that the staged catalog is usable before promoting it.
+
+    Raises:
+        ValueError: If the staged catalog is empty, incomplete or fails the integrity check
+
+    Returns:
+        Row counts of the catalog tables
+    """
+    conn = sqlite3.connect(staging.path)
+    try:
+        counts = {
+            table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            for table in ("erp_systems", "process_hierarchy")
+        }
+
+        levels = {
+            level for (level,) in conn.execute("SELECT DISTINCT level FROM process_hierarchy")
+        }
+    finally:
+        conn.close()
+
+    if counts["erp_systems"] == 0:
+        raise ValueError("Staged catalog has no ERP systems")
+    if counts["process_hierarchy"] == 0:
+        raise ValueError("Staged catalog has no process hierarchy")
+    if not {1, 4}.issubset(levels):
+        raise ValueError("Staged catalog has no E2E processes or scenarios")
+
+    db = staging.session()
+    try:
+        report = check_hierarchy(db)
+    finally:
+        db.close()
+
+    if not report['ok']:
+        failed = ", ".join(f"{check}={report['counts'][check]}" for check in report['errors'])
+        raise ValueError(f"Staged catalog failed the integrity check: {failed}")
+
+    return counts
+
+
+def _table_columns(conn, schema: str, table: str) -> List[str]:
+    """Get column names of a table in an attached schema."""
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _copy_from_active(staging: StagingCatalog, active_path: Path, tables: List[str]):
+    """
+    Replace the given staging tables with the active database's rows, then key requirements.
+
+    Rows are inserted in rowid order with OR REPLACE, so if the active
+    database still holds duplicates of a unique key the latest row wins.
+    """
+    conn = sqlite3.connect(staging.path, isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS live", (str(active_path),))
+        conn.execute("BEGIN")
+        for table in tables:
+            live_columns = set(_table_columns(conn, "live", table))
+            if not live_columns:
+                continue
+            columns = ", ".join(
+                c for c in _table_columns(conn, "main", table) if c in live_columns
+            )
+            conn.execute(f"DELETE FROM main.{table}")
+            conn.execute(
+                f"INSERT OR REPLACE INTO main.{table} ({columns}) "
+                f"SELECT {columns} FROM live.{table} ORDER BY rowid"
+            )
+        if "hierarchy_requirements" in tables:
+            _key_requirements_from_active(conn)
+        conn.execute("COMMIT")
+        conn.execute("DETACH DATABASE live")
+    finally:
+        conn.close()
+
+
+def _key_requirements_from_active(conn):
+    """
+    Set each copied requirement's node key from the active row it points to.
+
+    Keys are computed from the active rows (not read from them), so an active
+    database from before node keys or twin ordinals gets the same keys as the
+    fresh import. Requirements whose row no longer exists are dropped.
+
+    The active ids mean nothing in staging, so links are parked at the
+    negated id until relink_requirements() moves them to the staged row.
+    """
+    live_rows = conn.execute(
+        "SELECT id, sequence_id, level, work_item_type, name FROM live.process_hierarchy "
+        "ORDER BY display_order, id"
+    ).fetchall()
+    keys = compute_node_keys(live_rows)
+
+    conn.execute("CREATE TEMP TABLE live_node_keys (id INTEGER PRIMARY KEY, node_key TEXT)")
+    conn.executemany("INSERT INTO live_node_keys VALUES (?, ?)", keys.items())
+    conn.execute(
+        "DELETE FROM main.hierarchy_requirements WHERE hierarchy_item_id NOT IN (SELECT id FROM live_node_keys)"
+    )
+    conn.execute(
+        "UPDATE main.hierarchy_requirements SET "
+        "hierarchy_node_key = (SELECT node_key FROM live_node_keys WHERE id = hierarchy_requirements.hierarchy_item_id), "
+        "hierarchy_item_id = -hierarchy_item_id"
+    )
+    conn.execute("DROP TABLE live_node_keys")
+
+
+def _drop_unlinked_requirements(db) -> int:
+    """Delete requirements whose node key was not found in the staged catalog (still parked)."""
+    linked = exists().where(and_(
+        ProcessHierarchy.id == HierarchyRequirement.hierarchy_item_id,
+        ProcessHierarchy.node_key == HierarchyRequirement.hierarchy_node_key
+    ))
+    result = db.execute(
+        delete(HierarchyRequirement).where(~linked).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _retire_database(conn, tables: List[str]):
+    """Add triggers that make every write to the given tables fail with RETIRED_MESSAGE."""
+    existing = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table in tables:
+        if table not in existing:
+            continue
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS retired_{table}_{operation.lower()} "
+                f"BEFORE {operation} ON {table} BEGIN SELECT RAISE(ABORT, '{RETIRED_MESSAGE}'); END"
+            )
+
+
+def reactivate_database(path: Path):
+    """
+    Drop the retirement triggers of a previous database (for a manual rollback).
+
+    Point active_db.txt back at the file afterwards; requirements written to
+    the newer database since the swap are not carried back.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        triggers = [name for (name,) in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'retired_%'"
+        )]
+        for name in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def promote_staging(staging: StagingCatalog) -> Dict:
+    """
+    Make the staging database the active one.
+
+    Readers are never blocked, but writers are: the active database is
+    write-locked (BEGIN IMMEDIATE) while user data is copied into the staging
+    file, requirements are relinked to the staged hierarchy and the pointer is
+    switched, so writes wait for the promotion instead of racing it. In the
+    same transaction the active file is retired (see _retire_database), so a
+    writer that was waiting for the lock, or a session opened before the
+    switch, gets an error on commit instead of writing to the old file.
+
+    Returns:
+        {'previous': path of the previous active database (kept for rollback,
+         see reactivate_database), 'requirements_relinked': n, 'requirements_dropped': n}
+    """
+    staging.dispose()
+    active_path = get_active_database_path()
+    stats = {'previous': active_path, 'requirements_relinked': 0, 'requirements_dropped': 0}
+
+    live = None
+    if active_path.exists():
+        live = sqlite3.connect(active_path, isolation_level=None, timeout=30)
+        live.execute("BEGIN IMMEDIATE")
+
+    switched = False
+    try:
+        if live:
+            _copy_from_active(staging, active_path, USER_DATA_TABLES)
+
+            # Copied requirements point at active ids - move them to the staged rows
+            db = staging.session()
+            try:
+                stats['requirements_relinked'] = relink_requirements(db)
+                stats['requirements_dropped'] = _drop_unlinked_requirements(db)
+                sync_process_requirements(db)
+                db.commit()
+            finally:
+                db.close()
+                staging.dispose()
+
+            # Committed together with the lock release below
+            _retire_database(live, USER_DATA_TABLES)
+
+        # Atomic pointer switch
+        pointer_tmp = ACTIVE_DATABASE_FILE.with_suffix(".tmp")
+        pointer_tmp.write_text(staging.path.name)
+        os.replace(pointer_tmp, ACTIVE_DATABASE_FILE)
+        switched = True
+    finally:
+        if live:
+            live.execute("COMMIT" if switched else "ROLLBACK")
+            live.close()
+
+    return stats
@@ -0,0 +1,206 @@
+"""
+Coverage Engine - Product coverage as bitsets
+
+Every catalog item (scenario or business process) gets a fixed bit position.
+Each ERP system is one int bitset of the items it covers, and an organization's
+selections are one bitset per priority bucket. Coverage is then
+(bucket & product).bit_count() and gaps are bucket & ~product.
+
+Engines are built once per catalog version and cached in the process.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, select, union
+from sqlalchemy.orm import Session
+from backend.app.models import (
+    ProcessHierarchy, ScenarioProduct, BusinessProcess, Scenario, SELECTABLE_WORK_ITEM_TYPES
+)
+from backend.app.services.catalog_manifest import get_catalog_version
+from backend.app.services.hierarchy_index import HierarchyIndex, NO_PARENT
+
+# Built engines, keyed by (kind, database url, catalog version, row count, max id)
+_ENGINE_CACHE: Dict[tuple, "CoverageEngine"] = {}
+
+
+class CoverageEngine:
+    """
+    Bitsets over a fixed item id space.
+
+    Attributes:
+        item_ids: Item id at each bit position (sorted)
+        bit: Dict mapping item id to its bit position
+        details: Per-bit dict describing the item (for gap reports)
+        product_masks: Dict mapping erp_system_id to the bitset of covered items
+        rollup: Optional dict mapping a child id (e.g. a work item) to its item id
+        selectable_ids: Optional ids users can answer (e.g. selectable work items)
+    """
+
+    def __init__(
+        self,
+        items: List[Dict],
+        product_items: Dict[int, Iterable[int]],
+        rollup: Optional[Dict[int, int]] = None,
+        selectable_ids: Optional[List[int]] = None
+    ):
+        items = sorted(items, key=lambda item: item['id'])
+        self.item_ids = [item['id'] for item in items]
+        self.details = items
+        self.bit = {item_id: pos for pos, item_id in enumerate(self.item_ids)}
+        self.rollup = rollup or {}
+        self.selectable_ids = selectable_ids or []
+
+        self.product_masks = {
+            erp_system_id: self.mask(item_ids)
+            for erp_system_id, item_ids in product_items.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def mask(self, item_ids: Iterable[int]) -> int:
+        """Bitset of the given item ids (unknown ids are ignored)."""
+        mask = 0
+        bit = self.bit
+        for item_id in item_ids:
+            pos = bit.get(item_id)
+            if pos is not None:
+                mask |= 1 << pos
+        return mask
+
+    def ids(self, mask: int) -> List[int]:
+        """Item ids of the set bits, in id order."""
+        return [self.item_ids[pos] for pos in self.positions(mask)]
+
+    def positions(self, mask: int) -> List[int]:
+        """Positions of the set bits."""
+        positions = []
+        while mask:
+            low = mask & -mask
+            positions.append(low.bit_length() - 1)
+            mask ^= low
+        return positions
+
+    def product_mask(self, erp_system_id: int) -> int:
+        """Bitset of items covered by a product (0 if it covers nothing)."""
+        return self.product_masks.get(erp_system_id, 0)
+
+    def priority_masks(self, selections: Iterable[Tuple[int, str]], priorities: Iterable[str]) -> Dict[str, int]:
+        """
+        Build one bitset per priority bucket.
+
+        Args:
+            selections: (selected id, priority) pairs; ids are mapped through
+                rollup first, so work item ids land on their scenario
+            priorities: Bucket names to build (other priorities are ignored)
+        """
+        masks = {priority: 0 for priority in priorities}
+        bit = self.bit
+        rollup = self.rollup
+        for selected_id, priority in selections:
+            if priority not in masks:
+                continue
+            pos = bit.get(rollup.get(selected_id, selected_id))
+            if pos is not None:
+                masks[priority] |= 1 << pos
+        return masks
+
+    def coverage(self, bucket_mask: int, erp_system_id: int) -> Tuple[int, int]:
+        """(covered, total) of a bucket for one product."""
+        return (bucket_mask & self.product_mask(erp_system_id)).bit_count(), bucket_mask.bit_count()
+
+    def gaps(self, bucket_mask: int, erp_system_id: int) -> int:
+        """Bitset of bucket items the product does not cover."""
+        return bucket_mask & ~self.product_mask(erp_system_id)
+
+
+def _cached(db: Session, kind: str, model, build) -> CoverageEngine:
+    """Return the cached engine for the current catalog, building it if needed."""
+    row_count, max_id = db.query(func.count(model.id), func.max(model.id)).one()
+    key = (kind, str(db.get_bind().url), get_catalog_version(db), row_count, max_id)
+
+    engine = _ENGINE_CACHE.get(key)
+    if engine is None:
+        engine = build(db)
+        # Drop engines of older catalogs of the same kind
+        for old_key in [k for k in _ENGINE_CACHE if k[:2] == key[:2]]:
+            del _ENGINE_CACHE[old_key]
+        _ENGINE_CACHE[key] = engine
+    return engine
+
+
+def build_scenario_engine(db: Session) -> CoverageEngine:
+    """
+    Engine over all level 4 scenarios of ProcessHierarchy.
+
+    Products come from scenario_products plus ProcessHierarchy.erp_system_id
+    (catalogs imported before the association existed). The rollup maps every
+    node below a scenario to that scenario; selectable_ids are the selectable
+    work items (scenarios included) that sit in a scenario.
+    """
+    index = HierarchyIndex.load(db)
+
+    items = []
+    scenario_of: List[Optional[int]] = [None] * len(index)
+    # Parents sit at a lower level, so resolving level by level sees them first
+    for pos in sorted(range(len(index)), key=lambda p: index.levels[p] or 0):
+        level = index.levels[pos]
+        if level == 4:
+            scenario_of[pos] = index.ids[pos]
+            items.append({
+                'id': index.ids[pos],
+                'name': index.names[pos],
+                'sequence_id': index.sequence_ids[pos],
+            })
+        elif level and level > 4 and index.parent_pos[pos] != NO_PARENT:
+            scenario_of[pos] = scenario_of[index.parent_pos[pos]]
+
+    rollup = {
+        index.ids[pos]: scenario_id
+        for pos, scenario_id in enumerate(scenario_of)
+        if scenario_id is not None and scenario_id != index.ids[pos]
+    }
+
+    links = union(
+        select(ScenarioProduct.hierarchy_item_id, ScenarioProduct.erp_system_id),
+        select(ProcessHierarchy.id, ProcessHierarchy.erp_system_id).where(
+            ProcessHierarchy.level == 4,
+            ProcessHierarchy.erp_system_id.is_not(None)
+        )
+    )
+    product_items: Dict[int, List[int]] = {}
+    for scenario_id, erp_system_id in db.execute(links):
+        product_items.setdefault(erp_system_id, []).append(scenario_id)
+
+    selectable_types = set(SELECTABLE_WORK_ITEM_TYPES)
+    selectable_ids = [
+        index.ids[pos] for pos in range(len(index))
+        if index.work_item_types[pos] in selectable_types and scenario_of[pos] is not None
+    ]
+
+    return CoverageEngine(items, product_items, rollup, selectable_ids)
+
+
+def build_process_engine(db: Session) -> CoverageEngine:
+    """Engine over business processes; a product covers a process if it has a scenario for it."""
+    items = [
+        {'id': process_id, 'process_code': code, 'name': name}
+        for process_id, code, name in db.query(
+            BusinessProcess.id, BusinessProcess.process_code, BusinessProcess.name
+        )
+    ]
+
+    product_items: Dict[int, List[int]] = {}
+    for erp_system_id, process_id in db.query(Scenario.erp_system_id, Scenario.business_process_id).distinct():
+        product_items.setdefault(erp_system_id, []).append(process_id)
+
+    return CoverageEngine(items, product_items)
+
+
+def get_scenario_engine(db: Session) -> CoverageEngine:
+    """Scenario coverage engine for the current catalog."""
+    return _cached(db, "scenarios", ProcessHierarchy, build_scenario_engine)
+
+
+def get_process_engine(db: Session) -> CoverageEngine:
+    """Business process coverage engine for the current catalog."""
+    return _cached(db, "processes", Scenario, build_process_engine)
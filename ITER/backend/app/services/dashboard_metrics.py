@@ -0,0 +1,79 @@
+"""
+Dashboard Metrics - Evaluation progress per E2E process and area
+
+Answers are counted with one GROUP BY over (E2E, area, priority) using the
+denormalized ancestor columns, and combined with the Title 1 and Title 2
+nodes and their precomputed selectable_count, so completion percentages need
+no row objects and no tree walk. E2E and overall counts come from the E2E
+column, so items outside any area (and E2Es without areas) are counted too.
+"""
+
+from typing import Dict, List
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from backend.app.models import ProcessHierarchy, HierarchyRequirement, SELECTABLE_WORK_ITEM_TYPES
+
+PRIORITIES = ['must', 'should', 'could', 'wont']
+
+
+def _percentage(part: int, total: int) -> float:
+    return round(part / total * 100, 1) if total else 0.0
+
+
+def get_dashboard_metrics(db: Session, organization_id: int) -> Dict:
+    """
+    Answer counts and completion per E2E process and area.
+
+    Returns:
+        {'totals': {must, should, could, wont, evaluated, selectable, completion_pct},
+         'e2e': [{e2e_id, name, <same counts>, 'areas': [{area_id, name, <same counts>}]}]}
+    """
+    counts = (
+        select(
+            ProcessHierarchy.e2e_node_id,
+            ProcessHierarchy.area_node_id,
+            HierarchyRequirement.priority,
+            func.count().label('answers')
+        )
+        .join(HierarchyRequirement, HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id)
+        .where(
+            HierarchyRequirement.organization_id == organization_id,
+            HierarchyRequirement.priority.in_(PRIORITIES),
+            ProcessHierarchy.work_item_type.in_(SELECTABLE_WORK_ITEM_TYPES)
+        )
+        .group_by(ProcessHierarchy.e2e_node_id, ProcessHierarchy.area_node_id, HierarchyRequirement.priority)
+    )
+
+    def empty(selectable: int) -> Dict:
+        return {**{priority: 0 for priority in PRIORITIES}, 'evaluated': 0, 'selectable': selectable or 0}
+
+    e2e_rows: Dict[int, Dict] = {}
+    for e2e_id, name, selectable in db.execute(
+        select(ProcessHierarchy.id, ProcessHierarchy.name, ProcessHierarchy.selectable_count)
+        .where(ProcessHierarchy.level == 1)
+        .order_by(ProcessHierarchy.display_order, ProcessHierarchy.id)
+    ):
+        e2e_rows[e2e_id] = {'e2e_id': e2e_id, 'name': name, **empty(selectable), 'areas': []}
+
+    areas: Dict[int, Dict] = {}
+    for area_id, name, selectable, e2e_id in db.execute(
+        select(ProcessHierarchy.id, ProcessHierarchy.name, ProcessHierarchy.selectable_count, ProcessHierarchy.e2e_node_id)
+        .where(ProcessHierarchy.level == 2)
+        .order_by(ProcessHierarchy.display_order, ProcessHierarchy.id)
+    ):
+        areas[area_id] = {'area_id': area_id, 'name': name, **empty(selectable)}
+        if e2e_id in e2e_rows:
+            e2e_rows[e2e_id]['areas'].append(areas[area_id])
+
+    totals = empty(sum(row['selectable'] for row in e2e_rows.values()))
+    for e2e_id, area_id, priority, answers in db.execute(counts):
+        for row in (totals, e2e_rows.get(e2e_id), areas.get(area_id)):
+            if row is not None:
+                row[priority] += answers
+                row['evaluated'] += answers
+
+    rows: List[Dict] = [totals, *e2e_rows.values(), *areas.values()]
+    for row in rows:
+        row['completion_pct'] = _percentage(row['evaluated'], row['selectable'])
+
+    return {'totals': totals, 'e2e': list(e2e_rows.values())}
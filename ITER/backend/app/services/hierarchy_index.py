@@ -0,0 +1,73 @@
+"""
+Hierarchy Index - Flat, array-based view of ProcessHierarchy
+
+Loads the whole hierarchy with one query into parallel lists so tree
+algorithms (validation, rollups, ancestor lookups) run in O(n) without
+per-node queries.
+"""
+
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from backend.app.models import ProcessHierarchy
+
+# Marker for "no parent" / "parent not loaded" in parent_pos
+NO_PARENT = -1
+
+
+class HierarchyIndex:
+    """
+    Parallel arrays over all hierarchy nodes, ordered by display_order.
+
+    Attributes:
+        ids, parent_ids, levels, work_item_types, sequence_ids, names, erp_system_ids:
+            One entry per node
+        position: Dict mapping node id to its array position
+        parent_pos: Array position of each node's parent (NO_PARENT if none or missing)
+    """
+
+    def __init__(self, rows: List[tuple]):
+        self.ids = [r[0] for r in rows]
+        self.parent_ids = [r[1] for r in rows]
+        self.levels = [r[2] for r in rows]
+        self.work_item_types = [r[3] for r in rows]
+        self.sequence_ids = [r[4] for r in rows]
+        self.names = [r[5] for r in rows]
+        self.erp_system_ids = [r[6] for r in rows]
+
+        self.position: Dict[int, int] = {node_id: pos for pos, node_id in enumerate(self.ids)}
+        self.parent_pos = [
+            self.position.get(parent_id, NO_PARENT) if parent_id is not None else NO_PARENT
+            for parent_id in self.parent_ids
+        ]
+
+    @classmethod
+    def load(cls, db: Session) -> "HierarchyIndex":
+        """Load all hierarchy nodes in one query."""
+        rows = db.query(
+            ProcessHierarchy.id,
+            ProcessHierarchy.parent_id,
+            ProcessHierarchy.level,
+            ProcessHierarchy.work_item_type,
+            ProcessHierarchy.sequence_id,
+            ProcessHierarchy.name,
+            ProcessHierarchy.erp_system_id,
+        ).order_by(ProcessHierarchy.display_order, ProcessHierarchy.id).all()
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def node(self, pos: int) -> Dict:
+        """Describe a node for reports."""
+        return {
+            'id': self.ids[pos],
+            'sequence_id': self.sequence_ids[pos],
+            'level': self.levels[pos],
+            'work_item_type': self.work_item_types[pos],
+            'name': self.names[pos],
+        }
+
+    def parent_level(self, pos: int) -> Optional[int]:
+        """Level of the node's parent, or None."""
+        parent = self.parent_pos[pos]
+        return self.levels[parent] if parent != NO_PARENT else None
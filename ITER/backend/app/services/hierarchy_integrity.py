@@ -0,0 +1,154 @@
+"""
+Hierarchy Integrity - Validate a loaded catalog in one linear pass
+
+Checks:
+- orphans: parent_id points to a row that does not exist
+- missing_parents: level > 1 but no parent (e.g. Title 2 followed by Title 4)
+- level_jumps: parent is not exactly one level up
+- cycles: following parent_id comes back to the same node
+- duplicate_keys: more than one row with the same (sequence_id, level, work_item_type)
+- scenarios_without_erp: level 4 scenarios not linked to any ERP system
+- work_items_without_scenario: selectable work items with no scenario ancestor
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict
+from sqlalchemy.orm import Session
+from backend.app.models import ScenarioProduct, SELECTABLE_WORK_ITEM_TYPES
+from backend.app.services.hierarchy_index import HierarchyIndex, NO_PARENT
+
+# Checks that fail validation (the rest are reported as warnings)
+ERROR_CHECKS = ['orphans', 'cycles', 'duplicate_keys']
+WARNING_CHECKS = ['missing_parents', 'level_jumps', 'scenarios_without_erp', 'work_items_without_scenario']
+
+# Max example rows listed per check
+MAX_EXAMPLES = 50
+
+
+def check_hierarchy(db: Session, max_examples: int = MAX_EXAMPLES) -> Dict:
+    """
+    Validate the hierarchy stored in the database.
+
+    Returns:
+        JSON-serializable report:
+        {
+            'ok': bool,                 # no error-level issues
+            'total_nodes': int,
+            'elapsed_ms': float,
+            'counts': {check: int},
+            'errors': [check, ...],     # error checks with issues
+            'issues': {check: [node, ...]}  # up to max_examples per check
+        }
+    """
+    start = time.perf_counter()
+
+    index = HierarchyIndex.load(db)
+    linked_scenarios = {
+        item_id for (item_id,) in db.query(ScenarioProduct.hierarchy_item_id).distinct()
+    }
+
+    report = check_index(index, linked_scenarios, max_examples)
+    report['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return report
+
+
+def check_index(index: HierarchyIndex, linked_scenarios=frozenset(), max_examples: int = MAX_EXAMPLES) -> Dict:
+    """Run all checks over a HierarchyIndex (O(n))."""
+    n = len(index)
+    selectable = set(SELECTABLE_WORK_ITEM_TYPES) - {'Scenario'}
+
+    issues = {check: [] for check in ERROR_CHECKS + WARNING_CHECKS}
+    counts = {check: 0 for check in issues}
+
+    def report(check: str, pos: int, **extra):
+        counts[check] += 1
+        if len(issues[check]) < max_examples:
+            issues[check].append({**index.node(pos), **extra})
+
+    # Parent links, level jumps, ERP links, duplicates
+    seen_keys = defaultdict(list)
+    for pos in range(n):
+        level = index.levels[pos]
+        parent_id = index.parent_ids[pos]
+        parent = index.parent_pos[pos]
+
+        if parent_id is not None and parent == NO_PARENT:
+            report('orphans', pos, parent_id=parent_id)
+        elif parent_id is None and level > 1:
+            report('missing_parents', pos)
+        elif parent != NO_PARENT and index.levels[parent] != level - 1:
+            report('level_jumps', pos, parent_id=parent_id, parent_level=index.levels[parent])
+
+        if level == 4 and index.erp_system_ids[pos] is None and index.ids[pos] not in linked_scenarios:
+            report('scenarios_without_erp', pos)
+
+        if index.sequence_ids[pos]:
+            key = (index.sequence_ids[pos], level, index.work_item_types[pos])
+            seen_keys[key].append(index.ids[pos])
+            if len(seen_keys[key]) == 2:
+                report('duplicate_keys', pos, duplicate_ids=seen_keys[key])
+
+    # Cycles and scenario ancestors: each node is resolved once.
+    # state: 0 = not visited, 1 = on current path, 2 = done
+    state = [0] * n
+    has_scenario = [False] * n
+    in_cycle = [False] * n
+
+    for start_pos in range(n):
+        if state[start_pos]:
+            continue
+
+        path = []
+        pos = start_pos
+        while pos != NO_PARENT and state[pos] == 0:
+            state[pos] = 1
+            path.append(pos)
+            pos = index.parent_pos[pos]
+
+        if pos != NO_PARENT and state[pos] == 1:
+            # Walked back onto the current path - everything from pos on is a cycle
+            cycle_start = path.index(pos)
+            for cycle_pos in path[cycle_start:]:
+                in_cycle[cycle_pos] = True
+                state[cycle_pos] = 2
+            report('cycles', pos, cycle_ids=[index.ids[p] for p in path[cycle_start:]])
+            path = path[:cycle_start]
+            ancestor_has_scenario = False
+        elif pos != NO_PARENT:
+            ancestor_has_scenario = has_scenario[pos] or index.levels[pos] == 4
+        else:
+            ancestor_has_scenario = False
+
+        # Resolve the path from the top down
+        for path_pos in reversed(path):
+            has_scenario[path_pos] = ancestor_has_scenario
+            state[path_pos] = 2
+            ancestor_has_scenario = ancestor_has_scenario or index.levels[path_pos] == 4
+
+    for pos in range(n):
+        if not in_cycle[pos] and index.work_item_types[pos] in selectable and not has_scenario[pos]:
+            report('work_items_without_scenario', pos)
+
+    errors = [check for check in ERROR_CHECKS if counts[check]]
+
+    return {
+        'ok': not errors,
+        'total_nodes': n,
+        'counts': counts,
+        'errors': errors,
+        'issues': {check: rows for check, rows in issues.items() if rows},
+    }
+
+
+def format_report(report: Dict) -> str:
+    """Human-readable summary of a check_hierarchy report."""
+    lines = [
+        f"Hierarchy check: {'OK' if report['ok'] else 'FAILED'} "
+        f"({report['total_nodes']} nodes, {report.get('elapsed_ms', 0)} ms)"
+    ]
+    for check, count in report['counts'].items():
+        level = "ERROR" if check in ERROR_CHECKS else "WARNING"
+        marker = f"[{level}]" if count else "[OK]"
+        lines.append(f"  {marker} {check}: {count}")
+    return "\n".join(lines)
@@ -2,118 +2,92 @@
 Hierarchy Recommendation Service - Product recommendations based on hierarchical work item selections
 """
 
-from typing import Dict, List, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from backend.app.models import ProcessHierarchy, HierarchyRequirement, ERPSystem
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, aliased
+from backend.app.models import HierarchyRequirement, ERPSystem, ProcessHierarchy
+from backend.app.services.scoring_config import load_scoring_config, get_recommendation_level
+from backend.app.services.coverage_engine import CoverageEngine, get_scenario_engine
+from backend.app.services.bundle_recommender import recommend_bundles
+from backend.app.services import what_if, score_sampling
+from backend.app.services.question_ranking import QuestionRanker
+from backend.app.services.hierarchy_rollups import get_area_coverage
+from backend.app.services.catalog_manifest import get_catalog_version
+from backend.app.services.recommendation_cache import recommendation_cache, config_hash
 
 class HierarchyRecommendationService:
     """Service for calculating product recommendations from hierarchical work items."""
     
-    # Priority weights for scoring
-    MUST_WEIGHT = 0.7      # 70% weight for 'must' requirements
-    SHOULD_WEIGHT = 0.25   # 25% weight for 'should' requirements
-    COULD_WEIGHT = 0.05    # 5% weight for 'could' requirements
+    PRIORITIES = ['must', 'should', 'could']
     
     # Product categories
     PRIMARY_ERP_PRODUCTS = ['BC', 'D365F', 'D365SCM', 'D365COMM']
     CRM_PRODUCTS = ['CRM', 'D365CS', 'D365FS']
     SPECIALIZED_PRODUCTS = ['D365PO', 'D365HR']
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[Session]):
         self.db = db
+        
+        # Priority weights and level thresholds (backend/app/config/scoring.json)
+        self.scoring = load_scoring_config()
+        self.MUST_WEIGHT = self.scoring['weights']['must']
+        self.SHOULD_WEIGHT = self.scoring['weights']['should']
+        self.COULD_WEIGHT = self.scoring['weights']['could']
     
     def calculate_recommendations(self, organization_id: int) -> Dict[str, Dict]:
         """
         Calculate recommendations based on work item selections.
         
         Flow:
-        1. Get all work item requirements
-        2. Roll up to scenarios (find parent scenarios)
-        3. Group scenarios by priority (must/should/could)
-        4. Map scenarios to ERP systems
-        5. Calculate coverage for each ERP system
+        1. Get all work item requirements (one query)
+        2. Roll up to scenarios and group by priority into bitsets
+        3. Score each ERP system with AND + popcount against its scenario bitset
         """
-        # Get all work item requirements for organization
-        work_item_reqs = self.db.query(HierarchyRequirement).filter(
-            HierarchyRequirement.organization_id == organization_id
-        ).all()
+        selections = self._load_selections(organization_id)
         
-        if not work_item_reqs:
+        if not selections:
             return {}
         
-        # Roll up to scenarios
-        scenario_priorities = self._rollup_to_scenarios(work_item_reqs)
+        engine = get_scenario_engine(self.db)
         
         # Get all ERP systems
         erp_systems = self.db.query(ERPSystem).all()
         
+        return self.score_selections(selections, engine, erp_systems)
+    
+    def _load_selections(self, organization_id: int) -> List[tuple]:
+        """(hierarchy_item_id, priority) of every work item requirement of an organization."""
+        return self.db.query(
+            HierarchyRequirement.hierarchy_item_id, HierarchyRequirement.priority
+        ).filter(
+            HierarchyRequirement.organization_id == organization_id
+        ).all()
+    
+    def score_selections(self, selections: List[tuple], engine: CoverageEngine, erp_systems: List) -> Dict[str, Dict]:
+        """
+        Score (hierarchy_item_id, priority) selections against every ERP system.
+        
+        Does not touch the database, so it can run on preloaded data
+        (erp_systems only need id, code and name attributes).
+        """
+        priority_masks = engine.priority_masks(selections, self.PRIORITIES)
+        
         recommendations = {}
         
         for erp_system in erp_systems:
-            rec_data = self._calculate_product_score(
-                erp_system,
-                scenario_priorities
-            )
+            rec_data = self._calculate_product_score(erp_system, priority_masks, engine)
             recommendations[erp_system.code] = rec_data
         
         return recommendations
     
-    def _rollup_to_scenarios(self, work_item_reqs: List[HierarchyRequirement]) -> Dict[str, List[int]]:
-        """
-        Roll up work item selections to scenarios.
-        
-        Returns:
-            Dict mapping priority to list of scenario IDs
-        """
-        scenario_priorities = {'must': set(), 'should': set(), 'could': set()}
-        
-        for req in work_item_reqs:
-            # Get the work item
-            work_item = self.db.query(ProcessHierarchy).filter(
-                ProcessHierarchy.id == req.hierarchy_item_id
-            ).first()
-            
-            if not work_item:
-                continue
-            
-            # Find parent scenario (level 4)
-            scenario = self._find_scenario_parent(work_item)
-            
-            if scenario:
-                priority = req.priority
-                if priority in scenario_priorities:
-                    scenario_priorities[priority].add(scenario.id)
-        
-        # Convert sets to lists
-        return {k: list(v) for k, v in scenario_priorities.items()}
-    
-    def _find_scenario_parent(self, item: ProcessHierarchy) -> ProcessHierarchy:
-        """Find the scenario (level 4) parent of a work item."""
-        current = item
-        
-        # Traverse up until we find level 4 (scenario)
-        while current:
-            if current.level == 4:  # Scenario level
-                return current
-            
-            # Go to parent
-            if current.parent_id:
-                current = self.db.query(ProcessHierarchy).filter(
-                    ProcessHierarchy.id == current.parent_id
-                ).first()
-            else:
-                break
-        
-        return None
-    
-    def _calculate_product_score(self, erp_system: ERPSystem, scenario_priorities: Dict) -> Dict:
+    def _calculate_product_score(self, erp_system: ERPSystem, priority_masks: Dict[str, int], engine: CoverageEngine) -> Dict:
         """Calculate score for a single product."""
         
         # Find scenarios that map to this ERP system
-        must_coverage = self._calculate_coverage(scenario_priorities['must'], erp_system.id)
-        should_coverage = self._calculate_coverage(scenario_priorities['should'], erp_system.id)
-        could_coverage = self._calculate_coverage(scenario_priorities['could'], erp_system.id)
+        must_coverage = self._calculate_coverage(priority_masks['must'], erp_system.id, engine)
+        should_coverage = self._calculate_coverage(priority_masks['should'], erp_system.id, engine)
+        could_coverage = self._calculate_coverage(priority_masks['could'], erp_system.id, engine)
         
         # Calculate weighted score
         total_score = (
@@ -123,7 +97,7 @@ class HierarchyRecommendationService:
         )
         
         # Find gaps
-        gaps = self._identify_gaps(scenario_priorities['must'], erp_system.id)
+        gaps = self._identify_gaps(priority_masks['must'], erp_system.id, engine)
         
         # Determine recommendation level
         recommendation_level = self._get_recommendation_level(total_score)
@@ -143,9 +117,10 @@ class HierarchyRecommendationService:
             'is_specialized': erp_system.code in self.SPECIALIZED_PRODUCTS
         }
     
-    def _calculate_coverage(self, scenario_ids: List[int], erp_system_id: int) -> Dict:
-        """Calculate how many scenarios are covered by this ERP system."""
-        if not scenario_ids:
+    def _calculate_coverage(self, bucket_mask: int, erp_system_id: int, engine: CoverageEngine) -> Dict:
+        """Calculate how many scenarios of a priority bucket are covered by this ERP system."""
+        covered_count, total = engine.coverage(bucket_mask, erp_system_id)
+        if not total:
             return {
                 'covered': 0,
                 'total': 0,
@@ -153,66 +128,306 @@ class HierarchyRecommendationService:
                 'covered_scenarios': []
             }
         
-        covered_count = 0
-        covered_scenarios = []
-        
-        for scenario_id in scenario_ids:
-            # Get the scenario
-            scenario = self.db.query(ProcessHierarchy).filter(
-                ProcessHierarchy.id == scenario_id
-            ).first()
-            
-            if scenario and scenario.erp_system_id == erp_system_id:
-                covered_count += 1
-                covered_scenarios.append(scenario_id)
-        
-        percentage = (covered_count / len(scenario_ids)) * 100 if scenario_ids else 0
+        percentage = (covered_count / total) * 100
         
         return {
             'covered': covered_count,
-            'total': len(scenario_ids),
+            'total': total,
             'percentage': round(percentage, 2),
-            'covered_scenarios': covered_scenarios
+            'covered_scenarios': engine.ids(bucket_mask & engine.product_mask(erp_system_id))
         }
     
-    def _identify_gaps(self, must_scenario_ids: List[int], erp_system_id: int) -> List[Dict]:
+    def _identify_gaps(self, must_mask: int, erp_system_id: int, engine: CoverageEngine) -> List[Dict]:
         """Identify scenarios that are NOT covered by this ERP system."""
-        gaps = []
-        
-        for scenario_id in must_scenario_ids:
-            scenario = self.db.query(ProcessHierarchy).filter(
-                ProcessHierarchy.id == scenario_id
-            ).first()
-            
-            if scenario and scenario.erp_system_id != erp_system_id:
-                gaps.append({
-                    'scenario_id': scenario.id,
-                    'scenario_name': scenario.name,
-                    'sequence_id': scenario.sequence_id
-                })
-        
-        return gaps
+        return [
+            {
+                'scenario_id': engine.details[pos]['id'],
+                'scenario_name': engine.details[pos]['name'],
+                'sequence_id': engine.details[pos]['sequence_id']
+            }
+            for pos in engine.positions(engine.gaps(must_mask, erp_system_id))
+        ]
     
     def _get_recommendation_level(self, score: float) -> str:
         """Get recommendation level based on score."""
-        if score >= 85:
-            return "Highly Recommended"
-        elif score >= 70:
-            return "Recommended"
-        elif score >= 50:
-            return "Consider"
-        elif score >= 30:
-            return "May Not Be Suitable"
+        return get_recommendation_level(score, self.scoring)
+    
+    def get_bundle_recommendations(self, organization_id: int, costs: Dict[str, float] = None, max_bundles: int = 5) -> Dict:
+        """
+        Cheapest product bundles that cover every 'must' scenario.
+        
+        Args:
+            organization_id: Organization to score
+            costs: Product code -> cost (default: every product costs 1, i.e. fewest products)
+            max_bundles: Number of bundles returned
+        
+        Returns:
+            recommend_bundles() result; bundles are ranked by weighted score
+        """
+        selections = self._load_selections(organization_id)
+        
+        engine = get_scenario_engine(self.db)
+        priority_masks = engine.priority_masks(selections, self.PRIORITIES)
+        
+        product_masks = {
+            code: engine.product_mask(erp_system_id)
+            for erp_system_id, code in self.db.query(ERPSystem.id, ERPSystem.code)
+        }
+        weights = {'must': self.MUST_WEIGHT, 'should': self.SHOULD_WEIGHT, 'could': self.COULD_WEIGHT}
+        
+        return recommend_bundles(product_masks, priority_masks, weights, costs, max_bundles)
+    
+    def what_if(self, organization_id: int, perturbations: List[Dict[int, Optional[str]]]) -> Dict:
+        """
+        Score deltas for a batch of priority changes, for every product, in one call.
+        
+        Args:
+            organization_id: Organization whose current selections are the base
+            perturbations: One dict per scenario, {scenario or work item id: new priority},
+                e.g. [{101: 'must'}, {101: 'must', 102: 'must'}, {205: None}];
+                None (or 'wont') removes the selection
+        
+        Returns:
+            {
+                'products': [code, ...],
+                'base_scores': {code: score},
+                'deltas': ndarray (len(perturbations), len(products)),
+                'primary_erp': [code, ...]  # best primary ERP after each perturbation
+            }
+        """
+        selections = self._load_selections(organization_id)
+        
+        engine = get_scenario_engine(self.db)
+        erp_systems = self.db.query(ERPSystem.id, ERPSystem.code).order_by(ERPSystem.id).all()
+        codes = [code for _, code in erp_systems]
+        
+        coverage = what_if.coverage_matrix(engine, [erp_id for erp_id, _ in erp_systems])
+        selection = what_if.selection_matrix(
+            engine, engine.priority_masks(selections, self.PRIORITIES), self.PRIORITIES
+        )
+        weights = np.array([self.MUST_WEIGHT, self.SHOULD_WEIGHT, self.COULD_WEIGHT])
+        
+        batch_index, item_pos, new_columns = what_if.encode_perturbations(
+            engine, perturbations, self.PRIORITIES, selections
+        )
+        result = what_if.score_perturbations(
+            coverage, selection, weights, batch_index, item_pos, new_columns, len(perturbations)
+        )
+        
+        primary_cols = [col for col, code in enumerate(codes) if code in self.PRIMARY_ERP_PRODUCTS]
+        if primary_cols:
+            winners = np.array(primary_cols)[result['scores'][:, primary_cols].argmax(axis=1)]
+            primary_erp = [codes[col] for col in winners]
         else:
-            return "Not Recommended"
+            primary_erp = [None] * len(perturbations)
+        
+        return {
+            'products': codes,
+            'base_scores': {code: round(float(score), 2) for code, score in zip(codes, result['base'])},
+            'deltas': result['deltas'],
+            'primary_erp': primary_erp,
+        }
+    
+    def get_confidence_bands(
+        self,
+        organization_id: int,
+        n_samples: int = 10000,
+        priors: Dict[str, float] = None,
+        confidence: float = 0.95,
+        seed: int = None
+    ) -> Dict:
+        """
+        Monte Carlo confidence bands for every product's score.
+        
+        Unanswered selectable items get a random priority from the priors
+        (default: 'priors' in the scoring config) and all samples are scored at once.
+        
+        Returns:
+            {
+                'samples': int,
+                'unanswered_items': int,
+                'products': {code: {'score', 'mean', 'low', 'high', 'win_probability'}}
+            }
+            win_probability compares a product with its own category
+            (primary ERP, CRM or specialized).
+        """
+        selections = self._load_selections(organization_id)
+        engine = get_scenario_engine(self.db)
+        erp_systems = self.db.query(ERPSystem.id, ERPSystem.code).order_by(ERPSystem.id).all()
+        codes = [code for _, code in erp_systems]
+        
+        priors = priors or self.scoring['priors']
+        coverage = what_if.coverage_matrix(engine, [erp_id for erp_id, _ in erp_systems])
+        selection = what_if.selection_matrix(
+            engine, engine.priority_masks(selections, self.PRIORITIES), self.PRIORITIES
+        )
+        
+        # Unanswered selectable items per scenario
+        answered = {item_id for item_id, _ in selections}
+        unanswered = np.zeros(len(engine), dtype=np.int64)
+        unanswered_items = 0
+        for item_id in engine.selectable_ids:
+            if item_id not in answered:
+                unanswered[engine.bit[engine.rollup.get(item_id, item_id)]] += 1
+                unanswered_items += 1
+        
+        weights = [self.MUST_WEIGHT, self.SHOULD_WEIGHT, self.COULD_WEIGHT]
+        base = what_if.weighted_scores(selection @ coverage, selection.sum(axis=1), np.array(weights))
+        scores = score_sampling.sample_scores(
+            coverage, selection, unanswered,
+            [priors.get(priority, 0.0) for priority in self.PRIORITIES],
+            weights, n_samples, seed
+        )
+        
+        groups = {
+            'primary': [col for col, code in enumerate(codes) if code in self.PRIMARY_ERP_PRODUCTS],
+            'crm': [col for col, code in enumerate(codes) if code in self.CRM_PRODUCTS],
+            'specialized': [col for col, code in enumerate(codes) if code in self.SPECIALIZED_PRODUCTS],
+        }
+        bands = score_sampling.summarize_samples(scores, groups, confidence)
+        
+        return {
+            'samples': n_samples,
+            'unanswered_items': unanswered_items,
+            'products': {
+                code: {
+                    'score': round(float(base[col]), 2),
+                    'mean': round(float(bands['mean'][col]), 2),
+                    'low': round(float(bands['low'][col]), 2),
+                    'high': round(float(bands['high'][col]), 2),
+                    'win_probability': round(float(bands['win_probability'][col]), 4),
+                }
+                for col, code in enumerate(codes)
+            },
+        }
+    
+    def build_question_ranker(self, organization_id: int) -> QuestionRanker:
+        """
+        Ranker of the unanswered scenarios that matter most for the primary ERP decision.
+        
+        Keep it for the session and call apply_answer() after each save
+        instead of building a new one.
+        """
+        selections = self._load_selections(organization_id)
+        engine = get_scenario_engine(self.db)
+        erp_systems = self.db.query(ERPSystem.id, ERPSystem.code).order_by(ERPSystem.id).all()
+        
+        coverage = what_if.coverage_matrix(engine, [erp_id for erp_id, _ in erp_systems])
+        group_cols = [col for col, (_, code) in enumerate(erp_systems) if code in self.PRIMARY_ERP_PRODUCTS]
+        weights = [self.MUST_WEIGHT, self.SHOULD_WEIGHT, self.COULD_WEIGHT]
+        
+        return QuestionRanker(engine, coverage, group_cols, self.PRIORITIES, weights, selections)
+    
+    def get_area_heatmap(self, organization_id: int, area_level: int = 2) -> List[Dict]:
+        """
+        Per area (Title 2 or Title 3) and product: selected scenarios and how many
+        the product covers, with coverage_pct (None where nothing is selected).
+        """
+        rows = get_area_coverage(self.db, organization_id, area_level, self.PRIORITIES)
+        for row in rows:
+            row['coverage_pct'] = round(row['covered'] / row['selected'] * 100, 1) if row['selected'] else None
+        return rows
+    
+    def get_gap_report(self, organization_id: int) -> Dict[str, List[Dict]]:
+        """
+        Every 'must' scenario each product does not cover, with its context.
+        
+        Uses two queries in total, whatever the number of gaps: one for the
+        scenarios with their E2E/Area/Process ancestors, one for their work
+        items. "Covered by" comes from the coverage bitsets.
+        
+        Returns:
+            Dict mapping product code to a list of gaps:
+            {scenario_id, sequence_id, scenario_name, e2e, area, process, path,
+             work_items: [{id, name, work_item_type, priority}], covered_by: [code, ...]}
+        """
+        selections = self._load_selections(organization_id)
+        engine = get_scenario_engine(self.db)
+        erp_systems = self.db.query(ERPSystem.id, ERPSystem.code).order_by(ERPSystem.id).all()
+        must_mask = engine.priority_masks(selections, self.PRIORITIES)['must']
+        
+        product_gaps = {code: engine.gaps(must_mask, erp_id) for erp_id, code in erp_systems}
+        all_gaps = 0
+        for gap_mask in product_gaps.values():
+            all_gaps |= gap_mask
+        gap_ids = engine.ids(all_gaps)
+        if not gap_ids:
+            return {code: [] for _, code in erp_systems}
+        
+        # Scenarios with their ancestor names (one joined query)
+        e2e, area, process = aliased(ProcessHierarchy), aliased(ProcessHierarchy), aliased(ProcessHierarchy)
+        scenarios = {}
+        for scenario_id, sequence_id, name, e2e_name, area_name, process_name in self.db.query(
+            ProcessHierarchy.id, ProcessHierarchy.sequence_id, ProcessHierarchy.name,
+            e2e.name, area.name, process.name
+        ).outerjoin(e2e, e2e.id == ProcessHierarchy.e2e_node_id
+        ).outerjoin(area, area.id == ProcessHierarchy.area_node_id
+        ).outerjoin(process, process.id == ProcessHierarchy.process_node_id
+        ).filter(ProcessHierarchy.id.in_(gap_ids)):
+            scenarios[scenario_id] = {
+                'scenario_id': scenario_id,
+                'sequence_id': sequence_id,
+                'scenario_name': name,
+                'e2e': e2e_name,
+                'area': area_name,
+                'process': process_name,
+                'path': " → ".join(part for part in (e2e_name, area_name, process_name) if part),
+                'work_items': [],
+            }
+        
+        # Work items of all gap scenarios with this organization's priorities (one query)
+        for scenario_id, item_id, name, work_item_type, priority in self.db.query(
+            ProcessHierarchy.scenario_node_id, ProcessHierarchy.id, ProcessHierarchy.name,
+            ProcessHierarchy.work_item_type, HierarchyRequirement.priority
+        ).outerjoin(HierarchyRequirement, and_(
+            HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id,
+            HierarchyRequirement.organization_id == organization_id
+        )).filter(
+            ProcessHierarchy.scenario_node_id.in_(gap_ids),
+            ProcessHierarchy.level > 4
+        ).order_by(ProcessHierarchy.display_order, ProcessHierarchy.id):
+            scenarios[scenario_id]['work_items'].append({
+                'id': item_id,
+                'name': name,
+                'work_item_type': work_item_type,
+                'priority': priority,
+            })
+        
+        report = {}
+        for erp_id, code in erp_systems:
+            gaps = []
+            for pos in engine.positions(product_gaps[code]):
+                bit = 1 << pos
+                gap = dict(scenarios.get(engine.item_ids[pos], {}))
+                gap['covered_by'] = [
+                    other_code for other_id, other_code in erp_systems
+                    if other_code != code and engine.product_mask(other_id) & bit
+                ]
+                gaps.append(gap)
+            report[code] = gaps
+        return report
     
-    def get_final_recommendation_summary(self, organization_id: int) -> Dict:
+    def get_final_recommendation_summary(self, organization_id: int, use_cache: bool = True) -> Dict:
         """
         Get complete recommendation summary.
         Shows: BC vs D365F vs D365SCM comparison, CRM decision, additional products.
+        
+        Summaries are cached per (organization, requirements revision, catalog
+        version, weights); the returned dict is shared, so do not modify it.
+        Requirement writes must call bump_requirements_revision().
         """
-        recommendations = self.calculate_recommendations(organization_id)
+        if not use_cache:
+            return self.summarize(self.calculate_recommendations(organization_id))
         
+        key = recommendation_cache.key(self.db, organization_id, get_catalog_version(self.db), config_hash(self.scoring))
+        summary = recommendation_cache.get(key)
+        if summary is None:
+            summary = self.summarize(self.calculate_recommendations(organization_id))
+            recommendation_cache.put(key, summary)
+        return summary
+    
+    def summarize(self, recommendations: Dict[str, Dict]) -> Dict:
+        """Build the recommendation summary from calculate_recommendations() output."""
         if not recommendations:
             return {
                 'primary_erp': None,
@@ -0,0 +1,333 @@
+"""
+Hierarchy Rollups - Precomputed ancestor columns and area coverage counts
+
+refresh_hierarchy_rollups() runs after each hierarchy import:
+1. Ancestor columns: every node gets the ids of its E2E, Area, Process and
+   Scenario ancestors (one O(n) pass over HierarchyIndex, one bulk UPDATE)
+2. Subtree counts: selectable work items below every node, and nested-set
+   intervals (pre-order tree_left/tree_right) for per-organization counts
+3. Scenario products: scenarios linked only through erp_system_id get their
+   scenario_products row, so coverage queries need a single link table
+4. Area rollups: scenarios per (Title 2/3 node, product), rebuilt in one pass
+
+With these, per-area views are single aggregated queries instead of tree walks.
+"""
+
+import time
+from collections import Counter
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import select, insert, update, delete, func, exists, and_
+from sqlalchemy.orm import Session
+from backend.app.models import (
+    ProcessHierarchy, HierarchyRequirement, ScenarioProduct, AreaProductRollup, ERPSystem,
+    SELECTABLE_WORK_ITEM_TYPES
+)
+from backend.app.services.hierarchy_index import HierarchyIndex, NO_PARENT
+
+# Ancestor column per hierarchy level
+ANCESTOR_COLUMNS = {
+    1: 'e2e_node_id',
+    2: 'area_node_id',
+    3: 'process_node_id',
+    4: 'scenario_node_id',
+}
+
+# Levels that get area rollups
+ROLLUP_LEVELS = (2, 3)
+
+
+def refresh_ancestor_columns(db: Session) -> int:
+    """
+    Fill e2e/area/process/scenario_node_id for every node.
+
+    Returns:
+        Number of rows whose ancestors changed
+    """
+    index = HierarchyIndex.load(db)
+    n = len(index)
+
+    current = {
+        row[0]: tuple(row[1:])
+        for row in db.query(
+            ProcessHierarchy.id,
+            *(getattr(ProcessHierarchy, column) for column in ANCESTOR_COLUMNS.values())
+        )
+    }
+
+    ancestors: List[tuple] = [(None, None, None, None)] * n
+    # Parents sit at a lower level, so resolving level by level sees them first
+    for pos in sorted(range(n), key=lambda p: index.levels[p] or 0):
+        parent = index.parent_pos[pos]
+        inherited = list(ancestors[parent]) if parent != NO_PARENT else [None, None, None, None]
+        level = index.levels[pos]
+        if level in ANCESTOR_COLUMNS:
+            inherited[level - 1] = index.ids[pos]
+        ancestors[pos] = tuple(inherited)
+
+    changes = [
+        {'id': index.ids[pos], **dict(zip(ANCESTOR_COLUMNS.values(), ancestors[pos]))}
+        for pos in range(n)
+        if current.get(index.ids[pos]) != ancestors[pos]
+    ]
+    if changes:
+        db.execute(update(ProcessHierarchy), changes)
+    return len(changes)
+
+
+def refresh_subtree_counts(db: Session) -> int:
+    """
+    Fill selectable_count (selectable work items in the subtree) for every node.
+
+    Returns:
+        Number of rows whose count changed
+    """
+    index = HierarchyIndex.load(db)
+    n = len(index)
+
+    current = dict(db.query(ProcessHierarchy.id, ProcessHierarchy.selectable_count))
+
+    selectable_types = set(SELECTABLE_WORK_ITEM_TYPES)
+    counts = [1 if index.work_item_types[pos] in selectable_types else 0 for pos in range(n)]
+    # Children sit at a higher level, so adding deepest levels first completes each subtree
+    for pos in sorted(range(n), key=lambda p: index.levels[p] or 0, reverse=True):
+        parent = index.parent_pos[pos]
+        if parent != NO_PARENT:
+            counts[parent] += counts[pos]
+
+    changes = [
+        {'id': index.ids[pos], 'selectable_count': counts[pos]}
+        for pos in range(n)
+        if current.get(index.ids[pos]) != counts[pos]
+    ]
+    if changes:
+        db.execute(update(ProcessHierarchy), changes)
+    return len(changes)
+
+
+def refresh_tree_intervals(db: Session) -> int:
+    """
+    Fill tree_left/tree_right: pre-order number of each node and the last
+    pre-order number in its subtree (siblings in display_order).
+
+    Returns:
+        Number of rows whose interval changed
+    """
+    index = HierarchyIndex.load(db)
+    n = len(index)
+
+    current = {
+        node_id: (left, right)
+        for node_id, left, right in db.query(ProcessHierarchy.id, ProcessHierarchy.tree_left, ProcessHierarchy.tree_right)
+    }
+
+    children: List[List[int]] = [[] for _ in range(n)]
+    roots = []
+    for pos in range(n):  # index order is display order
+        parent = index.parent_pos[pos]
+        (children[parent] if parent != NO_PARENT else roots).append(pos)
+
+    # Nodes unreachable from a root (broken parent links) keep no interval
+    left: List = [None] * n
+    right: List = [None] * n
+    counter = 0
+    # Iterative DFS: (pos, entering) pairs, children pushed in reverse to keep order
+    stack = [(pos, True) for pos in reversed(roots)]
+    while stack:
+        pos, entering = stack.pop()
+        if entering:
+            left[pos] = counter
+            counter += 1
+            stack.append((pos, False))
+            stack.extend((child, True) for child in reversed(children[pos]))
+        else:
+            right[pos] = counter - 1
+
+    changes = [
+        {'id': index.ids[pos], 'tree_left': left[pos], 'tree_right': right[pos]}
+        for pos in range(n)
+        if current.get(index.ids[pos]) != (left[pos], right[pos])
+    ]
+    if changes:
+        db.execute(update(ProcessHierarchy), changes)
+    return len(changes)
+
+
+def backfill_scenario_products(db: Session) -> int:
+    """Add scenario_products rows for scenarios linked only via ProcessHierarchy.erp_system_id."""
+    missing = select(ProcessHierarchy.id, ProcessHierarchy.erp_system_id).where(
+        ProcessHierarchy.level == 4,
+        ProcessHierarchy.erp_system_id.is_not(None),
+        ~exists().where(and_(
+            ScenarioProduct.hierarchy_item_id == ProcessHierarchy.id,
+            ScenarioProduct.erp_system_id == ProcessHierarchy.erp_system_id
+        ))
+    )
+    result = db.execute(
+        insert(ScenarioProduct).from_select(['hierarchy_item_id', 'erp_system_id'], missing)
+    )
+    return result.rowcount
+
+
+def refresh_area_rollups(db: Session) -> int:
+    """Rebuild area_product_rollups (every area x every product, zero counts included)."""
+    erp_ids = [erp_id for (erp_id,) in db.query(ERPSystem.id)]
+
+    rows = []
+    for level in ROLLUP_LEVELS:
+        area_column = getattr(ProcessHierarchy, ANCESTOR_COLUMNS[level])
+
+        area_totals = dict(
+            db.query(area_column, func.count(ProcessHierarchy.id))
+            .filter(ProcessHierarchy.level == 4, area_column.is_not(None))
+            .group_by(area_column)
+        )
+        covered = Counter({
+            (area_id, erp_id): count
+            for area_id, erp_id, count in db.query(area_column, ScenarioProduct.erp_system_id, func.count())
+            .join(ScenarioProduct, ScenarioProduct.hierarchy_item_id == ProcessHierarchy.id)
+            .filter(ProcessHierarchy.level == 4, area_column.is_not(None))
+            .group_by(area_column, ScenarioProduct.erp_system_id)
+        })
+
+        area_ids = [area_id for (area_id,) in db.query(ProcessHierarchy.id).filter(ProcessHierarchy.level == level)]
+        rows.extend(
+            {
+                'area_node_id': area_id,
+                'area_level': level,
+                'erp_system_id': erp_id,
+                'scenario_count': covered[(area_id, erp_id)],
+                'area_scenario_count': area_totals.get(area_id, 0),
+            }
+            for area_id in area_ids
+            for erp_id in erp_ids
+        )
+
+    db.execute(delete(AreaProductRollup))
+    if rows:
+        db.execute(insert(AreaProductRollup), rows)
+    return len(rows)
+
+
+def refresh_hierarchy_rollups(db: Session) -> Dict:
+    """Refresh all precomputed hierarchy data in one transaction."""
+    start = time.perf_counter()
+    stats = {
+        'ancestors_updated': refresh_ancestor_columns(db),
+        'subtree_counts_updated': refresh_subtree_counts(db),
+        'tree_intervals_updated': refresh_tree_intervals(db),
+        'scenario_products_added': backfill_scenario_products(db),
+    }
+    db.flush()
+    stats['area_rollups'] = refresh_area_rollups(db)
+    db.commit()
+    stats['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return stats
+
+
+def get_area_coverage(db: Session, organization_id: int, area_level: int = 2, priorities=('must', 'should', 'could')) -> List[Dict]:
+    """
+    Heatmap data: per area and product, the organization's selected scenarios
+    and how many of them the product covers - one aggregated query.
+
+    Returns:
+        One dict per (area, product):
+        area_id, sequence_id, area_name, erp_system_code, selected, covered,
+        catalog_covered, catalog_total
+    """
+    area_column = getattr(ProcessHierarchy, ANCESTOR_COLUMNS[area_level])
+
+    # The organization's selections rolled up to distinct scenarios
+    selected = (
+        select(ProcessHierarchy.scenario_node_id.label('scenario_id'), area_column.label('area_id'))
+        .join(HierarchyRequirement, HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id)
+        .where(
+            HierarchyRequirement.organization_id == organization_id,
+            HierarchyRequirement.priority.in_(priorities),
+            ProcessHierarchy.scenario_node_id.is_not(None),
+            area_column.is_not(None)
+        )
+        .distinct()
+        .subquery()
+    )
+    selected_per_area = (
+        select(selected.c.area_id, func.count().label('selected'))
+        .group_by(selected.c.area_id)
+        .subquery()
+    )
+    covered_per_area = (
+        select(selected.c.area_id, ScenarioProduct.erp_system_id, func.count().label('covered'))
+        .join(ScenarioProduct, ScenarioProduct.hierarchy_item_id == selected.c.scenario_id)
+        .group_by(selected.c.area_id, ScenarioProduct.erp_system_id)
+        .subquery()
+    )
+
+    area = ProcessHierarchy
+    query = (
+        select(
+            AreaProductRollup.area_node_id,
+            area.sequence_id,
+            area.name,
+            ERPSystem.code,
+            func.coalesce(selected_per_area.c.selected, 0),
+            func.coalesce(covered_per_area.c.covered, 0),
+            AreaProductRollup.scenario_count,
+            AreaProductRollup.area_scenario_count,
+        )
+        .join(area, area.id == AreaProductRollup.area_node_id)
+        .join(ERPSystem, ERPSystem.id == AreaProductRollup.erp_system_id)
+        .outerjoin(selected_per_area, selected_per_area.c.area_id == AreaProductRollup.area_node_id)
+        .outerjoin(covered_per_area, and_(
+            covered_per_area.c.area_id == AreaProductRollup.area_node_id,
+            covered_per_area.c.erp_system_id == AreaProductRollup.erp_system_id
+        ))
+        .where(AreaProductRollup.area_level == area_level)
+        .order_by(area.display_order, ERPSystem.id)
+    )
+
+    return [
+        {
+            'area_id': area_id,
+            'sequence_id': sequence_id,
+            'area_name': name,
+            'erp_system_code': code,
+            'selected': selected_count,
+            'covered': covered_count,
+            'catalog_covered': catalog_covered,
+            'catalog_total': catalog_total,
+        }
+        for area_id, sequence_id, name, code, selected_count, covered_count, catalog_covered, catalog_total
+        in db.execute(query)
+    ]
+
+
+class SubtreeCounts:
+    """
+    Prefix sums over the pre-order numbering: the count of marked nodes in any
+    subtree is prefix[tree_right + 1] - prefix[tree_left], O(1) per node.
+    """
+
+    def __init__(self, positions: List[int], size: int):
+        marks = np.bincount(np.asarray(positions, dtype=np.int64), minlength=size)
+        self.prefix = np.concatenate(([0], np.cumsum(marks)))
+
+    def count(self, tree_left, tree_right) -> int:
+        """Marked nodes in the subtree (0 for nodes without an interval)."""
+        if tree_left is None or tree_right is None:
+            return 0
+        return int(self.prefix[tree_right + 1] - self.prefix[tree_left])
+
+
+def get_evaluated_counts(db: Session, organization_id: int) -> SubtreeCounts:
+    """Answered selectable items of an organization, countable per subtree."""
+    size = (db.query(func.max(ProcessHierarchy.tree_right)).scalar() or -1) + 1
+    positions = [
+        tree_left for (tree_left,) in db.query(ProcessHierarchy.tree_left)
+        .join(HierarchyRequirement, HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id)
+        .filter(
+            HierarchyRequirement.organization_id == organization_id,
+            ProcessHierarchy.work_item_type.in_(SELECTABLE_WORK_ITEM_TYPES),
+            ProcessHierarchy.tree_left.is_not(None)
+        )
+    ]
+    return SubtreeCounts(positions, size)
@@ -0,0 +1,177 @@
+"""
+Node Keys - Stable, content-derived keys for ProcessHierarchy nodes
+
+ProcessHierarchy.id depends on import order. The node key is a hash of
+(sequence_id, level, work_item_type, normalized name), so the same catalog
+row gets the same key after every re-import. Rows with identical content
+("twins") are told apart by their ordinal among the twins in catalog order;
+the first twin keeps the plain key.
+"""
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import update, select, exists, func, and_
+from sqlalchemy.orm import Session
+from backend.app.models import ProcessHierarchy, HierarchyRequirement
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase and collapse whitespace."""
+    if not name:
+        return ""
+    return re.sub(r'\s+', ' ', str(name)).strip().lower()
+
+
+def make_node_key(
+    sequence_id: Optional[str],
+    level: int,
+    work_item_type: Optional[str],
+    name: Optional[str],
+    ordinal: int = 0
+) -> str:
+    """
+    Build the node key for a hierarchy row.
+
+    Example: ("65.05.040.100", 5, "Task", "Define catalog") -> 40-char SHA-1 hex
+
+    Args:
+        ordinal: Position among rows with identical content (0 for the first)
+    """
+    parts = [
+        (sequence_id or "").strip(),
+        str(level),
+        (work_item_type or "").strip().lower(),
+        normalize_name(name),
+    ]
+    if ordinal:
+        parts.append(str(ordinal))
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def compute_node_keys(rows: Iterable[tuple]) -> Dict[int, str]:
+    """
+    Node key per row id, numbering twins in the given order.
+
+    Args:
+        rows: (id, sequence_id, level, work_item_type, name) in catalog order
+            (display_order, id)
+    """
+    twins: Dict[str, int] = defaultdict(int)
+    keys = {}
+    for item_id, seq, level, wit, name in rows:
+        base = make_node_key(seq, level, wit, name)
+        keys[item_id] = make_node_key(seq, level, wit, name, twins[base])
+        twins[base] += 1
+    return keys
+
+
+def refresh_node_keys(db: Session) -> int:
+    """
+    Compute the node key of every hierarchy row, numbering twins in catalog order.
+
+    Requirements linked to a row whose key changes get the new key as well,
+    so they keep following their row.
+
+    Returns:
+        Number of rows whose key changed
+    """
+    rows = db.query(
+        ProcessHierarchy.id, ProcessHierarchy.sequence_id, ProcessHierarchy.level,
+        ProcessHierarchy.work_item_type, ProcessHierarchy.name, ProcessHierarchy.node_key
+    ).order_by(ProcessHierarchy.display_order, ProcessHierarchy.id).all()
+
+    keys = compute_node_keys(row[:5] for row in rows)
+    changes = [
+        {'id': item_id, 'node_key': keys[item_id], 'old_key': current}
+        for item_id, *_, current in rows
+        if keys[item_id] != current
+    ]
+
+    if changes:
+        db.execute(update(ProcessHierarchy), [{'id': c['id'], 'node_key': c['node_key']} for c in changes])
+        for change in changes:
+            if change['old_key'] is not None:
+                db.execute(
+                    update(HierarchyRequirement)
+                    .where(
+                        HierarchyRequirement.hierarchy_item_id == change['id'],
+                        HierarchyRequirement.hierarchy_node_key == change['old_key']
+                    )
+                    .values(hierarchy_node_key=change['node_key'])
+                )
+    db.commit()
+    return len(changes)
+
+
+def find_node_key_collisions(db: Session) -> List[str]:
+    """Node keys shared by more than one row (requirements on them are not relinked)."""
+    return [
+        key for (key,) in db.query(ProcessHierarchy.node_key)
+        .filter(ProcessHierarchy.node_key.is_not(None))
+        .group_by(ProcessHierarchy.node_key)
+        .having(func.count() > 1)
+    ]
+
+
+def relink_requirements(db: Session) -> int:
+    """
+    Point every requirement at the hierarchy row with its node key.
+
+    Requirements saved before node keys existed first get the key of the row
+    they point to. After a catalog reload with new ids, each requirement is
+    moved to the row with the same key. Keys shared by several rows (see
+    find_node_key_collisions) are never followed - such requirements stay
+    where they are instead of landing on the wrong twin.
+
+    Returns:
+        Number of requirements whose hierarchy_item_id changed
+    """
+    # Fill missing keys from the current link
+    db.execute(
+        update(HierarchyRequirement)
+        .where(HierarchyRequirement.hierarchy_node_key.is_(None))
+        .values(hierarchy_node_key=select(ProcessHierarchy.node_key).where(
+            ProcessHierarchy.id == HierarchyRequirement.hierarchy_item_id
+        ).scalar_subquery())
+    )
+
+    # Follow the key to the current row (keys of exactly one row only)
+    unique_keys = (
+        select(ProcessHierarchy.node_key, func.min(ProcessHierarchy.id).label('id'))
+        .where(ProcessHierarchy.node_key.is_not(None))
+        .group_by(ProcessHierarchy.node_key)
+        .having(func.count() == 1)
+        .subquery()
+    )
+    current_id = select(unique_keys.c.id).where(
+        unique_keys.c.node_key == HierarchyRequirement.hierarchy_node_key
+    ).scalar_subquery()
+
+    follows_key = and_(
+        HierarchyRequirement.hierarchy_node_key.is_not(None),
+        exists().where(unique_keys.c.node_key == HierarchyRequirement.hierarchy_node_key)
+    )
+
+    # Park the links that move at negative ids first, so shifted ids never
+    # collide with uq_org_hierarchy_item halfway through the update.
+    # (Negative ids also mark links copied from another database, see catalog_swap.)
+    db.execute(
+        update(HierarchyRequirement)
+        .where(
+            follows_key,
+            HierarchyRequirement.hierarchy_item_id > 0,
+            HierarchyRequirement.hierarchy_item_id != current_id
+        )
+        .values(hierarchy_item_id=-HierarchyRequirement.hierarchy_item_id)
+        .execution_options(synchronize_session=False)
+    )
+    result = db.execute(
+        update(HierarchyRequirement)
+        .where(follows_key, HierarchyRequirement.hierarchy_item_id < 0)
+        .values(hierarchy_item_id=current_id)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
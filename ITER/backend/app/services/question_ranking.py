@@ -0,0 +1,158 @@
+"""
+Question Ranking - Which unanswered scenario would move the recommendation most
+
+The ranker keeps incremental counters for one organization:
+- answered item counts per (priority bucket, scenario)
+- covered counts per (bucket, product) and selected counts per bucket
+- unanswered selectable items per scenario
+
+apply_answer() updates them in O(products) for one save or clear. Impacts are then
+computed from the counters for all open scenarios at once: for each possible
+answer, the score change of every product if the scenario joined that bucket,
+and how much that moves the leading primary ERP against its competitors.
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from backend.app.services.coverage_engine import CoverageEngine
+
+
+class QuestionRanker:
+    """Incremental "next best question" ranking for one organization."""
+
+    def __init__(
+        self,
+        engine: CoverageEngine,
+        coverage: np.ndarray,
+        group_cols: Sequence[int],
+        priorities: Sequence[str],
+        weights: Sequence[float],
+        selections: List[tuple]
+    ):
+        """
+        Args:
+            engine: Scenario coverage engine
+            coverage: (scenarios, products) 0/1 coverage matrix
+            group_cols: Product columns competing for the decision (e.g. primary ERPs)
+            priorities: Bucket names, e.g. ['must', 'should', 'could']
+            weights: Score weight per bucket
+            selections: Current (hierarchy_item_id, priority) answers
+        """
+        self.engine = engine
+        self.coverage = coverage.astype(np.float64)
+        self.group_cols = np.asarray(group_cols, dtype=np.int64)
+        self.priorities = list(priorities)
+        self.bucket = {priority: k for k, priority in enumerate(self.priorities)}
+        self.weights = np.asarray(weights, dtype=np.float64)
+
+        n_buckets, n_scenarios = len(self.priorities), len(engine)
+        self.answered: Dict[int, str] = {}
+        self.item_counts = np.zeros((n_buckets, n_scenarios), dtype=np.int64)
+        self.covered = np.zeros((n_buckets, coverage.shape[1]))
+        self.totals = np.zeros(n_buckets)
+
+        # Unanswered selectable items per scenario position (id order)
+        self.selectable = set(engine.selectable_ids)
+        self.open_items: Dict[int, List[int]] = {}
+        for item_id in sorted(self.selectable):
+            self.open_items.setdefault(self._scenario_pos(item_id), []).append(item_id)
+
+        for item_id, priority in selections:
+            self.apply_answer(item_id, None, priority)
+
+    def _scenario_pos(self, item_id: int) -> Optional[int]:
+        return self.engine.bit.get(self.engine.rollup.get(item_id, item_id))
+
+    def _set_membership(self, k: int, pos: int, delta: int):
+        """Scenario pos joins (+1) or leaves (-1) bucket k."""
+        self.covered[k] += delta * self.coverage[pos]
+        self.totals[k] += delta
+
+    def apply_answer(self, item_id: int, old_priority: Optional[str], new_priority: Optional[str]):
+        """Update the counters for one saved answer (old_priority None = was unanswered)."""
+        pos = self._scenario_pos(item_id)
+        if pos is None:
+            return
+
+        old_priority = self.answered.get(item_id, old_priority)
+        old_k = self.bucket.get(old_priority)
+        if old_k is not None:
+            self.item_counts[old_k, pos] -= 1
+            if self.item_counts[old_k, pos] == 0:
+                self._set_membership(old_k, pos, -1)
+
+        new_k = self.bucket.get(new_priority)
+        if new_k is not None:
+            self.item_counts[new_k, pos] += 1
+            if self.item_counts[new_k, pos] == 1:
+                self._set_membership(new_k, pos, +1)
+
+        if new_priority is None:
+            # A cleared selectable item is open again
+            if self.answered.pop(item_id, None) is not None and item_id in self.selectable:
+                open_items = self.open_items.setdefault(pos, [])
+                if item_id not in open_items:
+                    bisect.insort(open_items, item_id)
+        else:
+            self.answered[item_id] = new_priority
+            open_items = self.open_items.get(pos)
+            if open_items and item_id in open_items:
+                open_items.remove(item_id)
+
+    def _percentages(self, covered: np.ndarray, totals: np.ndarray) -> np.ndarray:
+        return np.divide(
+            covered * 100.0, totals,
+            out=np.zeros(np.broadcast(covered, totals).shape), where=totals > 0
+        )
+
+    def scores(self) -> np.ndarray:
+        """Current score per product."""
+        return self.weights @ self._percentages(self.covered, self.totals[:, None])
+
+    def rank(self, top_n: int = 10) -> List[Dict]:
+        """
+        The top_n open scenarios whose answer could change the decision most.
+
+        impact: largest change of the leader's lead over a competitor for any
+            answer (in score points)
+        could_flip: some answer would put a competitor ahead of the leader
+        item_ids: the scenario's open items (an answer applies to all of them)
+        """
+        open_pos = np.array([pos for pos, items in self.open_items.items() if items], dtype=np.int64)
+        if not len(open_pos) or not len(self.group_cols):
+            return []
+
+        scores = self.scores()
+        group_scores = scores[self.group_cols]
+        leader = int(np.argmax(group_scores))
+
+        current = self._percentages(self.covered, self.totals[:, None])[:, self.group_cols]   # (buckets, group)
+        cover = self.coverage[np.ix_(open_pos, self.group_cols)]                              # (open, group)
+
+        impact = np.zeros(len(open_pos))
+        could_flip = np.zeros(len(open_pos), dtype=bool)
+        for k in range(len(self.priorities)):
+            joins = self.item_counts[k, open_pos] == 0
+            new = self._percentages(self.covered[k, self.group_cols] + cover, self.totals[k] + 1)
+            delta = np.where(joins[:, None], self.weights[k] * (new - current[k]), 0.0)      # (open, group)
+            lead_change = np.abs(delta - delta[:, leader:leader + 1]).max(axis=1)
+            impact = np.maximum(impact, lead_change)
+            new_scores = group_scores + delta
+            could_flip |= (new_scores > new_scores[:, leader:leader + 1]).any(axis=1)
+
+        order = np.lexsort((open_pos, -impact, ~could_flip))[:top_n]
+        return [
+            {
+                'scenario_id': self.engine.item_ids[open_pos[i]],
+                'scenario_name': self.engine.details[open_pos[i]]['name'],
+                'sequence_id': self.engine.details[open_pos[i]]['sequence_id'],
+                'item_id': self.open_items[open_pos[i]][0],
+                'item_ids': list(self.open_items[open_pos[i]]),
+                'unanswered_items': len(self.open_items[open_pos[i]]),
+                'impact': round(float(impact[i]), 2),
+                'could_flip': bool(could_flip[i]),
+            }
+            for i in order
+            if impact[i] > 0
+        ]
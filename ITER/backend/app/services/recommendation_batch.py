@@ -0,0 +1,138 @@
+"""
+Recommendation Batch - Score every organization in one run
+
+1. All HierarchyRequirement rows are read in one scan, grouped by organization
+2. Organizations are scored in chunks over a process pool; workers get the
+   coverage engine and ERP systems once (initializer) and never touch the database
+3. All results are written to recommendation_results in one bulk insert,
+   stamped with the run's start time
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from backend.app.models import HierarchyRequirement, ERPSystem, RecommendationResult
+from backend.app.services.coverage_engine import CoverageEngine, get_scenario_engine
+from backend.app.services.hierarchy_recommendation_service import HierarchyRecommendationService
+
+# Organizations per worker task
+CHUNK_SIZE = 50
+
+# Picklable stand-in for ERPSystem (scoring only needs these attributes)
+ERPSystemRow = namedtuple("ERPSystemRow", ["id", "code", "name"])
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+
+def _init_worker(engine: CoverageEngine, erp_systems: List[ERPSystemRow]):
+    """Give a worker process the shared scoring inputs."""
+    _worker['engine'] = engine
+    _worker['erp_systems'] = erp_systems
+    _worker['service'] = HierarchyRecommendationService(None)
+
+
+def _score_chunk(chunk: List[Tuple[int, List[tuple]]]) -> List[Tuple[int, Dict]]:
+    """Score a chunk of (organization_id, selections) and return their summaries."""
+    service = _worker['service']
+    return [
+        (org_id, service.summarize(
+            service.score_selections(selections, _worker['engine'], _worker['erp_systems'])
+        ))
+        for org_id, selections in chunk
+    ]
+
+
+def load_selections_by_organization(db: Session) -> Dict[int, List[tuple]]:
+    """All (hierarchy_item_id, priority) selections, grouped by organization, in one scan."""
+    selections: Dict[int, List[tuple]] = {}
+    for org_id, item_id, priority in db.query(
+        HierarchyRequirement.organization_id,
+        HierarchyRequirement.hierarchy_item_id,
+        HierarchyRequirement.priority
+    ).order_by(HierarchyRequirement.organization_id):
+        selections.setdefault(org_id, []).append((item_id, priority))
+    return selections
+
+
+def _result_rows(org_id: int, summary: Dict, run_at: datetime) -> List[Dict]:
+    """recommendation_results rows for one organization's summary."""
+    primary = summary.get('primary_erp') or {}
+    crm = summary.get('crm') or {}
+    return [
+        {
+            'organization_id': org_id,
+            'run_at': run_at,
+            'erp_system_code': code,
+            'total_score': rec['total_score'],
+            'must_coverage': rec['must_coverage']['percentage'],
+            'should_coverage': rec['should_coverage']['percentage'],
+            'could_coverage': rec['could_coverage']['percentage'],
+            'gap_count': len(rec['gaps']),
+            'recommendation_level': rec['recommendation_level'],
+            'is_primary_choice': code == primary.get('product_code'),
+            'is_crm_choice': bool(crm.get('needed')) and code == crm.get('product_code'),
+        }
+        for code, rec in summary['all_recommendations'].items()
+    ]
+
+
+def run_batch(db: Session, workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Dict:
+    """
+    Score every organization with requirements and store the results.
+
+    Args:
+        db: Database session
+        workers: Worker processes (default: CPU count; 1 = score in this process)
+        chunk_size: Organizations per worker task
+
+    Returns:
+        Stats: {'run_at', 'organizations', 'rows', 'workers', 'load_seconds', 'score_seconds', 'write_seconds'}
+    """
+    run_at = datetime.now(timezone.utc)
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    engine = get_scenario_engine(db)
+    erp_systems = [
+        ERPSystemRow(*row) for row in db.query(ERPSystem.id, ERPSystem.code, ERPSystem.name).order_by(ERPSystem.id)
+    ]
+    selections = load_selections_by_organization(db)
+    load_seconds = time.perf_counter() - start
+
+    items = list(selections.items())
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+    start = time.perf_counter()
+    if workers == 1 or len(chunks) <= 1:
+        workers = 1
+        _init_worker(engine, erp_systems)
+        scored = [result for chunk in chunks for result in _score_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(engine, erp_systems)
+        ) as pool:
+            scored = [result for results in pool.map(_score_chunk, chunks) for result in results]
+    score_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = [row for org_id, summary in scored for row in _result_rows(org_id, summary, run_at)]
+    if rows:
+        db.execute(insert(RecommendationResult), rows)
+    db.commit()
+    write_seconds = time.perf_counter() - start
+
+    return {
+        'run_at': run_at,
+        'organizations': len(items),
+        'rows': len(rows),
+        'workers': workers,
+        'load_seconds': round(load_seconds, 3),
+        'score_seconds': round(score_seconds, 3),
+        'write_seconds': round(write_seconds, 3),
+    }
@@ -0,0 +1,116 @@
+"""
+Recommendation Cache - Process-wide LRU cache for recommendation summaries
+
+Entries are keyed by (organization_id, requirements revision, catalog version,
+weights hash), so a stale entry can never be returned:
+- requirement writes call bump_requirements_revision() in their transaction;
+  the revision is stored in the database, so writes by other app processes
+  change the key too
+- a catalog re-import changes the catalog version
+- a new scoring config changes the weights hash
+Old entries are simply never hit again and fall out through LRU eviction.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from sqlalchemy.orm import Session
+from backend.app.database import dialect_insert
+from backend.app.models import RequirementRevision
+
+# Max cached summaries (one per organization/revision/catalog/weights)
+MAX_ENTRIES = 256
+
+
+def config_hash(config: Dict) -> str:
+    """Short stable hash of a scoring config."""
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def requirements_revision(db: Session, organization_id: int) -> int:
+    """Persisted requirements revision of an organization (0 until its first write)."""
+    return db.query(RequirementRevision.revision).filter(
+        RequirementRevision.organization_id == organization_id
+    ).scalar() or 0
+
+
+def bump_requirements_revision(db: Session, organization_id: int) -> int:
+    """
+    Increment an organization's requirements revision (not committed).
+
+    Call in the same transaction as the requirement write, so the new
+    revision is visible exactly when the write is.
+    """
+    stmt = dialect_insert(db, RequirementRevision).values(organization_id=organization_id, revision=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RequirementRevision.organization_id],
+        set_={'revision': RequirementRevision.revision + 1}
+    )
+    db.execute(stmt)
+    return requirements_revision(db, organization_id)
+
+
+class RecommendationCache:
+    """Bounded LRU cache with hit/miss counters."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, db: Session, organization_id: int, catalog_version: int, weights_hash: str) -> tuple:
+        """Cache key for an organization's summary."""
+        return (organization_id, requirements_revision(db, organization_id), catalog_version, weights_hash)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None (counts a hit or a miss)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries beyond max_entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_organization(self, organization_id: int):
+        """Drop an organization's entries (they can no longer be hit after a revision bump)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == organization_id]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """Size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Shared by all sessions of the app process
+recommendation_cache = RecommendationCache()
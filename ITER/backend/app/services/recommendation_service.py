@@ -5,17 +5,14 @@ This service maps requirements to Microsoft ERP products and generates scores.
 
 from typing import Dict, List, Tuple
 from sqlalchemy.orm import Session
-from app.models.requirement import CustomerRequirement
-from app.models.process import BusinessProcess, Scenario
-from app.models.product import ERPSystem
+from backend.app.models import CustomerRequirement, ERPSystem
+from backend.app.services.scoring_config import load_scoring_config, get_recommendation_level
+from backend.app.services.coverage_engine import CoverageEngine, get_process_engine
 
 class RecommendationService:
     """Service for calculating product recommendations."""
     
-    # Priority weights for scoring
-    MUST_WEIGHT = 0.7      # 70% weight for 'must' requirements
-    SHOULD_WEIGHT = 0.25    # 25% weight for 'should' requirements
-    OPTIONAL_WEIGHT = 0.05  # 5% weight for 'optional' requirements
+    PRIORITIES = ['must', 'should', 'optional']
     
     # Product categories for recommendations
     PRIMARY_ERP_PRODUCTS = ['BC', 'D365F', 'D365SCM', 'D365COMM']
@@ -24,6 +21,12 @@ class RecommendationService:
     
     def __init__(self, db: Session):
         self.db = db
+        
+        # Priority weights and level thresholds (backend/app/config/scoring.json)
+        self.scoring = load_scoring_config()
+        self.MUST_WEIGHT = self.scoring['weights']['must']
+        self.SHOULD_WEIGHT = self.scoring['weights']['should']
+        self.OPTIONAL_WEIGHT = self.scoring['weights']['could']
     
     def calculate_recommendations(self, organization_id: int) -> Dict[str, Dict]:
         """
@@ -33,14 +36,15 @@ class RecommendationService:
             Dict mapping product codes to recommendation data
         """
         # Get all requirements for organization
-        requirements = self.db.query(CustomerRequirement).filter(
+        selections = self.db.query(
+            CustomerRequirement.business_process_id, CustomerRequirement.priority
+        ).filter(
             CustomerRequirement.organization_id == organization_id
         ).all()
         
-        # Separate by priority
-        must_reqs = [r for r in requirements if r.priority == 'must']
-        should_reqs = [r for r in requirements if r.priority == 'should']
-        optional_reqs = [r for r in requirements if r.priority == 'optional']
+        # Separate by priority (one bitset per bucket)
+        engine = get_process_engine(self.db)
+        priority_masks = engine.priority_masks(selections, self.PRIORITIES)
         
         # Get all ERP systems
         erp_systems = self.db.query(ERPSystem).all()
@@ -48,12 +52,7 @@ class RecommendationService:
         recommendations = {}
         
         for erp_system in erp_systems:
-            rec_data = self._calculate_product_score(
-                erp_system,
-                must_reqs,
-                should_reqs,
-                optional_reqs
-            )
+            rec_data = self._calculate_product_score(erp_system, priority_masks, engine)
             recommendations[erp_system.code] = rec_data
         
         return recommendations
@@ -61,16 +60,15 @@ class RecommendationService:
     def _calculate_product_score(
         self,
         erp_system: ERPSystem,
-        must_reqs: List[CustomerRequirement],
-        should_reqs: List[CustomerRequirement],
-        optional_reqs: List[CustomerRequirement]
+        priority_masks: Dict[str, int],
+        engine: CoverageEngine
     ) -> Dict:
         """Calculate score for a single product."""
         
         # Find scenarios that cover each requirement
-        must_coverage = self._calculate_coverage(must_reqs, erp_system.id)
-        should_coverage = self._calculate_coverage(should_reqs, erp_system.id)
-        optional_coverage = self._calculate_coverage(optional_reqs, erp_system.id)
+        must_coverage = self._calculate_coverage(priority_masks['must'], erp_system.id, engine)
+        should_coverage = self._calculate_coverage(priority_masks['should'], erp_system.id, engine)
+        optional_coverage = self._calculate_coverage(priority_masks['optional'], erp_system.id, engine)
         
         # Calculate weighted score
         total_score = (
@@ -80,7 +78,7 @@ class RecommendationService:
         )
         
         # Find gaps (missing requirements)
-        gaps = self._identify_gaps(must_reqs, erp_system.id)
+        gaps = self._identify_gaps(priority_masks['must'], erp_system.id, engine)
         
         # Determine recommendation level
         recommendation_level = self._get_recommendation_level(total_score)
@@ -102,11 +100,13 @@ class RecommendationService:
     
     def _calculate_coverage(
         self,
-        requirements: List[CustomerRequirement],
-        erp_system_id: int
+        bucket_mask: int,
+        erp_system_id: int,
+        engine: CoverageEngine
     ) -> Dict:
         """Calculate how many requirements are covered by this ERP system."""
-        if not requirements:
+        covered_count, total = engine.coverage(bucket_mask, erp_system_id)
+        if not total:
             return {
                 'covered': 0,
                 'total': 0,
@@ -114,71 +114,35 @@ class RecommendationService:
                 'covered_processes': []
             }
         
-        covered_count = 0
-        covered_processes = []
-        
-        for req in requirements:
-            # Check if this ERP system has scenarios for this process
-            scenarios = self.db.query(Scenario).filter(
-                Scenario.business_process_id == req.business_process_id,
-                Scenario.erp_system_id == erp_system_id
-            ).count()
-            
-            if scenarios > 0:
-                covered_count += 1
-                covered_processes.append(req.business_process_id)
-        
-        percentage = (covered_count / len(requirements)) * 100 if requirements else 0
+        percentage = (covered_count / total) * 100
         
         return {
             'covered': covered_count,
-            'total': len(requirements),
+            'total': total,
             'percentage': round(percentage, 2),
-            'covered_processes': covered_processes
+            'covered_processes': engine.ids(bucket_mask & engine.product_mask(erp_system_id))
         }
     
     def _identify_gaps(
         self,
-        must_requirements: List[CustomerRequirement],
-        erp_system_id: int
+        must_mask: int,
+        erp_system_id: int,
+        engine: CoverageEngine
     ) -> List[Dict]:
         """Identify requirements that are NOT covered by this ERP system."""
-        gaps = []
-        
-        for req in must_requirements:
-            scenarios = self.db.query(Scenario).filter(
-                Scenario.business_process_id == req.business_process_id,
-                Scenario.erp_system_id == erp_system_id
-            ).count()
-            
-            if scenarios == 0:
-                # This is a gap - get process details
-                process = self.db.query(BusinessProcess).filter(
-                    BusinessProcess.id == req.business_process_id
-                ).first()
-                
-                if process:
-                    gaps.append({
-                        'process_id': process.id,
-                        'process_code': process.process_code,
-                        'process_name': process.name,
-                        'priority': req.priority
-                    })
-        
-        return gaps
+        return [
+            {
+                'process_id': engine.details[pos]['id'],
+                'process_code': engine.details[pos]['process_code'],
+                'process_name': engine.details[pos]['name'],
+                'priority': 'must'
+            }
+            for pos in engine.positions(engine.gaps(must_mask, erp_system_id))
+        ]
     
     def _get_recommendation_level(self, score: float) -> str:
         """Get recommendation level based on score."""
-        if score >= 85:
-            return "Highly Recommended"
-        elif score >= 70:
-            return "Recommended"
-        elif score >= 50:
-            return "Consider"
-        elif score >= 30:
-            return "May Not Be Suitable"
-        else:
-            return "Not Recommended"
+        return get_recommendation_level(score, self.scoring)
     
     def get_primary_recommendation(self, recommendations: Dict[str, Dict]) -> Tuple[str, Dict]:
         """
@@ -0,0 +1,163 @@
+"""
+Requirement Rollup - Process-level CustomerRequirement rows derived from work-item selections
+
+HierarchyRequirement answers (work items, scenarios) are rolled up to their
+Title 3 process and matched to BusinessProcess by process code. The highest
+priority per (organization, process) wins, picked with one ROW_NUMBER()
+window query, and written with one upsert.
+
+sync_process_requirements() runs inside HierarchyService.save_requirement
+for the saved items only, and for everything after a catalog import.
+Derived rows are marked source='hierarchy'. The sync only ever updates or
+deletes rows with that marker: a process-level answer entered directly
+(source='direct') is never overwritten, and a derived row is removed once
+its process has no work-item selection left.
+"""
+
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, delete, exists, case, func, or_
+from sqlalchemy.orm import Session, aliased
+from backend.app.database import dialect_insert
+from backend.app.models import ProcessHierarchy, HierarchyRequirement, BusinessProcess, CustomerRequirement
+
+# Work-item priority -> process-level priority
+PRIORITY_MAPPING = {
+    'must': 'must',
+    'should': 'should',
+    'could': 'optional',
+    'wont': 'not_needed',
+}
+
+# CustomerRequirement.source of rows written by the rollup
+DERIVED_SOURCE = 'hierarchy'
+
+# Lower rank wins when a process has several answers
+PRIORITY_RANK = {priority: rank for rank, priority in enumerate(PRIORITY_MAPPING)}
+
+
+def _process_join(process):
+    """BusinessProcess matching a Title 3 node ("65.05.040" or "65.05.040.000")."""
+    return or_(
+        BusinessProcess.process_code == process.sequence_id,
+        process.sequence_id == BusinessProcess.process_code + '.000'
+    )
+
+
+def _top_priorities(organization_id: Optional[int], process_node_ids: Optional[Iterable[int]]):
+    """SELECT organization_id, business_process_id, priority (work-item name) of the winning answers."""
+    item = aliased(ProcessHierarchy)
+    process = aliased(ProcessHierarchy)
+
+    partition = (HierarchyRequirement.organization_id, BusinessProcess.id)
+    ranked = (
+        select(
+            HierarchyRequirement.organization_id,
+            BusinessProcess.id.label('business_process_id'),
+            HierarchyRequirement.priority,
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(case(PRIORITY_RANK, value=HierarchyRequirement.priority, else_=len(PRIORITY_RANK)),
+                          HierarchyRequirement.id)
+            ).label('rank')
+        )
+        .join(item, item.id == HierarchyRequirement.hierarchy_item_id)
+        .join(process, process.id == item.process_node_id)
+        .join(BusinessProcess, _process_join(process))
+        .where(HierarchyRequirement.priority.in_(PRIORITY_MAPPING))
+    )
+    if organization_id is not None:
+        ranked = ranked.where(HierarchyRequirement.organization_id == organization_id)
+    if process_node_ids is not None:
+        ranked = ranked.where(item.process_node_id.in_(list(process_node_ids)))
+    ranked = ranked.subquery()
+
+    return select(ranked.c.organization_id, ranked.c.business_process_id, ranked.c.priority).where(ranked.c.rank == 1)
+
+
+def derive_process_priorities(
+    db: Session,
+    organization_id: Optional[int] = None,
+    process_node_ids: Optional[Iterable[int]] = None
+) -> List[Dict]:
+    """
+    Highest work-item priority per (organization, business process).
+
+    Args:
+        organization_id: Limit to one organization (None = all)
+        process_node_ids: Limit to these Title 3 nodes (None = all)
+
+    Returns:
+        [{'organization_id', 'business_process_id', 'priority'}] with
+        process-level priority names
+    """
+    query = _top_priorities(organization_id, process_node_ids)
+    return [
+        {
+            'organization_id': org_id,
+            'business_process_id': process_id,
+            'priority': PRIORITY_MAPPING[priority],
+        }
+        for org_id, process_id, priority in db.execute(query)
+    ]
+
+
+def sync_process_requirements(
+    db: Session,
+    organization_id: Optional[int] = None,
+    hierarchy_item_ids: Optional[Iterable[int]] = None
+) -> Dict:
+    """
+    Upsert derived CustomerRequirement rows and delete stale ones (caller commits).
+
+    Rows entered directly (source != DERIVED_SOURCE) are left untouched.
+
+    Args:
+        organization_id: Limit to one organization (None = all)
+        hierarchy_item_ids: Only re-derive the processes of these items (e.g.
+            the ones just saved)
+
+    Returns:
+        {'upserted': n, 'deleted': n}
+    """
+    process_node_ids = None
+    if hierarchy_item_ids is not None:
+        process_node_ids = {
+            process_node_id for (process_node_id,) in db.query(ProcessHierarchy.process_node_id).filter(
+                ProcessHierarchy.id.in_(list(hierarchy_item_ids)),
+                ProcessHierarchy.process_node_id.is_not(None)
+            ).distinct()
+        }
+        if not process_node_ids:
+            return {'upserted': 0, 'deleted': 0}
+
+    rows = derive_process_priorities(db, organization_id, process_node_ids)
+
+    if rows:
+        stmt = dialect_insert(db, CustomerRequirement)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['organization_id', 'business_process_id'],
+            set_={'priority': stmt.excluded.priority, 'updated_at': func.now()},
+            where=CustomerRequirement.source == DERIVED_SOURCE
+        )
+        db.execute(stmt, [{**row, 'source': DERIVED_SOURCE} for row in rows])
+
+    # Derived rows in scope whose process no longer has any work-item selection
+    # (set-based, so a full sync binds no parameters per row)
+    current = _top_priorities(organization_id, process_node_ids).subquery()
+    stale = delete(CustomerRequirement).where(
+        CustomerRequirement.source == DERIVED_SOURCE,
+        ~exists().where(
+            current.c.organization_id == CustomerRequirement.organization_id,
+            current.c.business_process_id == CustomerRequirement.business_process_id
+        )
+    )
+    if organization_id is not None:
+        stale = stale.where(CustomerRequirement.organization_id == organization_id)
+    if process_node_ids is not None:
+        process = aliased(ProcessHierarchy)
+        stale = stale.where(CustomerRequirement.business_process_id.in_(
+            select(BusinessProcess.id).join(process, _process_join(process)).where(process.id.in_(process_node_ids))
+        ))
+    deleted = db.execute(stale.execution_options(synchronize_session=False)).rowcount
+
+    return {'upserted': len(rows), 'deleted': deleted}
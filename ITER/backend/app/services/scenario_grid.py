@@ -0,0 +1,152 @@
+"""
+Scenario Grid - Flat scenario x product comparison with server-side paging
+
+One query returns a page of scenarios with their E2E/Area/Process names, one
+0/1 flag per product (conditional aggregation over scenario_products), the
+organization's priority and the total row count (COUNT(*) OVER ()). Filters,
+sorting and LIMIT/OFFSET all run in SQL, so a page costs the same on the full
+catalog as on a small one.
+
+The scenario priority is the highest answer given on the scenario or any of
+its work items.
+"""
+
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import select, case, func, and_
+from sqlalchemy.orm import Session, aliased
+from backend.app.models import ProcessHierarchy, HierarchyRequirement, ScenarioProduct, ERPSystem
+
+# Highest priority first; the rank decides which answer represents a scenario
+PRIORITY_ORDER = ['must', 'should', 'could', 'wont']
+
+# Filter value for scenarios without any answer
+UNANSWERED = 'unanswered'
+
+SORT_COLUMNS = ['sequence_id', 'scenario_name', 'e2e', 'area', 'priority', 'product_count']
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def get_scenario_grid(
+    db: Session,
+    organization_id: int,
+    e2e_id: Optional[int] = None,
+    erp_system_ids: Optional[Sequence[int]] = None,
+    priorities: Optional[Sequence[str]] = None,
+    search: Optional[str] = None,
+    sort_by: str = 'sequence_id',
+    descending: bool = False,
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE
+) -> Dict:
+    """
+    One page of the scenario x product grid.
+
+    Args:
+        organization_id: Organization whose priorities are shown
+        e2e_id: Only scenarios under this E2E node
+        erp_system_ids: Only scenarios covered by all of these products
+        priorities: Only scenarios with one of these priorities (may include 'unanswered')
+        search: Case-insensitive substring of the scenario name
+        sort_by: One of SORT_COLUMNS
+        descending: Sort direction
+        page: 1-based page number
+        page_size: Rows per page
+
+    Returns:
+        {'rows': [{scenario_id, sequence_id, scenario_name, e2e, area, process,
+                   priority, product_count, <product code>: 0/1, ...}],
+         'products': [code, ...], 'total': n}
+    """
+    products = db.query(ERPSystem.id, ERPSystem.code).order_by(ERPSystem.id).all()
+
+    # One 0/1 column per product
+    flags = (
+        select(
+            ScenarioProduct.hierarchy_item_id.label('scenario_id'),
+            func.count().label('product_count'),
+            *(
+                func.max(case((ScenarioProduct.erp_system_id == erp_id, 1), else_=0)).label(f'p{erp_id}')
+                for erp_id, _ in products
+            )
+        )
+        .group_by(ScenarioProduct.hierarchy_item_id)
+        .subquery()
+    )
+
+    # Highest priority rank per scenario (its own answer and its work items')
+    rank = case({priority: k for k, priority in enumerate(PRIORITY_ORDER)}, value=HierarchyRequirement.priority)
+    answers = (
+        select(ProcessHierarchy.scenario_node_id.label('scenario_id'), func.min(rank).label('rank'))
+        .join(HierarchyRequirement, HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id)
+        .where(
+            HierarchyRequirement.organization_id == organization_id,
+            HierarchyRequirement.priority.in_(PRIORITY_ORDER)
+        )
+        .group_by(ProcessHierarchy.scenario_node_id)
+        .subquery()
+    )
+
+    scenario = ProcessHierarchy
+    e2e, area, process = aliased(ProcessHierarchy), aliased(ProcessHierarchy), aliased(ProcessHierarchy)
+    product_count = func.coalesce(flags.c.product_count, 0)
+    flag_columns = [func.coalesce(flags.c[f'p{erp_id}'], 0) for erp_id, _ in products]
+
+    query = (
+        select(
+            scenario.id, scenario.sequence_id, scenario.name,
+            e2e.name, area.name, process.name,
+            answers.c.rank, product_count, *flag_columns,
+            func.count().over().label('total')
+        )
+        .outerjoin(e2e, e2e.id == scenario.e2e_node_id)
+        .outerjoin(area, area.id == scenario.area_node_id)
+        .outerjoin(process, process.id == scenario.process_node_id)
+        .outerjoin(flags, flags.c.scenario_id == scenario.id)
+        .outerjoin(answers, answers.c.scenario_id == scenario.id)
+        .where(scenario.level == 4)
+    )
+
+    if e2e_id is not None:
+        query = query.where(scenario.e2e_node_id == e2e_id)
+    if erp_system_ids:
+        query = query.where(and_(*(flags.c[f'p{erp_id}'] == 1 for erp_id in erp_system_ids)))
+    if priorities:
+        ranks = [PRIORITY_ORDER.index(p) for p in priorities if p in PRIORITY_ORDER]
+        condition = answers.c.rank.in_(ranks)
+        if UNANSWERED in priorities:
+            condition = condition | answers.c.rank.is_(None)
+        query = query.where(condition)
+    if search:
+        query = query.where(scenario.name.ilike(f"%{search}%"))
+
+    sort_column = {
+        'sequence_id': scenario.sequence_id,
+        'scenario_name': scenario.name,
+        'e2e': e2e.name,
+        'area': area.name,
+        'priority': func.coalesce(answers.c.rank, len(PRIORITY_ORDER)),
+        'product_count': product_count,
+    }[sort_by]
+    query = query.order_by(sort_column.desc() if descending else sort_column.asc(), scenario.id)
+    query = query.limit(page_size).offset((max(page, 1) - 1) * page_size)
+
+    rows: List[Dict] = []
+    total = 0
+    for row in db.execute(query):
+        scenario_id, sequence_id, name, e2e_name, area_name, process_name, priority_rank, count = row[:8]
+        total = row[-1]
+        record = {
+            'scenario_id': scenario_id,
+            'sequence_id': sequence_id,
+            'scenario_name': name,
+            'e2e': e2e_name,
+            'area': area_name,
+            'process': process_name,
+            'priority': PRIORITY_ORDER[priority_rank] if priority_rank is not None else None,
+            'product_count': count,
+        }
+        record.update({code: flag for (_, code), flag in zip(products, row[8:-1])})
+        rows.append(record)
+
+    return {'rows': rows, 'products': [code for _, code in products], 'total': total}
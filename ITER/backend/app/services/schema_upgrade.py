@@ -0,0 +1,155 @@
+"""
+Schema Upgrade - Bring an existing database up to the current models in place
+
+Base.metadata.create_all() only creates missing tables. upgrade_database()
+also adds the columns and indexes that newer models introduced (node keys,
+ancestor columns, subtree counts, nested-set intervals, ...) and then fills
+the derived data those columns hold, so a database created by an older
+version keeps its requirements instead of being recreated.
+
+SQLite cannot add constraints to an existing table, so unique constraints
+are created as unique indexes of the same name (which ON CONFLICT accepts);
+duplicate rows that would violate them are removed first.
+
+Every step checks the current schema first, so running it again is a no-op.
+"""
+
+from typing import Dict, List
+from sqlalchemy import inspect, text, update, select, func, delete, UniqueConstraint
+from sqlalchemy.orm import Session
+from backend.app.database import Base
+from backend.app.models import ProcessHierarchy, HierarchyRequirement
+from backend.app.services.node_keys import refresh_node_keys
+from backend.app.services.hierarchy_rollups import refresh_hierarchy_rollups
+
+
+def _column_ddl(column, dialect) -> str:
+    """ALTER TABLE ... ADD COLUMN clause for a model column."""
+    ddl = f"{column.name} {column.type.compile(dialect=dialect)}"
+    default = column.server_default
+    if default is not None and isinstance(default.arg, str):
+        ddl += f" DEFAULT '{default.arg}'"
+    elif not column.nullable:
+        raise ValueError(f"Cannot add NOT NULL column without a default: {column.table.name}.{column.name}")
+    return ddl
+
+
+def add_missing_columns(engine) -> List[str]:
+    """
+    Create missing tables, columns and indexes.
+
+    Returns:
+        "table.column" / index names that were added
+    """
+    # Import all models so the metadata knows every table
+    import backend.app.models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+
+    added = []
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, engine.dialect)}"))
+                    added.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+                    added.append(index.name)
+    return added
+
+
+def deduplicate_requirements(db: Session) -> int:
+    """
+    Keep one answer per (organization, hierarchy item): the most recently saved.
+
+    Returns:
+        Number of duplicate rows deleted
+    """
+    ranked = select(
+        HierarchyRequirement.id,
+        func.row_number().over(
+            partition_by=(HierarchyRequirement.organization_id, HierarchyRequirement.hierarchy_item_id),
+            order_by=(
+                func.coalesce(HierarchyRequirement.updated_at, HierarchyRequirement.created_at).desc(),
+                HierarchyRequirement.id.desc()
+            )
+        ).label('rn')
+    ).subquery()
+
+    result = db.execute(
+        delete(HierarchyRequirement)
+        .where(HierarchyRequirement.id.in_(select(ranked.c.id).where(ranked.c.rn > 1)))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def add_missing_unique_constraints(engine) -> List[str]:
+    """
+    Create model unique constraints missing from the database as unique indexes.
+
+    Returns:
+        Constraint names that were added
+    """
+    added = []
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {c['name'] for c in inspector.get_unique_constraints(table.name)}
+            existing |= {i['name'] for i in inspector.get_indexes(table.name) if i.get('unique')}
+            for constraint in table.constraints:
+                if isinstance(constraint, UniqueConstraint) and constraint.name and constraint.name not in existing:
+                    columns = ", ".join(column.name for column in constraint.columns)
+                    conn.execute(text(f"CREATE UNIQUE INDEX {constraint.name} ON {table.name} ({columns})"))
+                    added.append(constraint.name)
+    return added
+
+
+def rekey_requirements(db: Session) -> int:
+    """
+    Set every requirement's node key from the row it points to.
+
+    Only valid on a database whose requirement links are current (the app
+    database itself, not a freshly imported catalog with new ids).
+    """
+    result = db.execute(
+        update(HierarchyRequirement)
+        .values(hierarchy_node_key=select(ProcessHierarchy.node_key).where(
+            ProcessHierarchy.id == HierarchyRequirement.hierarchy_item_id
+        ).scalar_subquery())
+        .where(select(ProcessHierarchy.node_key).where(
+            ProcessHierarchy.id == HierarchyRequirement.hierarchy_item_id
+        ).scalar_subquery().is_not(None))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def upgrade_database(engine) -> Dict:
+    """
+    Upgrade the schema and refill derived hierarchy data.
+
+    Returns:
+        {'added': [...], 'duplicate_requirements_removed': n, 'node_keys_updated': n,
+         'requirements_rekeyed': n, 'rollups': {...}}
+    """
+    stats = {'added': add_missing_columns(engine)}
+
+    db = Session(bind=engine)
+    try:
+        stats['duplicate_requirements_removed'] = deduplicate_requirements(db)
+        stats['added'] += add_missing_unique_constraints(engine)
+        stats['node_keys_updated'] = refresh_node_keys(db)
+        stats['requirements_rekeyed'] = rekey_requirements(db)
+        stats['rollups'] = refresh_hierarchy_rollups(db)
+    finally:
+        db.close()
+    return stats
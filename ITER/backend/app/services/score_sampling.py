@@ -0,0 +1,145 @@
+"""
+Score Sampling - Monte Carlo confidence bands for product scores
+
+Unanswered selectable items are given a random priority from the configured
+priors (must/should/could, the rest "not needed"). Only the buckets a
+scenario ends up in matter for scoring, so for a scenario with m unanswered
+items the 8 possible bucket patterns are sampled directly with exact
+probabilities (inclusion-exclusion over the m items), one uniform number per
+(sample, scenario). Covered counts are then one matrix product per bucket.
+"""
+
+from itertools import combinations
+from typing import Dict, Sequence
+import numpy as np
+
+# Samples scored per matrix product (bounds memory at chunk x scenarios)
+CHUNK_SAMPLES = 2000
+
+
+def pattern_probabilities(unanswered: np.ndarray, priors: Sequence[float]) -> np.ndarray:
+    """
+    Probability of each bucket pattern per scenario.
+
+    Args:
+        unanswered: (scenarios,) number of unanswered items per scenario
+        priors: (buckets,) probability that one item gets each bucket
+
+    Returns:
+        (scenarios, 2**buckets) probabilities; pattern bit k set = bucket k present
+    """
+    n_buckets = len(priors)
+    rest = 1.0 - float(sum(priors))
+    m = unanswered.astype(np.float64)
+
+    # P(present buckets are a subset of A) = (rest + sum of A's priors) ** m
+    subset_prob = np.empty((len(unanswered), 2 ** n_buckets))
+    for pattern in range(2 ** n_buckets):
+        share = rest + sum(priors[k] for k in range(n_buckets) if pattern >> k & 1)
+        subset_prob[:, pattern] = share ** m
+
+    # Inclusion-exclusion: P(exactly B) = sum over A subset of B of (-1)^|B-A| P(subset of A)
+    exact = np.zeros_like(subset_prob)
+    for pattern in range(2 ** n_buckets):
+        bits = [k for k in range(n_buckets) if pattern >> k & 1]
+        for size in range(len(bits) + 1):
+            for removed in combinations(bits, size):
+                subset = pattern
+                for k in removed:
+                    subset &= ~(1 << k)
+                exact[:, pattern] += (-1) ** size * subset_prob[:, subset]
+
+    return np.clip(exact, 0.0, 1.0)
+
+
+def sample_scores(
+    coverage: np.ndarray,
+    base_selection: np.ndarray,
+    unanswered: np.ndarray,
+    priors: Sequence[float],
+    weights: Sequence[float],
+    n_samples: int,
+    seed=None
+) -> np.ndarray:
+    """
+    Sampled total scores.
+
+    Args:
+        coverage: (scenarios, products) 0/1 coverage matrix
+        base_selection: (buckets, scenarios) 0/1 current selections
+        unanswered: (scenarios,) unanswered item count per scenario
+        priors: (buckets,) priority priors per unanswered item
+        weights: (buckets,) score weights
+        n_samples: Number of samples
+        seed: Random seed (for reproducible results)
+
+    Returns:
+        (n_samples, products) scores
+    """
+    rng = np.random.default_rng(seed)
+    n_buckets = base_selection.shape[0]
+    weights = np.asarray(weights, dtype=np.float64)
+
+    base_covered = (base_selection @ coverage).astype(np.float64)   # (buckets, products)
+    base_totals = base_selection.sum(axis=1).astype(np.float64)      # (buckets,)
+
+    # Only scenarios with unanswered items can change
+    open_pos = np.nonzero(unanswered)[0]
+    cumulative = np.cumsum(pattern_probabilities(unanswered[open_pos], priors), axis=1)[:, :-1]
+    cumulative = cumulative.astype(np.float32)
+    # Extra ones column: the same matrix product also counts the added scenarios
+    open_coverage = np.hstack([coverage[open_pos], np.ones((len(open_pos), 1))]).astype(np.float32)
+    not_selected = (1 - base_selection[:, open_pos]).astype(np.int8)   # (buckets, open)
+
+    scores = np.empty((n_samples, coverage.shape[1]))
+    for start in range(0, n_samples, CHUNK_SAMPLES):
+        size = min(CHUNK_SAMPLES, n_samples - start)
+        u = rng.random((size, len(open_pos)), dtype=np.float32)
+
+        pattern = np.zeros((size, len(open_pos)), dtype=np.int8)
+        for col in range(cumulative.shape[1]):
+            pattern += u > cumulative[:, col]
+
+        chunk = np.zeros((size, coverage.shape[1]))
+        for k in range(n_buckets):
+            added = ((pattern >> k) & not_selected[k]).astype(np.float32) @ open_coverage
+            covered = base_covered[k] + added[:, :-1]
+            totals = base_totals[k] + added[:, -1:]
+            chunk += weights[k] * np.divide(
+                covered * 100.0, totals,
+                out=np.zeros(covered.shape), where=totals > 0
+            )
+        scores[start:start + size] = chunk
+
+    return scores
+
+
+def summarize_samples(
+    scores: np.ndarray,
+    groups: Dict[str, Sequence[int]],
+    confidence: float = 0.95
+) -> Dict[str, np.ndarray]:
+    """
+    Confidence interval and win probability per product.
+
+    Args:
+        scores: (samples, products) sampled scores
+        groups: Group name -> product columns competing with each other
+            (e.g. primary ERPs); win probability is computed within the group
+        confidence: Interval coverage
+
+    Returns:
+        {'mean', 'low', 'high', 'win_probability'}, each (products,)
+    """
+    tail = (1.0 - confidence) / 2 * 100
+    low, high = np.percentile(scores, [tail, 100 - tail], axis=0)
+
+    win_probability = np.zeros(scores.shape[1])
+    for columns in groups.values():
+        columns = np.asarray(columns)
+        if not len(columns):
+            continue
+        winners = columns[scores[:, columns].argmax(axis=1)]
+        win_probability[columns] = np.bincount(winners, minlength=scores.shape[1])[columns] / len(scores)
+
+    return {'mean': scores.mean(axis=0), 'low': low, 'high': high, 'win_probability': win_probability}
@@ -0,0 +1,57 @@
+"""
+Scoring Config - Recommendation weights and level thresholds
+
+Loaded from backend/app/config/scoring.json so they can be recalibrated
+(see scripts/calibrate_weights.py) without code changes. Falls back to the
+built-in defaults when the file is missing.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCORING_CONFIG_FILE = Path(__file__).resolve().parent.parent / "config" / "scoring.json"
+
+DEFAULT_SCORING_CONFIG = {
+    'weights': {'must': 0.7, 'should': 0.25, 'could': 0.05},
+    # (minimum score, level), highest first
+    'thresholds': [
+        [85, "Highly Recommended"],
+        [70, "Recommended"],
+        [50, "Consider"],
+        [30, "May Not Be Suitable"],
+    ],
+    'default_level': "Not Recommended",
+    # Chance that an unanswered item ends up with each priority (the rest: not needed)
+    'priors': {'must': 0.2, 'should': 0.25, 'could': 0.15},
+}
+
+
+def load_scoring_config(path: Optional[Path] = None) -> Dict:
+    """Read the scoring config (missing keys fall back to the defaults)."""
+    path = path or SCORING_CONFIG_FILE
+    config = {key: value for key, value in DEFAULT_SCORING_CONFIG.items()}
+    if path.exists():
+        config.update(json.loads(path.read_text(encoding="utf-8")))
+    config['thresholds'] = sorted(
+        ([float(minimum), level] for minimum, level in config['thresholds']),
+        reverse=True
+    )
+    return config
+
+
+def save_scoring_config(weights: Dict[str, float], thresholds: List[Tuple[float, str]], path: Optional[Path] = None):
+    """Write weights and thresholds to the config file."""
+    path = path or SCORING_CONFIG_FILE
+    config = load_scoring_config(path)
+    config['weights'] = {priority: round(float(weight), 4) for priority, weight in weights.items()}
+    config['thresholds'] = [[round(float(minimum), 2), level] for minimum, level in thresholds]
+    path.write_text(json.dumps(config, indent=2) + "\n", encoding="utf-8")
+
+
+def get_recommendation_level(score: float, config: Dict) -> str:
+    """Recommendation level for a score (first threshold the score reaches)."""
+    for minimum, level in config['thresholds']:
+        if score >= minimum:
+            return level
+    return config['default_level']
@@ -0,0 +1,146 @@
+"""
+Weight Calibration - Evaluate scoring weights/thresholds for all organizations at once
+
+All organizations' requirements are loaded in one query and reduced to
+covered counts per (organization, priority, product) with the coverage engine.
+A grid of weight settings is then scored in one einsum, and the primary ERP
+and its recommendation level are compared with the current configuration.
+"""
+
+from itertools import product as cartesian
+from typing import Dict, List, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+from backend.app.models import HierarchyRequirement, ERPSystem
+from backend.app.services.coverage_engine import get_scenario_engine
+from backend.app.services.hierarchy_recommendation_service import HierarchyRecommendationService
+
+# Same buckets and decision group as the live recommendation
+PRIORITIES = HierarchyRecommendationService.PRIORITIES
+PRIMARY_ERP_PRODUCTS = HierarchyRecommendationService.PRIMARY_ERP_PRODUCTS
+
+
+def load_organization_counts(db: Session) -> Dict:
+    """
+    Covered and selected scenario counts for every organization with requirements.
+
+    Returns:
+        {
+            'organization_ids': [id, ...],
+            'products': [code, ...],
+            'covered': ndarray (orgs, priorities, products),
+            'totals': ndarray (orgs, priorities)
+        }
+    """
+    engine = get_scenario_engine(db)
+    erp_systems = db.query(ERPSystem.id, ERPSystem.code).order_by(ERPSystem.id).all()
+
+    selections: Dict[int, List[tuple]] = {}
+    for org_id, item_id, priority in db.query(
+        HierarchyRequirement.organization_id,
+        HierarchyRequirement.hierarchy_item_id,
+        HierarchyRequirement.priority
+    ).order_by(HierarchyRequirement.organization_id):
+        selections.setdefault(org_id, []).append((item_id, priority))
+
+    organization_ids = list(selections)
+    covered = np.zeros((len(organization_ids), len(PRIORITIES), len(erp_systems)), dtype=np.int64)
+    totals = np.zeros((len(organization_ids), len(PRIORITIES)), dtype=np.int64)
+
+    product_masks = [engine.product_mask(erp_id) for erp_id, _ in erp_systems]
+    for row, org_id in enumerate(organization_ids):
+        masks = engine.priority_masks(selections[org_id], PRIORITIES)
+        for k, priority in enumerate(PRIORITIES):
+            totals[row, k] = masks[priority].bit_count()
+            for col, product_mask in enumerate(product_masks):
+                covered[row, k, col] = (masks[priority] & product_mask).bit_count()
+
+    return {
+        'organization_ids': organization_ids,
+        'products': [code for _, code in erp_systems],
+        'covered': covered,
+        'totals': totals,
+    }
+
+
+def weight_grid(step: float = 0.05) -> np.ndarray:
+    """All (must, should, could) weights on a grid that sum to 1 with must >= should >= could."""
+    n = int(round(1 / step))
+    rows = [
+        (m * step, s * step, (n - m - s) * step)
+        for m in range(n + 1)
+        for s in range(n - m + 1)
+        if m >= s >= n - m - s
+    ]
+    return np.round(np.array(rows), 6)
+
+
+def threshold_grid(thresholds: Sequence[Sequence], shifts: Sequence[float]) -> List[List[List]]:
+    """Threshold sets with every minimum moved by each shift (levels keep their order)."""
+    return [
+        [[minimum + shift, level] for minimum, level in thresholds]
+        for shift in shifts
+    ]
+
+
+def _levels(scores: np.ndarray, thresholds: Sequence[Sequence]) -> np.ndarray:
+    """Level index per score: 0 = highest threshold reached, len(thresholds) = default level."""
+    minimums = np.array([minimum for minimum, _ in thresholds])
+    return (scores[..., None] < minimums).sum(axis=-1)
+
+
+def evaluate_grid(
+    counts: Dict,
+    weights: np.ndarray,
+    thresholds: List[List[List]],
+    baseline_weights: Sequence[float],
+    baseline_thresholds: Sequence[Sequence]
+) -> List[Dict]:
+    """
+    Score every setting in weights x thresholds for every organization.
+
+    Returns:
+        One row per setting, sorted by primary_erp_changes:
+        {'weights', 'thresholds', 'primary_erp_changes', 'level_changes', 'primary_erp_counts'}
+        (changes are fractions of organizations compared with the baseline)
+    """
+    products = counts['products']
+    primary_cols = np.array([col for col, code in enumerate(products) if code in PRIMARY_ERP_PRODUCTS])
+    n_orgs = len(counts['organization_ids'])
+    if not n_orgs or not len(primary_cols):
+        return []
+
+    covered = counts['covered'][:, :, primary_cols]     # (orgs, priorities, primary)
+    totals = counts['totals']
+
+    # Coverage percentage per (org, priority, product), then all settings in one einsum
+    percentages = np.divide(
+        covered * 100.0, totals[:, :, None],
+        out=np.zeros(covered.shape, dtype=np.float64), where=totals[:, :, None] > 0
+    )
+    all_weights = np.vstack([np.asarray(baseline_weights, dtype=np.float64), weights])
+    scores = np.einsum('okp,gk->gop', percentages, all_weights)   # (settings, orgs, primary)
+
+    winners = scores.argmax(axis=2)                                # (settings, orgs)
+    winner_scores = np.take_along_axis(scores, winners[..., None], axis=2)[..., 0]
+
+    base_winner = winners[0]
+    base_levels = _levels(winner_scores[0], baseline_thresholds)
+    primary_codes = [products[col] for col in primary_cols]
+
+    results = []
+    for w, t in cartesian(range(len(weights)), range(len(thresholds))):
+        setting_winners = winners[w + 1]
+        levels = _levels(winner_scores[w + 1], thresholds[t])
+        results.append({
+            'weights': dict(zip(PRIORITIES, (float(x) for x in weights[w]))),
+            'thresholds': thresholds[t],
+            'primary_erp_changes': round(float((setting_winners != base_winner).mean()), 4),
+            'level_changes': round(float((levels != base_levels).mean()), 4),
+            'primary_erp_counts': {
+                code: int((setting_winners == col).sum()) for col, code in enumerate(primary_codes)
+            },
+        })
+
+    results.sort(key=lambda r: (r['primary_erp_changes'], r['level_changes']))
+    return results
@@ -0,0 +1,153 @@
+"""
+What-If Analysis - Score deltas for a batch of priority changes
+
+Scoring is linear in the selections, so with
+- M: item x product coverage matrix (0/1)
+- S: priority x item selection matrix (0/1)
+covered counts are S @ M and totals are S.sum(axis=1). A perturbation
+("scenario X becomes must") only changes a few columns of S, so each one is
+applied as a sparse delta on the base counts, all perturbations at once.
+
+A scenario column holds every priority given on the scenario or any of its
+work items, so a changed work item replaces the whole column with the
+buckets of all the scenario's answers after the change.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from backend.app.services.coverage_engine import CoverageEngine
+
+
+def coverage_matrix(engine: CoverageEngine, erp_system_ids: Sequence[int]) -> np.ndarray:
+    """Item x product matrix: 1 where the product covers the item."""
+    matrix = np.zeros((len(engine), len(erp_system_ids)), dtype=np.int32)
+    for col, erp_system_id in enumerate(erp_system_ids):
+        matrix[engine.positions(engine.product_mask(erp_system_id)), col] = 1
+    return matrix
+
+
+def selection_matrix(engine: CoverageEngine, priority_masks: Dict[str, int], priorities: Sequence[str]) -> np.ndarray:
+    """Priority x item matrix: 1 where the item is selected with that priority."""
+    selection = np.zeros((len(priorities), len(engine)), dtype=np.int32)
+    for row, priority in enumerate(priorities):
+        selection[row, engine.positions(priority_masks.get(priority, 0))] = 1
+    return selection
+
+
+def weighted_scores(covered: np.ndarray, totals: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted coverage scores (0-100).
+
+    Args:
+        covered: (..., priorities, products) covered counts
+        totals: (..., priorities) selected counts
+        weights: (priorities,) score weights
+    """
+    totals = totals[..., None]
+    percentages = np.divide(
+        covered * 100.0, totals,
+        out=np.zeros(covered.shape, dtype=np.float64), where=totals > 0
+    )
+    return np.einsum('...kp,k->...p', percentages, weights)
+
+
+def score_perturbations(
+    coverage: np.ndarray,
+    selection: np.ndarray,
+    weights: np.ndarray,
+    batch_index: np.ndarray,
+    item_pos: np.ndarray,
+    new_columns: np.ndarray,
+    batch_size: int
+) -> Dict[str, np.ndarray]:
+    """
+    Score a batch of perturbations against a base selection.
+
+    Each change replaces one item's selection column. An item must appear at
+    most once per perturbation (encode_perturbations guarantees it).
+
+    Args:
+        coverage: (items, products) coverage matrix
+        selection: (priorities, items) base selection matrix
+        weights: (priorities,) score weights
+        batch_index: (changes,) perturbation each change belongs to
+        item_pos: (changes,) item position changed
+        new_columns: (changes, priorities) new 0/1 selection column of the item
+        batch_size: Number of perturbations
+
+    Returns:
+        {'base': (products,) scores, 'scores': (batch, products), 'deltas': (batch, products)}
+    """
+    base_covered = selection @ coverage            # (priorities, products)
+    base_totals = selection.sum(axis=1)            # (priorities,)
+    base = weighted_scores(base_covered, base_totals, weights)
+
+    n_priorities = selection.shape[0]
+
+    # Selection change per change: new column minus old column
+    diff = new_columns - selection[:, item_pos].T     # (changes, priorities)
+
+    covered = np.broadcast_to(base_covered, (batch_size,) + base_covered.shape).copy()
+    totals = np.broadcast_to(base_totals, (batch_size, n_priorities)).copy()
+    np.add.at(covered, batch_index, diff[:, :, None] * coverage[item_pos][:, None, :])
+    np.add.at(totals, batch_index, diff)
+
+    scores = weighted_scores(covered, totals, weights)
+    return {'base': base, 'scores': scores, 'deltas': scores - base}
+
+
+def encode_perturbations(
+    engine: CoverageEngine,
+    perturbations: List[Dict[int, Optional[str]]],
+    priorities: Sequence[str],
+    selections: Sequence[Tuple[int, str]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn [{item_id: new_priority or None}, ...] into the change arrays of score_perturbations.
+
+    Changes are grouped per scenario: work item ids roll up to their scenario,
+    and the scenario's new column is derived from all of its answers in
+    selections with that perturbation's changes applied, so other answered
+    work items keep their buckets and two items of one scenario make one
+    change. Unknown ids are ignored; priorities outside `priorities` (e.g.
+    'wont') count as "not selected" as in scoring.
+
+    Args:
+        selections: Current (item_id, priority) answers (the base selection)
+    """
+    priority_row = {priority: row for row, priority in enumerate(priorities)}
+
+    def scenario_pos(item_id):
+        return engine.bit.get(engine.rollup.get(item_id, item_id))
+
+    answers: Dict[int, Dict[int, str]] = defaultdict(dict)
+    for item_id, priority in selections:
+        pos = scenario_pos(item_id)
+        if pos is not None:
+            answers[pos][item_id] = priority
+
+    batch_index, item_pos, new_columns = [], [], []
+    for batch, changes in enumerate(perturbations):
+        touched: Dict[int, Dict[int, Optional[str]]] = defaultdict(dict)
+        for item_id, priority in changes.items():
+            pos = scenario_pos(item_id)
+            if pos is not None:
+                touched[pos][item_id] = priority
+
+        for pos, changed in touched.items():
+            merged = {**answers.get(pos, {}), **changed}
+            column = np.zeros(len(priorities), dtype=np.int32)
+            for priority in merged.values():
+                row = priority_row.get(priority)
+                if row is not None:
+                    column[row] = 1
+            batch_index.append(batch)
+            item_pos.append(pos)
+            new_columns.append(column)
+
+    return (
+        np.array(batch_index, dtype=np.int64),
+        np.array(item_pos, dtype=np.int64),
+        np.array(new_columns, dtype=np.int32).reshape(len(new_columns), len(priorities)),
+    )
@@ -9,7 +9,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.app.database import init_database, engine
+from backend.app.database import init_database, engine, DATABASE_PATH
 from backend.app.models import Base
 
 def main():
@@ -22,7 +22,7 @@ def main():
         # Create all tables
         Base.metadata.create_all(bind=engine)
         print("\n[OK] Database initialized successfully!")
-        print(f"[INFO] Database location: {Path(__file__).parent / 'iter.db'}")
+        print(f"[INFO] Database location: {DATABASE_PATH}")
         print("\nTables created:")
         for table_name in Base.metadata.tables.keys():
             print(f"  - {table_name}")
@@ -0,0 +1,80 @@
+"""
+Calibrate Weights - Sweep scoring weights and level thresholds over all organizations
+Reports how often each setting changes the primary ERP compared with the current
+config, and can write a chosen setting to backend/app/config/scoring.json.
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.app.database import SessionLocal
+from backend.app.services.scoring_config import load_scoring_config, save_scoring_config
+from backend.app.services.weight_calibration import (
+    PRIORITIES, load_organization_counts, weight_grid, threshold_grid, evaluate_grid
+)
+
+def main():
+    """Evaluate the weight/threshold grid and optionally apply one setting."""
+    parser = argparse.ArgumentParser(description="Sweep recommendation scoring weights and thresholds")
+    parser.add_argument("--step", type=float, default=0.05, help="Weight grid step (default 0.05)")
+    parser.add_argument("--shifts", type=float, nargs="+", default=[-10, -5, 0, 5, 10],
+                        help="Threshold shifts to try (default -10 -5 0 5 10)")
+    parser.add_argument("--top", type=int, default=20, help="Number of settings to print")
+    parser.add_argument("--json", action="store_true", help="Print all settings as JSON")
+    parser.add_argument("--apply", type=int, metavar="RANK",
+                        help="Write the setting with this rank (from the printed list) to the scoring config")
+    args = parser.parse_args()
+
+    config = load_scoring_config()
+    baseline_weights = [config['weights'][priority] for priority in PRIORITIES]
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        counts = load_organization_counts(db)
+        load_seconds = time.perf_counter() - start
+    finally:
+        db.close()
+
+    weights = weight_grid(args.step)
+    thresholds = threshold_grid(config['thresholds'], args.shifts)
+
+    start = time.perf_counter()
+    results = evaluate_grid(counts, weights, thresholds, baseline_weights, config['thresholds'])
+    eval_seconds = time.perf_counter() - start
+
+    if not results:
+        print("[INFO] No organizations with requirements - nothing to calibrate")
+        return
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Organizations: {len(counts['organization_ids'])}, settings: {len(results)} "
+              f"(load {load_seconds:.2f}s, evaluate {eval_seconds * 1000:.0f} ms)")
+        print(f"Current weights: {config['weights']}")
+        print(f"\n{'Rank':>4}  {'Must':>5} {'Should':>6} {'Could':>5}  {'Shift':>5}  "
+              f"{'ERP changed':>11}  {'Level changed':>13}  Primary ERP counts")
+        base_minimum = config['thresholds'][0][0]
+        for rank, row in enumerate(results[:args.top], 1):
+            w = row['weights']
+            shift = row['thresholds'][0][0] - base_minimum
+            counts_text = ", ".join(f"{code}={n}" for code, n in row['primary_erp_counts'].items())
+            print(f"{rank:>4}  {w['must']:>5.2f} {w['should']:>6.2f} {w['could']:>5.2f}  {shift:>+5.0f}  "
+                  f"{row['primary_erp_changes']:>10.1%}  {row['level_changes']:>12.1%}   {counts_text}")
+
+    if args.apply:
+        if not 1 <= args.apply <= len(results):
+            print(f"[ERROR] --apply must be between 1 and {len(results)}")
+            sys.exit(1)
+        chosen = results[args.apply - 1]
+        save_scoring_config(chosen['weights'], chosen['thresholds'])
+        print(f"\n[OK] Scoring config updated: weights {chosen['weights']}")
+
+if __name__ == "__main__":
+    main()
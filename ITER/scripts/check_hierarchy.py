@@ -0,0 +1,36 @@
+"""
+Check Hierarchy - Validate the imported process hierarchy
+Exit code 1 if error-level issues are found (orphans, cycles, duplicate keys).
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.app.database import SessionLocal
+from backend.app.services.hierarchy_integrity import check_hierarchy, format_report
+
+def main():
+    """Run the hierarchy integrity checks."""
+    parser = argparse.ArgumentParser(description="Validate the process hierarchy")
+    parser.add_argument("--json", action="store_true", help="Print the full machine-readable report")
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        report = check_hierarchy(db)
+    finally:
+        db.close()
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+    
+    sys.exit(0 if report['ok'] else 1)
+
+if __name__ == "__main__":
+    main()
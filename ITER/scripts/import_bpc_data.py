@@ -3,6 +3,8 @@ Import BPC Data - Import Microsoft Business Process Catalog data from Excel file
 """
 
 import sys
+import time
+import argparse
 from pathlib import Path
 import pandas as pd
 from openpyxl import load_workbook
@@ -12,6 +14,35 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.app.database import SessionLocal
 from backend.app.models import E2EProcess, BusinessProcess, Scenario, ERPSystem
+from backend.app.services.catalog_parser import parse_sequence_id, parse_sequence_ids
+from backend.app.services.catalog_manifest import file_sha256, is_unchanged, record_import
+from backend.app.services.requirement_rollup import sync_process_requirements
+
+# Product name -> ERP code for this importer (checked per comma-separated product,
+# first match wins). Deliberately not catalog_parser.PRODUCT_MAPPING: that map
+# also matches bare names such as "Finance", which changes the scenarios
+# existing BPC workbooks import as.
+BPC_PRODUCT_MAPPING = {
+    "Dynamics 365 Business Central": "BC",
+    "Business Central": "BC",
+    "Dynamics 365 Finance": "D365F",
+    "D365 Finance": "D365F",
+    "Dynamics 365 Supply Chain Management": "D365SCM",
+    "D365 Supply Chain": "D365SCM",
+    "Supply Chain Management": "D365SCM",
+    "Dynamics 365 Commerce": "D365COMM",
+    "D365 Commerce": "D365COMM",
+    "Dynamics 365 Sales": "CRM",
+    "D365 Sales": "CRM",
+    "Dynamics 365 Customer Service": "D365CS",
+    "D365 Customer Service": "D365CS",
+    "Dynamics 365 Field Service": "D365FS",
+    "D365 Field Service": "D365FS",
+    "Dynamics 365 Project Operations": "D365PO",
+    "D365 Project Operations": "D365PO",
+    "Dynamics 365 Human Resources": "D365HR",
+    "D365 Human Resources": "D365HR",
+}
 
 def get_e2e_process_name_from_filename(filename: str) -> str:
     """Extract E2E process name from filename."""
@@ -25,6 +56,21 @@ def get_e2e_process_code_from_name(name: str) -> str:
     # Example: "Order to Cash" -> "order-to-cash"
     return name.lower().replace(" ", "-")
 
+def get_erp_codes_from_products(products_str) -> list:
+    """
+    Map a 'Products' cell to ERP codes, one per listed product.
+    
+    Example: "Dynamics 365 Business Central, Dynamics 365 Finance" -> ["BC", "D365F"]
+    """
+    codes = []
+    for product_name in [p.strip() for p in str(products_str).strip().split(",") if p.strip()]:
+        for key, code in BPC_PRODUCT_MAPPING.items():
+            if key.lower() in product_name.lower():
+                if code not in codes:
+                    codes.append(code)
+                break
+    return codes
+
 def parse_scenario_code(scenario_str: str) -> tuple:
     """
     Parse scenario code like "65.05.040.100" into:
@@ -32,42 +78,38 @@ def parse_scenario_code(scenario_str: str) -> tuple:
     - sequence_number: 100
     - erp_system_id: determined by sequence number
     """
-    if pd.isna(scenario_str):
+    process_code, sequence_number, _ = parse_sequence_id(scenario_str)
+    if process_code is None or sequence_number is None:
         return None, None, None
     
-    scenario_str = str(scenario_str).strip()
+    # Map sequence numbers to ERP systems (common patterns)
+    # This is a simplified mapping - adjust based on actual BPC data
+    erp_mapping = {
+        100: "D365SCM",  # Dynamics 365 Supply Chain Management
+        101: "BC",       # Business Central
+        102: "D365F",    # D365 Finance
+        103: "CRM",      # D365 Sales/CRM
+        104: "D365COMM", # D365 Commerce
+        # Add more mappings as needed
+    }
     
-    # Check if it matches pattern XX.XX.XXX.XXX
-    parts = scenario_str.split(".")
-    if len(parts) != 4:
-        return None, None, None
+    # Get ERP system code from sequence number
+    erp_code = erp_mapping.get(sequence_number)
     
-    try:
-        process_code = ".".join(parts[:3])  # "65.05.040"
-        sequence_number = int(parts[3])     # 100, 101, etc.
-        
-        # Map sequence numbers to ERP systems (common patterns)
-        # This is a simplified mapping - adjust based on actual BPC data
-        erp_mapping = {
-            100: "D365SCM",  # Dynamics 365 Supply Chain Management
-            101: "BC",       # Business Central
-            102: "D365F",    # D365 Finance
-            103: "CRM",      # D365 Sales/CRM
-            104: "D365COMM", # D365 Commerce
-            # Add more mappings as needed
-        }
-        
-        # Get ERP system code from sequence number
-        erp_code = erp_mapping.get(sequence_number)
-        
-        return process_code, sequence_number, erp_code
-    except (ValueError, IndexError):
-        return None, None, None
+    return process_code, sequence_number, erp_code
 
-def import_excel_file(file_path: Path, db):
+def import_excel_file(file_path: Path, db, force: bool = False):
     """Import data from a single BPC Excel file."""
     print(f"\nProcessing: {file_path.name}")
     
+    # Skip the workbook if this exact content was already imported
+    content_hash = file_sha256(file_path)
+    if not force and is_unchanged(db, "import_bpc_data", file_path, content_hash):
+        print("  [SKIP] Unchanged since the last import")
+        return 0
+    
+    start = time.perf_counter()
+    
     try:
         # Get E2E process name from filename
         e2e_name = get_e2e_process_name_from_filename(file_path.name)
@@ -126,36 +168,19 @@ def import_excel_file(file_path: Path, db):
         processes_imported = 0
         scenarios_imported = 0
         
+        # Parse all sequence IDs up front
+        parsed = parse_sequence_ids(df[process_code_col])
+        
         # Process each row
         for idx, row in df.iterrows():
-            process_code_raw = row[process_code_col] if pd.notna(row[process_code_col]) else None
-            process_name_raw = row[process_name_col] if pd.notna(row[process_name_col]) else None
-            
-            if pd.isna(process_code_raw):
-                continue
-            
-            process_code = str(process_code_raw).strip()
-            process_name = str(process_name_raw).strip() if pd.notna(process_name_raw) else "Unnamed Process"
+            process_code = parsed.at[idx, 'process_code']
             
             # Skip if no process code or invalid format
-            if not process_code or process_code == "nan" or process_code.lower() == "none":
+            if not process_code:
                 continue
             
-            # Process Sequence ID might be in format XX.XX.XXX or just a number
-            # Try to extract process code format
-            if "." in process_code and len(process_code.split(".")) == 3:
-                # Already in correct format
-                pass
-            elif "." in process_code:
-                # Might have more parts - take first 3
-                parts = process_code.split(".")
-                if len(parts) >= 3:
-                    process_code = ".".join(parts[:3])
-                else:
-                    continue  # Skip invalid format
-            else:
-                # Might just be a number or ID, skip for now
-                continue
+            process_name_raw = row[process_name_col] if pd.notna(row[process_name_col]) else None
+            process_name = str(process_name_raw).strip() if pd.notna(process_name_raw) else "Unnamed Process"
             
             # Create or get Business Process
             bp = db.query(BusinessProcess).filter(BusinessProcess.process_code == process_code).first()
@@ -176,75 +201,42 @@ def import_excel_file(file_path: Path, db):
                 db.commit()
             
             # Try to find and import scenarios from Products column
+            # Example: "Dynamics 365 Business Central, Dynamics 365 Finance" -> one scenario each
             if products_col in df.columns and pd.notna(row[products_col]):
-                products_str = str(row[products_col]).strip()
-                # Products column might contain product names - parse them
-                # Example: "Dynamics 365 Business Central, Dynamics 365 Finance"
-                products_list = [p.strip() for p in products_str.split(",") if p.strip()]
-                
-                for product_name in products_list:
-                    # Map product names to codes
-                    product_map = {
-                        "Dynamics 365 Business Central": "BC",
-                        "Business Central": "BC",
-                        "Dynamics 365 Finance": "D365F",
-                        "D365 Finance": "D365F",
-                        "Dynamics 365 Supply Chain Management": "D365SCM",
-                        "D365 Supply Chain": "D365SCM",
-                        "Supply Chain Management": "D365SCM",
-                        "Dynamics 365 Commerce": "D365COMM",
-                        "D365 Commerce": "D365COMM",
-                        "Dynamics 365 Sales": "CRM",
-                        "D365 Sales": "CRM",
-                        "Dynamics 365 Customer Service": "D365CS",
-                        "D365 Customer Service": "D365CS",
-                        "Dynamics 365 Field Service": "D365FS",
-                        "D365 Field Service": "D365FS",
-                        "Dynamics 365 Project Operations": "D365PO",
-                        "D365 Project Operations": "D365PO",
-                        "Dynamics 365 Human Resources": "D365HR",
-                        "D365 Human Resources": "D365HR",
-                    }
-                    
-                    erp_code = None
-                    for key, code in product_map.items():
-                        if key.lower() in product_name.lower():
-                            erp_code = code
-                            break
-                    
-                    if erp_code:
-                        erp_system = db.query(ERPSystem).filter(ERPSystem.code == erp_code).first()
-                        if erp_system:
-                            # Check if scenario already exists for this process + ERP
-                            existing = db.query(Scenario).filter(
-                                Scenario.business_process_id == bp.id,
-                                Scenario.erp_system_id == erp_system.id
-                            ).first()
+                for erp_code in get_erp_codes_from_products(row[products_col]):
+                    erp_system = db.query(ERPSystem).filter(ERPSystem.code == erp_code).first()
+                    if erp_system:
+                        # Check if scenario already exists for this process + ERP
+                        existing = db.query(Scenario).filter(
+                            Scenario.business_process_id == bp.id,
+                            Scenario.erp_system_id == erp_system.id
+                        ).first()
+                        
+                        if not existing:
+                            # Create scenario code (process_code + sequence)
+                            # Use a simple sequence: 100 for first product, 101 for second, etc.
+                            existing_scenarios_count = db.query(Scenario).filter(
+                                Scenario.business_process_id == bp.id
+                            ).count()
+                            
+                            sequence_num = 100 + existing_scenarios_count
+                            scenario_code = f"{process_code}.{sequence_num}"
                             
-                            if not existing:
-                                # Create scenario code (process_code + sequence)
-                                # Use a simple sequence: 100 for first product, 101 for second, etc.
-                                existing_scenarios_count = db.query(Scenario).filter(
-                                    Scenario.business_process_id == bp.id
-                                ).count()
-                                
-                                sequence_num = 100 + existing_scenarios_count
-                                scenario_code = f"{process_code}.{sequence_num}"
-                                
-                                scenario = Scenario(
-                                    scenario_code=scenario_code,
-                                    business_process_id=bp.id,
-                                    erp_system_id=erp_system.id,
-                                    sequence_number=sequence_num,
-                                    name=f"{process_name} in {erp_system.name}"
-                                )
-                                db.add(scenario)
-                                db.flush()  # Flush to check for errors before commit
-                                scenarios_imported += 1
+                            scenario = Scenario(
+                                scenario_code=scenario_code,
+                                business_process_id=bp.id,
+                                erp_system_id=erp_system.id,
+                                sequence_number=sequence_num,
+                                name=f"{process_name} in {erp_system.name}"
+                            )
+                            db.add(scenario)
+                            db.flush()  # Flush to check for errors before commit
+                            scenarios_imported += 1
         
         try:
             db.commit()
             print(f"  [OK] Imported {processes_imported} processes, {scenarios_imported} scenarios")
+            record_import(db, "import_bpc_data", file_path, content_hash, len(df), time.perf_counter() - start)
         except Exception as e:
             db.rollback()
             print(f"  [WARNING] Some scenarios failed: {e}")
@@ -266,12 +258,26 @@ def import_excel_file(file_path: Path, db):
 
 def main():
     """Main import function."""
+    parser = argparse.ArgumentParser(description="Import BPC Excel files")
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=Path(r"C:\DI_MOKSLAI\GO_FAST"),
+        help="Directory with the 'BPC - *.xlsx' workbooks (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-import workbooks even if they are unchanged since the last import"
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("ITER - BPC Data Import")
     print("=" * 60)
     
     # BPC files directory
-    bpc_dir = Path(r"C:\DI_MOKSLAI\GO_FAST")
+    bpc_dir = args.directory
     
     if not bpc_dir.exists():
         print(f"[ERROR] Directory not found: {bpc_dir}")
@@ -292,9 +298,15 @@ def main():
     
     try:
         for excel_file in excel_files:
-            imported = import_excel_file(excel_file, db)
+            imported = import_excel_file(excel_file, db, force=args.force)
             total_processes += imported
         
+        # New processes may match existing work-item selections
+        if total_processes:
+            synced = sync_process_requirements(db)
+            db.commit()
+            print(f"\nProcess-level requirements synced: {synced['upserted']}")
+        
         print("\n" + "=" * 60)
         print(f"[OK] Import complete!")
         print(f"Total processes imported: {total_processes}")
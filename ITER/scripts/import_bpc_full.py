@@ -4,6 +4,8 @@ Imports all data from Microsoft Business Process Catalog Full August 2025.xlsx
 """
 
 import sys
+import time
+import argparse
 from pathlib import Path
 import pandas as pd
 import re
@@ -11,52 +13,37 @@ import re
 # Add ITER directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.app.database import SessionLocal
+from backend.app.database import SessionLocal, begin_transaction
 from backend.app.models import E2EProcess, BusinessProcess, Scenario, ERPSystem
+from backend.app.services.catalog_parser import parse_sequence_ids, get_erp_codes_from_products
 
-# Product mapping
-PRODUCT_MAPPING = {
-    "Business Central": "BC",
-    "Supply Chain Management": "D365SCM",
-    "Finance": "D365F",
-    "Finance and Operations": "D365F",
-    "Commerce": "D365COMM",
-    "Sales": "CRM",
-    "Customer Service": "D365CS",
-    "Field Service": "D365FS",
-    "Project Operations": "D365PO",
-    "Human Resources": "D365HR",
-    "Customer Engagement": "CRM",
-}
-
-def parse_process_sequence(seq_id):
-    """Parse process sequence ID."""
-    if pd.isna(seq_id):
-        return None, None, None
-    
-    seq_str = str(seq_id).strip()
-    parts = seq_str.split(".")
+def get_process_name(row, process_code):
+    """Get business process name for a ".000" definition row."""
+    process_name = None
     
-    if len(parts) == 4:
-        # XX.XX.XXX.XXX format
-        process_code = ".".join(parts[:3])  # XX.XX.XXX
-        sequence_num = int(parts[3]) if parts[3].isdigit() else None
-        return process_code, sequence_num, seq_str
-    
-    return None, None, None
-
-def get_erp_code_from_product(product_str):
-    """Map product name to ERP code."""
-    if pd.isna(product_str):
-        return None
+    # Try Title 3 first (most common)
+    if pd.notna(row.get('Title 3')):
+        name = str(row['Title 3']).strip()
+        # Remove process code prefix if present
+        # Example: "65.05.040 Develop sales catalogs" -> "Develop sales catalogs"
+        if process_code in name:
+            process_name = name.replace(process_code, "").strip()
+        else:
+            process_name = name
     
-    product_str = str(product_str).strip()
+    # Fallback to Title 2 or Title 4
+    if not process_name:
+        for title_col in ['Title 2', 'Title 4']:
+            if pd.notna(row.get(title_col)):
+                name = str(row[title_col]).strip()
+                if process_code in name:
+                    process_name = name.replace(process_code, "").strip()
+                    break
     
-    for key, code in PRODUCT_MAPPING.items():
-        if key.lower() in product_str.lower():
-            return code
+    if not process_name or not process_name.strip():
+        process_name = f"Process {process_code}"
     
-    return None
+    return process_name
 
 def import_full_catalog(file_path: Path, db):
     """Import data from the full BPC catalog."""
@@ -65,6 +52,7 @@ def import_full_catalog(file_path: Path, db):
     try:
         df = pd.read_excel(file_path)
         print(f"Total rows: {len(df)}")
+        parsed = parse_sequence_ids(df['Process Sequence ID'])
         
         # Track current E2E process
         current_e2e = None
@@ -103,99 +91,71 @@ def import_full_catalog(file_path: Path, db):
                         current_e2e_obj = e2e_obj
             
             # Check Process Sequence ID for business processes
-            seq_id = row.get('Process Sequence ID')
-            if pd.notna(seq_id):
-                process_code, sequence_num, full_seq = parse_process_sequence(seq_id)
+            process_code = parsed.at[idx, 'process_code']
+            sequence_num = parsed.at[idx, 'scenario']
+            full_seq = parsed.at[idx, 'sequence_id']
+            if process_code and pd.notna(sequence_num):
+                sequence_num = int(sequence_num)
                 
-                if process_code:
-                    # Check if this is a business process (sequence_num == 0 or None)
-                    # or a scenario (sequence_num > 0)
-                    
-                    if sequence_num == 0:
-                        # This is a business process definition
-                        # Get name from Title 3 (most common for process definitions)
-                        process_name = None
-                        
-                        # Try Title 3 first (most common)
-                        if pd.notna(row.get('Title 3')):
-                            name = str(row['Title 3']).strip()
-                            # Remove process code prefix if present
-                            # Example: "65.05.040 Develop sales catalogs" -> "Develop sales catalogs"
-                            if process_code in name:
-                                process_name = name.replace(process_code, "").strip()
-                            else:
-                                process_name = name
-                        
-                        # Fallback to Title 2 or Title 4
-                        if not process_name:
-                            for title_col in ['Title 2', 'Title 4']:
-                                if pd.notna(row.get(title_col)):
-                                    name = str(row[title_col]).strip()
-                                    if process_code in name:
-                                        process_name = name.replace(process_code, "").strip()
-                                        break
-                        
-                        if not process_name or not process_name.strip():
-                            process_name = f"Process {process_code}"
-                        
-                        # Create or get Business Process
-                        if current_e2e_obj:
-                            bp = db.query(BusinessProcess).filter(BusinessProcess.process_code == process_code).first()
-                            if not bp:
-                                bp = BusinessProcess(
-                                    process_code=process_code,
-                                    name=process_name,
-                                    e2e_process_id=current_e2e_obj.id,
-                                    display_order=idx
-                                )
-                                db.add(bp)
-                                db.commit()
-                                db.refresh(bp)
-                                processes_imported += 1
-                                
-                                if processes_imported % 50 == 0:
-                                    print(f"  Imported {processes_imported} processes...")
+                # Check if this is a business process (sequence_num == 0 or None)
+                # or a scenario (sequence_num > 0)
+                
+                if sequence_num == 0:
+                    # This is a business process definition
+                    process_name = get_process_name(row, process_code)
                     
-                    elif sequence_num and sequence_num > 0:
-                        # This is a scenario (specific product implementation)
-                        # Get business process
+                    # Create or get Business Process
+                    if current_e2e_obj:
                         bp = db.query(BusinessProcess).filter(BusinessProcess.process_code == process_code).first()
-                        
-                        if bp:
-                            # Get scenario name from Title 4
-                            scenario_name = str(row.get('Title 4', '')).strip() if pd.notna(row.get('Title 4')) else None
+                        if not bp:
+                            bp = BusinessProcess(
+                                process_code=process_code,
+                                name=process_name,
+                                e2e_process_id=current_e2e_obj.id,
+                                display_order=idx
+                            )
+                            db.add(bp)
+                            db.commit()
+                            db.refresh(bp)
+                            processes_imported += 1
                             
-                            # Get product from Products column
-                            product_str = row.get('Products')
-                            erp_code = get_erp_code_from_product(product_str)
+                            if processes_imported % 50 == 0:
+                                print(f"  Imported {processes_imported} processes...")
+                
+                elif sequence_num and sequence_num > 0:
+                    # This is a scenario (specific product implementation)
+                    # Get business process
+                    bp = db.query(BusinessProcess).filter(BusinessProcess.process_code == process_code).first()
+                    
+                    if bp:
+                        # Get scenario name from Title 4
+                        scenario_name = str(row.get('Title 4', '')).strip() if pd.notna(row.get('Title 4')) else None
+                        
+                        # One scenario per product listed in the Products column
+                        for erp_code in get_erp_codes_from_products(row.get('Products')):
+                            erp_system = db.query(ERPSystem).filter(ERPSystem.code == erp_code).first()
                             
-                            if erp_code:
-                                erp_system = db.query(ERPSystem).filter(ERPSystem.code == erp_code).first()
+                            if erp_system:
+                                # Check if scenario already exists
+                                existing = db.query(Scenario).filter(
+                                    Scenario.scenario_code == full_seq,
+                                    Scenario.erp_system_id == erp_system.id
+                                ).first()
                                 
-                                if erp_system:
-                                    # Check if scenario already exists
-                                    existing = db.query(Scenario).filter(
-                                        Scenario.scenario_code == full_seq,
-                                        Scenario.erp_system_id == erp_system.id
-                                    ).first()
+                                if not existing:
+                                    scenario = Scenario(
+                                        scenario_code=full_seq,
+                                        business_process_id=bp.id,
+                                        erp_system_id=erp_system.id,
+                                        sequence_number=sequence_num,
+                                        name=scenario_name or f"{bp.name} in {erp_system.name}"
+                                    )
+                                    db.add(scenario)
+                                    scenarios_imported += 1
                                     
-                                    if not existing:
-                                        if not scenario_name:
-                                            scenario_name = f"{bp.name} in {erp_system.name}"
-                                        
-                                        scenario = Scenario(
-                                            scenario_code=full_seq,
-                                            business_process_id=bp.id,
-                                            erp_system_id=erp_system.id,
-                                            sequence_number=sequence_num,
-                                            name=scenario_name
-                                        )
-                                        db.add(scenario)
-                                        scenarios_imported += 1
-                                        
-                                        if scenarios_imported % 100 == 0:
-                                            db.commit()
-                                            print(f"  Imported {scenarios_imported} scenarios...")
+                                    if scenarios_imported % 100 == 0:
+                                        db.commit()
+                                        print(f"  Imported {scenarios_imported} scenarios...")
         
         # Final commit
         db.commit()
@@ -213,8 +173,160 @@ def import_full_catalog(file_path: Path, db):
         db.rollback()
         return 0
 
+def import_full_catalog_transactional(file_path: Path, db):
+    """
+    Import the full BPC catalog in a single transaction.
+    
+    Ids come from in-memory key maps (code -> id) instead of a SELECT per row,
+    new rows are flushed inside a SAVEPOINT so one bad row is skipped without
+    losing the rest, and there is exactly one commit at the end. If anything
+    outside a row fails, the whole import is rolled back and the database is
+    left untouched.
+    """
+    print(f"\nReading: {file_path.name}")
+    
+    start = time.perf_counter()
+    df = pd.read_excel(file_path)
+    parsed = parse_sequence_ids(df['Process Sequence ID'])
+    parse_seconds = time.perf_counter() - start
+    print(f"Total rows: {len(df)}")
+    
+    start = time.perf_counter()
+    try:
+        begin_transaction(db)
+        
+        # In-memory key maps
+        e2e_ids = dict(db.query(E2EProcess.code, E2EProcess.id).all())
+        process_ids = dict(db.query(BusinessProcess.process_code, BusinessProcess.id).all())
+        process_names = dict(db.query(BusinessProcess.process_code, BusinessProcess.name).all())
+        erp_systems = {code: (erp_id, name) for erp_id, code, name in db.query(ERPSystem.id, ERPSystem.code, ERPSystem.name).all()}
+        scenario_keys = set(db.query(Scenario.scenario_code, Scenario.erp_system_id).all())
+        
+        current_e2e_id = None
+        
+        processes_imported = 0
+        scenarios_imported = 0
+        e2e_imported = 0
+        failed_rows = 0
+        
+        for idx, row in df.iterrows():
+            try:
+                # Check Title 1 for E2E Process
+                if pd.notna(row.get('Title 1')):
+                    e2e_name = str(row['Title 1']).strip()
+                    if e2e_name and len(e2e_name) > 3:
+                        parts = e2e_name.split(" ", 1)
+                        if len(parts) == 2 and parts[0].isdigit():
+                            e2e_code = parts[1].lower().replace(" ", "-")
+                            
+                            if e2e_code not in e2e_ids:
+                                with db.begin_nested():
+                                    e2e_obj = E2EProcess(
+                                        code=e2e_code,
+                                        name=parts[1],
+                                        display_order=int(parts[0])
+                                    )
+                                    db.add(e2e_obj)
+                                    db.flush()
+                                e2e_ids[e2e_code] = e2e_obj.id
+                                e2e_imported += 1
+                                print(f"  E2E: {e2e_name}")
+                            
+                            current_e2e_id = e2e_ids[e2e_code]
+                
+                process_code = parsed.at[idx, 'process_code']
+                sequence_num = parsed.at[idx, 'scenario']
+                if not process_code or pd.isna(sequence_num):
+                    continue
+                
+                sequence_num = int(sequence_num)
+                full_seq = parsed.at[idx, 'sequence_id']
+                
+                if sequence_num == 0:
+                    # Business process definition
+                    if current_e2e_id and process_code not in process_ids:
+                        process_name = get_process_name(row, process_code)
+                        with db.begin_nested():
+                            bp = BusinessProcess(
+                                process_code=process_code,
+                                name=process_name,
+                                e2e_process_id=current_e2e_id,
+                                display_order=idx
+                            )
+                            db.add(bp)
+                            db.flush()
+                        process_ids[process_code] = bp.id
+                        process_names[process_code] = process_name
+                        processes_imported += 1
+                        
+                        if processes_imported % 50 == 0:
+                            print(f"  Imported {processes_imported} processes...")
+                
+                elif sequence_num and sequence_num > 0:
+                    # Scenario (specific product implementation) - one per listed product
+                    bp_id = process_ids.get(process_code)
+                    if not bp_id:
+                        continue
+                    
+                    scenario_name = str(row.get('Title 4', '')).strip() if pd.notna(row.get('Title 4')) else None
+                    
+                    for erp_code in get_erp_codes_from_products(row.get('Products')):
+                        if erp_code not in erp_systems:
+                            continue
+                        
+                        erp_id, erp_name = erp_systems[erp_code]
+                        if (full_seq, erp_id) in scenario_keys:
+                            continue
+                        
+                        with db.begin_nested():
+                            db.add(Scenario(
+                                scenario_code=full_seq,
+                                business_process_id=bp_id,
+                                erp_system_id=erp_id,
+                                sequence_number=sequence_num,
+                                name=scenario_name or f"{process_names[process_code]} in {erp_name}"
+                            ))
+                            db.flush()
+                        scenario_keys.add((full_seq, erp_id))
+                        scenarios_imported += 1
+                        
+                        if scenarios_imported % 1000 == 0:
+                            print(f"  Imported {scenarios_imported} scenarios...")
+            
+            except Exception as e:
+                # The savepoint has been rolled back - skip just this row
+                failed_rows += 1
+                print(f"  [WARNING] Row {idx} skipped: {e}")
+        
+        db.commit()
+        
+    except Exception as e:
+        print(f"  [ERROR] Error importing, nothing was written: {e}")
+        import traceback
+        traceback.print_exc()
+        db.rollback()
+        return 0
+    
+    import_seconds = time.perf_counter() - start
+    print(f"\n  [OK] Import complete (single transaction):")
+    print(f"    E2E Processes: {e2e_imported}")
+    print(f"    Business Processes: {processes_imported}")
+    print(f"    Scenarios: {scenarios_imported}")
+    print(f"    Rows skipped on error: {failed_rows}")
+    print(f"    Read Excel: {parse_seconds:.1f}s, import: {import_seconds:.1f}s")
+    
+    return processes_imported
+
 def main():
     """Main import function."""
+    parser = argparse.ArgumentParser(description="Import the full BPC catalog")
+    parser.add_argument(
+        "--transactional",
+        action="store_true",
+        help="Import everything in one transaction (per-row savepoints, all-or-nothing)"
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("ITER - BPC Full Catalog Import")
     print("=" * 60)
@@ -229,7 +341,10 @@ def main():
     db = SessionLocal()
     
     try:
-        import_full_catalog(catalog_file, db)
+        if args.transactional:
+            import_full_catalog_transactional(catalog_file, db)
+        else:
+            import_full_catalog(catalog_file, db)
         
         # Print summary
         print("\n" + "=" * 60)
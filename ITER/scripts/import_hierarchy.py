@@ -4,41 +4,26 @@ Imports the complete Title 1-5 hierarchy with work items
 """
 
 import sys
+import json
+import time
+import argparse
 from pathlib import Path
 import pandas as pd
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from backend.app.database import SessionLocal
-from backend.app.models import ProcessHierarchy, ERPSystem
-
-# Product mapping
-PRODUCT_MAPPING = {
-    "Business Central": "BC",
-    "Supply Chain Management": "D365SCM",
-    "Finance": "D365F",
-    "Finance and Operations": "D365F",
-    "Commerce": "D365COMM",
-    "Sales": "CRM",
-    "Customer Service": "D365CS",
-    "Field Service": "D365FS",
-    "Project Operations": "D365PO",
-    "Human Resources": "D365HR",
-    "Customer Engagement": "CRM",
-}
-
-def get_erp_code_from_product(product_str):
-    """Map product name to ERP code."""
-    if pd.isna(product_str):
-        return None
-    
-    product_str = str(product_str).strip()
-    
-    for key, code in PRODUCT_MAPPING.items():
-        if key.lower() in product_str.lower():
-            return code
-    
-    return None
+from sqlalchemy.sql import func
+from backend.app.database import SessionLocal, engine
+from backend.app.models import ProcessHierarchy, ScenarioProduct, ERPSystem, ImportRun
+from backend.app.services.catalog_parser import parse_sequence_ids, parse_products
+from backend.app.services.node_keys import (
+    make_node_key, refresh_node_keys, relink_requirements, find_node_key_collisions
+)
+from backend.app.services.hierarchy_integrity import check_hierarchy, format_report
+from backend.app.services.catalog_manifest import file_sha256, is_unchanged, record_import
+from backend.app.services.hierarchy_rollups import refresh_hierarchy_rollups
+from backend.app.services.schema_upgrade import upgrade_database
+from backend.app.services.requirement_rollup import sync_process_requirements
 
 def get_hierarchy_level(row):
     """Determine hierarchy level based on which Title is filled."""
@@ -54,21 +39,102 @@ def get_hierarchy_level(row):
         return 5, row['Title 5']
     return None, None
 
-def import_hierarchy(file_path: Path, db):
+# Commit (and checkpoint) every N imported items
+CHECKPOINT_EVERY = 500
+
+def start_import_run(db, file_path: Path, resume: bool = False) -> ImportRun:
+    """
+    Get the import run to work on.
+    
+    With resume=True the latest unfinished run for this file is continued,
+    otherwise (or if there is none) a new run is started.
+    """
+    run = None
+    if resume:
+        run = db.query(ImportRun).filter(
+            ImportRun.script == "import_hierarchy",
+            ImportRun.source_file == file_path.name,
+            ImportRun.status != "completed"
+        ).order_by(ImportRun.id.desc()).first()
+    
+    if run:
+        print(f"Resuming import run {run.id} after row {run.last_row_index}")
+        run.status = "running"
+        run.error = None
+    else:
+        if resume:
+            print("No unfinished import run found - starting from the beginning")
+        run = ImportRun(
+            script="import_hierarchy",
+            source_file=file_path.name,
+            status="running",
+            first_item_id=(db.query(func.max(ProcessHierarchy.id)).scalar() or 0) + 1
+        )
+        db.add(run)
+    
+    db.commit()
+    return run
+
+def save_checkpoint(db, run: ImportRun, row_index: int, parent_stack: dict, imported: int, skipped: int, merged: int):
+    """
+    Record the checkpoint and commit it together with the imported rows.
+    
+    row_index must be fully processed (item and product links), since a
+    resumed run starts after it.
+    """
+    run.last_row_index = row_index
+    run.parent_stack = json.dumps(parent_stack)
+    run.imported_count = imported
+    run.skipped_count = skipped
+    run.merged_count = merged
+    db.commit()
+
+def import_hierarchy(file_path: Path, db, resume: bool = False, force: bool = False):
     """Import the full hierarchy from BPC catalog."""
     print(f"\nReading: {file_path.name}")
     
+    # Skip the workbook if this exact content was already imported
+    content_hash = file_sha256(file_path)
+    if not resume and not force and is_unchanged(db, "import_hierarchy", file_path, content_hash):
+        print("[SKIP] Unchanged since the last import (use --force to re-import)")
+        return 0
+    
+    start = time.perf_counter()
+    run = start_import_run(db, file_path, resume)
+    
     try:
         df = pd.read_excel(file_path)
         print(f"Total rows: {len(df)}")
+        parsed = parse_sequence_ids(df['Process Sequence ID'])
+        products = parse_products(df.get('Products', pd.Series(None, index=df.index, dtype=object)))
+        
+        # ERP code -> id, and scenario/product links that already exist
+        erp_ids = dict(db.query(ERPSystem.code, ERPSystem.id).all())
+        linked_products = set(db.query(ScenarioProduct.hierarchy_item_id, ScenarioProduct.erp_system_id).all())
         
         # Track parent at each level
         parent_stack = {1: None, 2: None, 3: None, 4: None, 5: None}
         
         imported = 0
         skipped = 0
+        merged = 0
+        start_row = 0
+        created_ids = set()  # Items created by this run (to spot duplicate rows)
+        
+        if run.last_row_index is not None:
+            # Continue from the checkpoint
+            parent_stack.update({int(k): v for k, v in json.loads(run.parent_stack).items()})
+            imported = run.imported_count or 0
+            skipped = run.skipped_count or 0
+            merged = run.merged_count or 0
+            start_row = run.last_row_index + 1
+            if run.first_item_id is not None:
+                created_ids = {
+                    item_id for (item_id,) in
+                    db.query(ProcessHierarchy.id).filter(ProcessHierarchy.id >= run.first_item_id)
+                }
         
-        for idx, row in df.iterrows():
+        for idx, row in df.iloc[start_row:].iterrows():
             # Get hierarchy level and name
             level, name = get_hierarchy_level(row)
             
@@ -82,11 +148,7 @@ def import_hierarchy(file_path: Path, db):
                 continue
             
             # Get sequence ID
-            sequence_id = row.get('Process Sequence ID')
-            if pd.notna(sequence_id):
-                sequence_id = str(sequence_id).strip()
-            else:
-                sequence_id = None
+            sequence_id = parsed.at[idx, 'sequence_id']
             
             # Get work item type
             work_item_type = row.get('Work Item Type')
@@ -95,15 +157,10 @@ def import_hierarchy(file_path: Path, db):
             else:
                 work_item_type = None
             
-            # Get product/ERP system (for scenarios)
-            erp_code = None
-            erp_system_id = None
-            if pd.notna(row.get('Products')):
-                erp_code = get_erp_code_from_product(row['Products'])
-                if erp_code:
-                    erp_system = db.query(ERPSystem).filter(ERPSystem.code == erp_code).first()
-                    if erp_system:
-                        erp_system_id = erp_system.id
+            # Get products/ERP systems (for scenarios)
+            # Every product listed in the cell is linked; erp_system_id keeps the first one
+            product_ids = [erp_ids[code] for code in products[idx] if code in erp_ids]
+            erp_system_id = product_ids[0] if product_ids else None
             
             # Get parent ID from previous level
             parent_id = parent_stack.get(level - 1) if level > 1 else None
@@ -133,12 +190,16 @@ def import_hierarchy(file_path: Path, db):
                     parent_id=parent_id,
                     erp_system_id=erp_system_id,
                     display_order=idx,
-                    excel_row_index=idx
+                    excel_row_index=idx,
+                    node_key=make_node_key(sequence_id, level, work_item_type, name)
                 )
                 db.add(item)
                 db.flush()  # Get ID
                 db.refresh(item)
                 
+                item_id = item.id
+                created_ids.add(item_id)
+                
                 # Update parent stack for this level
                 parent_stack[level] = item.id
                 
@@ -147,20 +208,59 @@ def import_hierarchy(file_path: Path, db):
                     parent_stack[lower_level] = None
                 
                 imported += 1
-                
-                if imported % 500 == 0:
-                    db.commit()
-                    print(f"  Imported {imported} items...")
+                checkpoint_due = imported % CHECKPOINT_EVERY == 0
             else:
+                checkpoint_due = False
+                item_id = existing.id
+                if item_id in created_ids:
+                    # Duplicate (sequence_id, level, type) row in the workbook
+                    merged += 1
+                
                 # Update parent stack with existing item
                 parent_stack[level] = existing.id
                 for lower_level in range(level + 1, 6):
                     parent_stack[lower_level] = None
+            
+            # Link scenarios to all of their products
+            if level == 4:
+                for product_id in product_ids:
+                    if (item_id, product_id) not in linked_products:
+                        db.add(ScenarioProduct(hierarchy_item_id=item_id, erp_system_id=product_id))
+                        linked_products.add((item_id, product_id))
+            
+            # Only after the row's links, so a resumed run never skips them
+            if checkpoint_due:
+                save_checkpoint(db, run, idx, parent_stack, imported, skipped, merged)
+                print(f"  Imported {imported} items...")
         
-        db.commit()
+        run.status = "completed"
+        run.finished_at = func.now()
+        save_checkpoint(db, run, len(df) - 1, parent_stack, imported, skipped, merged)
         print(f"\n[OK] Import complete:")
         print(f"  Items imported: {imported}")
         print(f"  Items skipped: {skipped}")
+        if merged:
+            print(f"  [WARNING] Duplicate rows merged into an existing item: {merged}")
+        
+        refresh_node_keys(db)
+        collisions = find_node_key_collisions(db)
+        if collisions:
+            print(f"  [WARNING] Node keys shared by several rows (requirements not relinked): {len(collisions)}")
+        relinked = relink_requirements(db)
+        if relinked:
+            print(f"  Requirements relinked by node key: {relinked}")
+        
+        rollups = refresh_hierarchy_rollups(db)
+        print(f"  Hierarchy rollups refreshed: {rollups['area_rollups']} area/product rows ({rollups['elapsed_ms']} ms)")
+        
+        synced = sync_process_requirements(db)
+        db.commit()
+        print(f"  Process-level requirements synced: {synced['upserted']}")
+        
+        print()
+        print(format_report(check_hierarchy(db)))
+        
+        record_import(db, "import_hierarchy", file_path, content_hash, len(df), time.perf_counter() - start)
         
         return imported
         
@@ -169,10 +269,29 @@ def import_hierarchy(file_path: Path, db):
         import traceback
         traceback.print_exc()
         db.rollback()
+        
+        # Rows after the last checkpoint were rolled back - keep the checkpoint
+        run.status = "failed"
+        run.error = str(e)
+        db.commit()
+        print(f"[INFO] Run {run.id} can be continued with --resume")
         return 0
 
 def main():
     """Main import function."""
+    parser = argparse.ArgumentParser(description="Import the BPC process hierarchy")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last unfinished import from its checkpoint"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-import even if the workbook is unchanged since the last import"
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("ITER - Import Process Hierarchy")
     print("=" * 60)
@@ -183,10 +302,13 @@ def main():
         print(f"[ERROR] File not found: {catalog_file}")
         return
     
+    # Columns added by newer models (no-op on an up-to-date database)
+    upgrade_database(engine)
+    
     db = SessionLocal()
     
     try:
-        import_hierarchy(catalog_file, db)
+        import_hierarchy(catalog_file, db, resume=args.resume, force=args.force)
         
         # Print summary by level
         print("\n" + "=" * 60)
@@ -217,6 +339,5 @@ def main():
         db.close()
 
 if __name__ == "__main__":
-    from sqlalchemy.sql import func
     main()
 
@@ -10,6 +10,7 @@ pause
 echo.
 echo Step 1: Removing old database...
 del /F /Q "C:\DI_MOKSLAI\ITER\database\iter.db" 2>nul
+del /F /Q "C:\DI_MOKSLAI\ITER\database\active_db.txt" 2>nul
 echo [OK] Database removed
 
 echo.
@@ -0,0 +1,88 @@
+"""
+Refresh Catalog - Import the BPC hierarchy into a staging database and swap it in
+Streamlit can keep running: it reads the old catalog until the swap.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backend.app.database import SessionLocal
+from backend.app.models import ImportRun
+from backend.app.services.catalog_swap import (
+    create_staging_database, validate_staging, promote_staging
+)
+from backend.app.services.catalog_manifest import file_sha256, is_unchanged
+from seed_database import seed_erp_systems
+from import_hierarchy import import_hierarchy
+
+def main():
+    """Stage, validate and promote a catalog refresh."""
+    print("=" * 60)
+    print("ITER - Refresh Catalog (blue/green)")
+    print("=" * 60)
+
+    catalog_file = Path(r"C:\DI_MOKSLAI\GO_FAST\Microsoft Business Process Catalog Full August 2025.xlsx")
+
+    if not catalog_file.exists():
+        print(f"[ERROR] File not found: {catalog_file}")
+        return
+
+    db = SessionLocal()
+    try:
+        unchanged = is_unchanged(db, "import_hierarchy", catalog_file, file_sha256(catalog_file))
+    finally:
+        db.close()
+    
+    if unchanged:
+        print("\n[OK] Catalog unchanged since the last import - nothing to refresh")
+        return
+    
+    start = time.perf_counter()
+    staging = create_staging_database()
+    print(f"\nStep 1: Staging database created: {staging.path.name} ({time.perf_counter() - start:.1f}s)")
+
+    db = staging.session()
+    try:
+        print("\nStep 2: Importing into staging...")
+        seed_erp_systems(db)
+        import_hierarchy(catalog_file, db)
+        run = db.query(ImportRun).filter(
+            ImportRun.script == "import_hierarchy",
+            ImportRun.source_file == catalog_file.name
+        ).order_by(ImportRun.id.desc()).first()
+    finally:
+        db.close()
+
+    if run is None or run.status != "completed":
+        staging.dispose()
+        print("[ERROR] Import into staging did not complete, active catalog unchanged")
+        print(f"[INFO] Staging file left for inspection: {staging.path}")
+        return
+
+    print("\nStep 3: Validating staged catalog...")
+    try:
+        counts = validate_staging(staging)
+    except ValueError as e:
+        staging.dispose()
+        print(f"[ERROR] Validation failed, active catalog unchanged: {e}")
+        print(f"[INFO] Staging file left for inspection: {staging.path}")
+        return
+
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
+
+    print("\nStep 4: Promoting staged catalog...")
+    start = time.perf_counter()
+    promoted = promote_staging(staging)
+    print(f"[OK] Active catalog is now {staging.path.name} (swap took {time.perf_counter() - start:.2f}s)")
+    print(f"  Requirements relinked by node key: {promoted['requirements_relinked']}")
+    if promoted['requirements_dropped']:
+        print(f"  [WARNING] Requirements on rows no longer in the catalog dropped: {promoted['requirements_dropped']}")
+    print(f"[INFO] Previous database kept for rollback: {promoted['previous'].name}")
+
+if __name__ == "__main__":
+    main()
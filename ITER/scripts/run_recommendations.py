@@ -0,0 +1,39 @@
+"""
+Run Recommendations - Score every organization and store the results
+Results go to the recommendation_results table (one row per organization and product).
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.app.database import SessionLocal
+from backend.app.models import RecommendationResult
+from backend.app.services.recommendation_batch import run_batch, CHUNK_SIZE
+
+def main():
+    """Run the batch recommendation job."""
+    parser = argparse.ArgumentParser(description="Score all organizations and store the recommendations")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Organizations per worker task (default {CHUNK_SIZE})")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("ITER - Batch Recommendations")
+    print("=" * 60)
+    
+    db = SessionLocal()
+    try:
+        RecommendationResult.__table__.create(bind=db.get_bind(), checkfirst=True)
+        stats = run_batch(db, workers=args.workers, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+    
+    print(f"\n[OK] Scored {stats['organizations']} organizations with {stats['workers']} worker(s)")
+    print(f"  Rows written: {stats['rows']} (run_at {stats['run_at']:%Y-%m-%d %H:%M:%S} UTC)")
+    print(f"  Load: {stats['load_seconds']}s, score: {stats['score_seconds']}s, write: {stats['write_seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -3,60 +3,104 @@ Update Process Names - Fix process names from Excel file
 """
 
 import sys
+import time
 from pathlib import Path
 import pandas as pd
+from sqlalchemy import update
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from backend.app.database import SessionLocal
 from backend.app.models import BusinessProcess
 
+def build_process_name_map(df: pd.DataFrame) -> dict:
+    """
+    Build a process_code -> name map from the ".000" rows in one pass.
+
+    Example: "65.05.040.000" with Title 3 "65.05.040 Develop sales catalogs"
+    becomes {"65.05.040": "Develop sales catalogs"}.
+    """
+    seq = df['Process Sequence ID'].astype(str).str.strip()
+    rows = df.loc[seq.str.endswith('.000'), ['Title 3']].copy()
+    rows['process_code'] = seq[rows.index].str[:-4]
+
+    # First matching row wins (same as the old per-process lookup)
+    rows = rows.drop_duplicates('process_code', keep='first')
+    rows = rows[rows['Title 3'].notna()]
+
+    name_map = {}
+    for process_code, title in zip(rows['process_code'], rows['Title 3']):
+        full_name = str(title).strip()
+
+        # Remove process code prefix
+        # "65.05.040 Develop sales catalogs" -> "Develop sales catalogs"
+        if process_code in full_name:
+            process_name = full_name.replace(process_code, "").strip()
+        else:
+            process_name = full_name
+
+        if process_name:
+            name_map[process_code] = process_name
+
+    return name_map
+
+def update_process_names(df: pd.DataFrame, db) -> int:
+    """
+    Join-based updater: merge the Excel name map against (id, process_code, name)
+    tuples from the database and apply only the differing names with one bulk UPDATE.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    name_map = build_process_name_map(df)
+    timings['build name map'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    processes = db.query(
+        BusinessProcess.id, BusinessProcess.process_code, BusinessProcess.name
+    ).all()
+    timings['load processes'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    changes = [
+        {'id': bp_id, 'name': name_map[code]}
+        for bp_id, code, name in processes
+        if code in name_map and name_map[code] != name
+    ]
+    timings['join'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if changes:
+        db.execute(update(BusinessProcess), changes)
+    db.commit()
+    timings['bulk update'] = time.perf_counter() - start
+
+    print(f"\n  Excel process rows: {len(name_map)}")
+    print(f"  Database processes: {len(processes)}")
+    print("\n  Timing:")
+    for step, seconds in timings.items():
+        print(f"    {step:<16} {seconds * 1000:8.1f} ms")
+
+    return len(changes)
+
 def main():
     """Update process names from Excel."""
     print("=" * 60)
     print("Updating Process Names")
     print("=" * 60)
-    
+
     # Read Excel
     catalog_file = Path(r"C:\DI_MOKSLAI\GO_FAST\Microsoft Business Process Catalog Full August 2025.xlsx")
+    start = time.perf_counter()
     df = pd.read_excel(catalog_file)
-    
+    print(f"  Read {len(df)} rows in {time.perf_counter() - start:.1f}s")
+
     db = SessionLocal()
-    updated = 0
-    
+
     try:
-        # Get all business processes
-        processes = db.query(BusinessProcess).all()
-        
-        for bp in processes:
-            # Find matching row in Excel
-            matching_row = df[df['Process Sequence ID'] == f"{bp.process_code}.000"]
-            
-            if not matching_row.empty:
-                row = matching_row.iloc[0]
-                
-                # Get name from Title 3
-                if pd.notna(row.get('Title 3')):
-                    full_name = str(row['Title 3']).strip()
-                    
-                    # Remove process code prefix
-                    # "65.05.040 Develop sales catalogs" -> "Develop sales catalogs"
-                    if bp.process_code in full_name:
-                        process_name = full_name.replace(bp.process_code, "").strip()
-                    else:
-                        process_name = full_name
-                    
-                    # Update if different
-                    if process_name and process_name != bp.name:
-                        bp.name = process_name
-                        updated += 1
-                        
-                        if updated % 100 == 0:
-                            print(f"  Updated {updated} processes...")
-        
-        db.commit()
+        updated = update_process_names(df, db)
         print(f"\n[OK] Updated {updated} process names")
-        
+
     except Exception as e:
         print(f"[ERROR] {e}")
         db.rollback()
@@ -65,4 +109,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
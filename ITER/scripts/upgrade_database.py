@@ -0,0 +1,37 @@
+"""
+Upgrade Database - Add columns and indexes from newer models to the active database
+Run once after updating the code; requirements and other user data are kept.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backend.app.database import engine, DATABASE_PATH
+from backend.app.services.schema_upgrade import upgrade_database
+
+def main():
+    """Upgrade the active database in place."""
+    print("=" * 60)
+    print("ITER - Upgrade Database")
+    print("=" * 60)
+    print(f"\nDatabase: {DATABASE_PATH}")
+    
+    stats = upgrade_database(engine)
+    
+    if stats['added']:
+        print("\nAdded:")
+        for name in stats['added']:
+            print(f"  - {name}")
+    else:
+        print("\nSchema already up to date")
+    
+    print(f"\nDuplicate requirements removed: {stats['duplicate_requirements_removed']}")
+    print(f"Node keys updated: {stats['node_keys_updated']}")
+    print(f"Requirements re-keyed: {stats['requirements_rekeyed']}")
+    print(f"Hierarchy rollups refreshed ({stats['rollups']['elapsed_ms']} ms)")
+    print("\n[OK] Upgrade complete")
+
+if __name__ == "__main__":
+    main()
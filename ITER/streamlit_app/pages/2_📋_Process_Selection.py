@@ -4,11 +4,20 @@ Process Selection Page - Hierarchical tree view with MoSCoW prioritization
 
 import streamlit as st
 import sys
+import pandas as pd
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from streamlit_app.services.hierarchy_service import HierarchyService
+from backend.app.services.hierarchy_recommendation_service import HierarchyRecommendationService
+from backend.app.services.recommendation_cache import requirements_revision
+from backend.app.models import SELECTABLE_WORK_ITEM_TYPES
+
+# Number of "next best questions" shown
+NEXT_QUESTIONS_TOP_N = 10
+
+PRIORITY_LABELS = {'must': '🔴 Must', 'should': '🟡 Should', 'could': '🟢 Could', 'wont': "⚪ Won't"}
 
 st.set_page_config(
     page_title="ITER - Process Selection",
@@ -43,7 +52,173 @@ with st.expander("ℹ️ How to use"):
 st.markdown("---")
 
 
-def render_tree_recursive(item_or_list, hs, requirements, level=0):
+@st.cache_data(show_spinner="Loading process hierarchy...")
+def load_hierarchy_tree(root_id, catalog_version: int):
+    """Build the hierarchy tree once per catalog version (catalog_version is the cache key)."""
+    with HierarchyService() as hs:
+        return hs.get_hierarchy_tree(root_id)
+
+
+def get_question_ranker(hs, catalog_version: int):
+    """Session ranker; rebuilt only when the catalog or someone else's writes changed the data."""
+    org_id = st.session_state.organization_id
+    key = (org_id, catalog_version, requirements_revision(hs.db, org_id))
+    cached = st.session_state.get('question_ranker')
+    if not cached or cached['key'] != key:
+        cached = {
+            'key': key,
+            'ranker': HierarchyRecommendationService(hs.db).build_question_ranker(org_id),
+        }
+        st.session_state.question_ranker = cached
+    return cached['ranker']
+
+
+def save_answers(hs, changes: dict):
+    """
+    Save many answers in one transaction and update the question ranking.
+    
+    Args:
+        changes: item_id -> (old_priority, new_priority); new None clears the answer
+    """
+    org_id = st.session_state.organization_id
+    before = requirements_revision(hs.db, org_id)
+    hs.save_requirements(org_id, {item_id: new for item_id, (_, new) in changes.items()}, st.session_state.user_id)
+    after = requirements_revision(hs.db, org_id)
+    
+    # Update the ranker in place only if no other session wrote in between
+    cached = st.session_state.get('question_ranker')
+    if cached and cached['key'][0] == org_id and cached['key'][2] == before and after == before + 1:
+        for item_id, (old, new) in changes.items():
+            cached['ranker'].apply_answer(item_id, old, new)
+        cached['key'] = (org_id, cached['key'][1], after)
+    
+    # Radios keep their own state; drop it so they show the saved values
+    for item_id in changes:
+        st.session_state.pop(f"priority_{item_id}", None)
+
+
+def queue_answer(item_id: int, old_priority):
+    """Radio callback (user changes only): the answer is saved at the start of the rerun."""
+    new_priority = st.session_state[f"priority_{item_id}"]
+    st.session_state.setdefault('pending_answers', {})[item_id] = (old_priority, new_priority)
+
+
+def save_pending_answers(hs):
+    """Save the answers queued by the tree radios since the last run."""
+    pending = st.session_state.pop('pending_answers', None)
+    if pending:
+        save_answers(hs, pending)
+        st.toast(f"Saved {len(pending)} answer{'s' if len(pending) > 1 else ''}", icon="✅")
+
+
+def render_subtree_action(hs, item, requirements):
+    """Apply one priority to every selectable item below a node."""
+    labels = {**PRIORITY_LABELS, None: "Clear"}
+    options = list(labels)
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        priority = st.selectbox(
+            f"Set all {item['selectable_count']} items below",
+            options,
+            format_func=labels.get,
+            key=f"subtree_priority_{item['id']}"
+        )
+    with col2:
+        st.write("")
+        if st.button("Apply to subtree", key=f"subtree_apply_{item['id']}"):
+            item_ids = hs.get_subtree_selectable_ids(item['id'])
+            save_answers(hs, {item_id: (requirements.get(item_id), priority) for item_id in item_ids})
+            st.toast(f"{labels[priority]}: {len(item_ids)} items", icon="✅")
+            st.rerun()
+
+
+def render_grid_editor(hs, e2e_id):
+    """Flat editor for all selectable items; edits are saved together on submit."""
+    search = st.text_input("Search work items")
+    items = pd.DataFrame(
+        hs.get_selectable_items(st.session_state.organization_id, e2e_id, search.strip() or None),
+        columns=['id', 'sequence_id', 'path', 'work_item_type', 'name', 'priority']
+    ).set_index('id')
+    
+    if items.empty:
+        st.info("No work items match the filter.")
+        return
+    
+    st.caption(f"{len(items):,} work items, {items['priority'].notna().sum():,} evaluated")
+    
+    # A new editor key after each save drops the editor's pending edits
+    version = st.session_state.get('grid_editor_version', 0)
+    with st.form(f"grid_form_{version}"):
+        edited = st.data_editor(
+            items,
+            column_config={
+                'sequence_id': st.column_config.TextColumn("Sequence ID"),
+                'path': st.column_config.TextColumn("Path", width="large"),
+                'work_item_type': st.column_config.TextColumn("Type"),
+                'name': st.column_config.TextColumn("Work Item", width="large"),
+                'priority': st.column_config.SelectboxColumn(
+                    "Priority", options=['must', 'should', 'could', 'wont'], required=False
+                ),
+            },
+            disabled=['sequence_id', 'path', 'work_item_type', 'name'],
+            hide_index=True,
+            use_container_width=True,
+            height=600,
+            key=f"grid_editor_{version}"
+        )
+        submitted = st.form_submit_button("💾 Save changes", type="primary")
+    
+    if submitted:
+        # Only rows whose priority differs from what was loaded
+        old = items['priority'].fillna('')
+        new = edited['priority'].fillna('')
+        changed = new.index[old != new]
+        if changed.empty:
+            st.info("No changes to save.")
+            return
+        
+        save_answers(hs, {
+            int(item_id): (old[item_id] or None, new[item_id] or None)
+            for item_id in changed
+        })
+        st.session_state.grid_editor_version = version + 1
+        st.toast(f"Saved {len(changed)} changes", icon="✅")
+        st.rerun()
+
+
+def render_next_questions(hs, ranker):
+    """Top-N unanswered scenarios whose answer could change the primary ERP most."""
+    questions = ranker.rank(NEXT_QUESTIONS_TOP_N)
+    if not questions:
+        st.caption("No open questions affect the primary ERP decision.")
+        return
+    
+    answer_options = ['—', 'must', 'should', 'could', 'wont']
+    for question in questions:
+        col1, col2, col3 = st.columns([4, 1, 1])
+        with col1:
+            flip = " ⚠️ could change the primary ERP" if question['could_flip'] else ""
+            st.markdown(
+                f"**{question['scenario_name']}** "
+                f"({question['unanswered_items']} open items - the answer applies to all){flip}"
+            )
+        with col2:
+            st.markdown(f"±{question['impact']:.1f} pts")
+        with col3:
+            answer = st.selectbox(
+                "Answer",
+                answer_options,
+                key=f"nbq_{question['item_id']}",
+                label_visibility="collapsed"
+            )
+            if answer != '—':
+                save_answers(hs, {item_id: (None, answer) for item_id in question['item_ids']})
+                st.toast(f"Saved: {answer.capitalize()} for {len(question['item_ids'])} items", icon="✅")
+                del st.session_state[f"nbq_{question['item_id']}"]
+                st.rerun()
+
+
+def render_tree_recursive(item_or_list, hs, requirements, evaluated, level=0):
     """Recursively render tree nodes."""
     items = [item_or_list] if isinstance(item_or_list, dict) else item_or_list
     
@@ -57,14 +232,7 @@ def render_tree_recursive(item_or_list, hs, requirements, level=0):
             st.session_state[expand_key] = False
         
         # Determine if this is selectable (work items that can have MoSCoW)
-        # Selectable: Scenarios and all work item types
-        is_selectable = item.get('work_item_type') in [
-            'Scenario',
-            'Task', 
-            'Configuration deliverable', 
-            'Workshop', 
-            'Document deliverable'
-        ]
+        is_selectable = item.get('work_item_type') in SELECTABLE_WORK_ITEM_TYPES
         
         # Create row
         if is_selectable:
@@ -80,6 +248,9 @@ def render_tree_recursive(item_or_list, hs, requirements, level=0):
             if has_children:
                 icon = "▼" if st.session_state[expand_key] else "▶"
                 label = f"{indent}{icon} **{display_name}**"
+                if item.get('selectable_count'):
+                    answered = evaluated.count(item.get('tree_left'), item.get('tree_right'))
+                    label += f" · {answered}/{item['selectable_count']} evaluated"
                 if st.button(label, key=f"btn_{item['id']}", use_container_width=True):
                     st.session_state[expand_key] = not st.session_state[expand_key]
             else:
@@ -90,44 +261,27 @@ def render_tree_recursive(item_or_list, hs, requirements, level=0):
         if is_selectable:
             with col2:
                 current_priority = requirements.get(item['id'], None)
+                priority_values = list(PRIORITY_LABELS)
                 
-                # Radio buttons for MoSCoW (horizontal)
-                priority_options = ['🔴 Must', '🟡 Should', '🟢 Could', '⚪ Won\'t']
-                priority_values = ['must', 'should', 'could', 'wont']
-                
-                # Get current index (default to 0 if not set)
-                if current_priority in priority_values:
-                    current_idx = priority_values.index(current_priority)
-                else:
-                    current_idx = 0  # Default to 'must'
-                
-                selected = st.radio(
+                # Radio buttons for MoSCoW (horizontal); unanswered items show no selection.
+                # Only a user change saves (on_change), never a rerender.
+                st.radio(
                     "MoSCoW",
-                    priority_options,
-                    index=current_idx,
+                    priority_values,
+                    index=priority_values.index(current_priority) if current_priority in priority_values else None,
+                    format_func=PRIORITY_LABELS.get,
                     key=f"priority_{item['id']}",
+                    on_change=queue_answer,
+                    args=(item['id'], current_priority),
                     horizontal=True,
                     label_visibility="collapsed"
                 )
-                
-                # Convert back to value
-                if selected in priority_options:
-                    selected_idx = priority_options.index(selected)
-                    priority = priority_values[selected_idx]
-                    
-                    # Auto-save when selection changes
-                    if current_priority != priority:
-                        hs.save_requirement(
-                            st.session_state.organization_id,
-                            item['id'],
-                            priority,
-                            st.session_state.user_id
-                        )
-                        st.toast(f"Saved: {priority.capitalize()}", icon="✅")
         
         # Render children if expanded
         if has_children and st.session_state[expand_key]:
-            render_tree_recursive(item['children'], hs, requirements, level + 1)
+            if item.get('selectable_count'):
+                render_subtree_action(hs, item, requirements)
+            render_tree_recursive(item['children'], hs, requirements, evaluated, level + 1)
         
         if level == 0:
             st.markdown("---")
@@ -135,6 +289,8 @@ def render_tree_recursive(item_or_list, hs, requirements, level=0):
 
 try:
     with HierarchyService() as hs:
+        save_pending_answers(hs)
+        
         # Get E2E processes for filter
         e2e_processes = hs.get_e2e_processes()
         
@@ -142,32 +298,46 @@ try:
             st.warning("No data found. Please import BPC data first.")
             st.code("python scripts/recreate_db_and_import.bat")
         else:
+            # Filled after the tree, so it already reflects saves made in this run
+            next_questions = st.expander("🎯 Next best questions", expanded=True)
+            
             # E2E Process filter
             e2e_options = ["All"] + [p.name for p in e2e_processes]
             selected_e2e = st.selectbox("Filter by End-to-End Process", e2e_options)
+            view_mode = st.radio("View", ["Tree", "Grid"], horizontal=True)
             
             st.markdown("---")
             
-            # Get hierarchy tree
-            if selected_e2e == "All":
-                # Show all E2E processes
-                tree_data = hs.get_hierarchy_tree()
-            else:
-                # Show selected E2E process
+            catalog_version = hs.get_catalog_version()
+            if view_mode == "Grid":
                 selected_e2e_obj = next((p for p in e2e_processes if p.name == selected_e2e), None)
-                if selected_e2e_obj:
-                    tree_data = hs.get_hierarchy_tree(selected_e2e_obj.id)
+                render_grid_editor(hs, selected_e2e_obj.id if selected_e2e_obj else None)
+            else:
+                # Get hierarchy tree (cached until the catalog is re-imported)
+                if selected_e2e == "All":
+                    # Show all E2E processes
+                    tree_data = load_hierarchy_tree(None, catalog_version)
                 else:
-                    tree_data = []
-            
-            # Get existing requirements
-            requirements = {r.hierarchy_item_id: r.priority for r in hs.get_all_requirements(st.session_state.organization_id)}
+                    # Show selected E2E process
+                    selected_e2e_obj = next((p for p in e2e_processes if p.name == selected_e2e), None)
+                    if selected_e2e_obj:
+                        tree_data = load_hierarchy_tree(selected_e2e_obj.id, catalog_version)
+                    else:
+                        tree_data = []
+                
+                # Get existing requirements
+                requirements = {r.hierarchy_item_id: r.priority for r in hs.get_all_requirements(st.session_state.organization_id)}
+                evaluated = hs.get_evaluated_counts(st.session_state.organization_id)
+                
+                # Render tree
+                if tree_data:
+                    render_tree_recursive(tree_data[0] if selected_e2e != "All" else tree_data, hs, requirements, evaluated, level=0)
+                else:
+                    st.info("No data found for selected filter.")
             
-            # Render tree
-            if tree_data:
-                render_tree_recursive(tree_data[0] if selected_e2e != "All" else tree_data, hs, requirements, level=0)
-            else:
-                st.info("No data found for selected filter.")
+            with next_questions:
+                st.caption("Unanswered scenarios whose answer could move the primary ERP recommendation most")
+                render_next_questions(hs, get_question_ranker(hs, catalog_version))
             
 except Exception as e:
     st.error(f"Error loading data: {e}")
@@ -24,16 +24,16 @@ if 'organization_id' not in st.session_state:
 
 try:
     with HierarchyService() as hs:
-        # Get statistics
-        requirements = hs.get_all_requirements(st.session_state.organization_id)
+        # Get statistics (aggregated in SQL)
+        metrics = hs.get_dashboard_metrics(st.session_state.organization_id)
+        totals = metrics['totals']
         
-        # Count by priority
-        must_count = len([r for r in requirements if r.priority == 'must'])
-        should_count = len([r for r in requirements if r.priority == 'should'])
-        could_count = len([r for r in requirements if r.priority == 'could'])
-        wont_count = len([r for r in requirements if r.priority == 'wont'])
+        must_count = totals['must']
+        should_count = totals['should']
+        could_count = totals['could']
+        wont_count = totals['wont']
         
-        total = len(requirements)
+        total = totals['evaluated']
         
         # Display statistics
         st.markdown("### 📈 Your Progress")
@@ -53,7 +53,11 @@ try:
         
         # Total evaluated
         st.markdown("### 📋 Total Work Items Evaluated")
-        st.metric("Total", total)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total", f"{total} / {totals['selectable']}")
+        with col2:
+            st.metric("Completion", f"{totals['completion_pct']:.1f}%")
         
         if total == 0:
             st.info("No work items evaluated yet. Go to Process Selection to start!")
@@ -61,10 +65,41 @@ try:
             # Show breakdown
             st.markdown("### Priority Breakdown")
             
-            if total > 0:
-                st.progress(must_count / total if total > 0 else 0, text=f"Must: {must_count} ({must_count/total*100:.1f}%)")
-                st.progress(should_count / total if total > 0 else 0, text=f"Should: {should_count} ({should_count/total*100:.1f}%)")
-                st.progress(could_count / total if total > 0 else 0, text=f"Could: {could_count} ({could_count/total*100:.1f}%)")
+            st.progress(must_count / total, text=f"Must: {must_count} ({must_count/total*100:.1f}%)")
+            st.progress(should_count / total, text=f"Should: {should_count} ({should_count/total*100:.1f}%)")
+            st.progress(could_count / total, text=f"Could: {could_count} ({could_count/total*100:.1f}%)")
+        
+        # Progress per E2E process and area
+        st.markdown("---")
+        st.markdown("### 🗂️ Progress by Process")
+        
+        for e2e in metrics['e2e']:
+            st.progress(
+                e2e['completion_pct'] / 100,
+                text=f"{e2e['name']}: {e2e['evaluated']} / {e2e['selectable']} ({e2e['completion_pct']:.1f}%)"
+            )
+            with st.expander(f"Areas of {e2e['name']}"):
+                st.dataframe(
+                    [
+                        {
+                            'Area': area['name'],
+                            'Must': area['must'],
+                            'Should': area['should'],
+                            'Could': area['could'],
+                            "Won't": area['wont'],
+                            'Evaluated': f"{area['evaluated']} / {area['selectable']}",
+                            'Completion': area['completion_pct'],
+                        }
+                        for area in e2e['areas']
+                    ],
+                    column_config={
+                        'Completion': st.column_config.ProgressColumn(
+                            "Completion", format="%.1f%%", min_value=0, max_value=100
+                        ),
+                    },
+                    use_container_width=True,
+                    hide_index=True
+                )
         
 except Exception as e:
     st.error(f"Error loading dashboard: {e}")
@@ -4,12 +4,14 @@ Recommendations Page - Product recommendations after discovery
 
 import streamlit as st
 import sys
+import pandas as pd
+import plotly.express as px
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from streamlit_app.services.hierarchy_service import HierarchyService
-from backend.app.database import SessionLocal
+from backend.app.database import SessionLocal, sync_active_database
 from backend.app.services.hierarchy_recommendation_service import HierarchyRecommendationService
 
 st.set_page_config(
@@ -26,6 +28,7 @@ if 'organization_id' not in st.session_state:
     st.session_state.organization_id = 1
 
 try:
+    sync_active_database()
     db = SessionLocal()
     rec_service = HierarchyRecommendationService(db)
     
@@ -40,6 +43,7 @@ try:
         st.markdown("---")
         
         primary = summary.get('primary_erp')
+        all_recs = summary['all_recommendations']
         
         if primary:
             col1, col2 = st.columns([2, 1])
@@ -55,7 +59,6 @@ try:
             # Comparison with other primary ERPs
             st.markdown("#### Comparison with Other ERP Systems")
             
-            all_recs = summary['all_recommendations']
             primary_erps = {k: v for k, v in all_recs.items() if v['is_primary_erp']}
             
             # Sort by score
@@ -77,6 +80,108 @@ try:
                     if erp_data['gaps']:
                         st.warning(f"Gaps: {len(erp_data['gaps'])} critical scenarios not covered")
         
+        # Confidence bands
+        if st.checkbox("Show confidence bands for unanswered items"):
+            bands = rec_service.get_confidence_bands(st.session_state.organization_id)
+            st.caption(
+                f"{bands['samples']:,} samples over {bands['unanswered_items']:,} unanswered items "
+                f"(95% interval, win probability within the product's category)"
+            )
+            st.dataframe(
+                [
+                    {
+                        'Product': all_recs[code]['erp_system_name'] if code in all_recs else code,
+                        'Score': band['score'],
+                        'Low': band['low'],
+                        'High': band['high'],
+                        'Win Probability': f"{band['win_probability']:.0%}",
+                    }
+                    for code, band in sorted(bands['products'].items(), key=lambda x: -x[1]['mean'])
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        # Area heatmap
+        st.markdown("---")
+        st.markdown("## Coverage by Area")
+        
+        area_level = st.radio(
+            "Group by",
+            [2, 3],
+            format_func=lambda level: "Area (Title 2)" if level == 2 else "Process (Title 3)",
+            horizontal=True
+        )
+        heatmap = pd.DataFrame(rec_service.get_area_heatmap(st.session_state.organization_id, area_level))
+        heatmap = heatmap[heatmap['selected'] > 0] if not heatmap.empty else heatmap
+        
+        if heatmap.empty:
+            st.info("No selections to show yet.")
+        else:
+            matrix = heatmap.pivot_table(
+                index='area_name', columns='erp_system_code', values='coverage_pct', sort=False
+            )
+            fig = px.imshow(
+                matrix,
+                color_continuous_scale="RdYlGn",
+                zmin=0,
+                zmax=100,
+                aspect="auto",
+                labels={'color': "Coverage %", 'x': "Product", 'y': ""},
+            )
+            fig.update_layout(height=max(300, 28 * len(matrix)))
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Gap report
+        st.markdown("---")
+        st.markdown("## Gap Report")
+        
+        gap_report = rec_service.get_gap_report(st.session_state.organization_id)
+        gap_product = st.selectbox(
+            "Product",
+            [code for code in gap_report if code in all_recs],
+            format_func=lambda code: f"{all_recs[code]['erp_system_name']} ({len(gap_report[code])} gaps)"
+        )
+        gaps = gap_report.get(gap_product, [])
+        
+        if not gaps:
+            st.success("All 'Must' scenarios are covered.")
+        else:
+            st.dataframe(
+                [
+                    {
+                        'Scenario': gap['scenario_name'],
+                        'Path': gap['path'],
+                        'Work Items': ", ".join(item['name'] for item in gap['work_items']),
+                        'Covered By': ", ".join(gap['covered_by']) or "-",
+                    }
+                    for gap in gaps
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        # Product bundles
+        st.markdown("---")
+        st.markdown("## Recommended Bundles")
+        st.caption("Smallest product combinations that cover all 'Must' scenarios, ranked by score")
+        
+        bundle_result = rec_service.get_bundle_recommendations(st.session_state.organization_id)
+        
+        if bundle_result['uncoverable_must']:
+            st.warning(f"{bundle_result['uncoverable_must']} 'Must' scenarios are not covered by any product")
+        
+        for rank, bundle in enumerate(bundle_result['bundles'], 1):
+            products = " + ".join(
+                all_recs[code]['erp_system_name'] if code in all_recs else code
+                for code in bundle['products']
+            ) or "No products needed"
+            st.markdown(
+                f"**{rank}. {products}** - Score: {bundle['total_score']:.1f}% "
+                f"(Should: {bundle['coverage']['should']['percentage']:.1f}%, "
+                f"Could: {bundle['coverage']['could']['percentage']:.1f}%)"
+            )
+        
         # CRM Decision
         st.markdown("---")
         st.markdown("## CRM Analysis")
@@ -0,0 +1,130 @@
+"""
+Scenario Comparison Page - Which products support which scenarios
+"""
+
+import streamlit as st
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from streamlit_app.services.hierarchy_service import HierarchyService
+from backend.app.services.scenario_grid import PRIORITY_ORDER, UNANSWERED, SORT_COLUMNS
+
+PAGE_SIZES = [50, 100, 250, 500]
+
+SORT_LABELS = {
+    'sequence_id': "Sequence ID",
+    'scenario_name': "Scenario",
+    'e2e': "E2E Process",
+    'area': "Area",
+    'priority': "Priority",
+    'product_count': "Number of products",
+}
+
+PRIORITY_LABELS = {
+    'must': "🔴 Must",
+    'should': "🟡 Should",
+    'could': "🟢 Could",
+    'wont': "⚪ Won't",
+    UNANSWERED: "Not evaluated",
+}
+
+st.set_page_config(
+    page_title="ITER - Scenario Comparison",
+    page_icon="🔍",
+    layout="wide"
+)
+
+st.title("🔍 Scenario Comparison")
+st.markdown("Which products support each scenario, next to your priorities")
+
+# Initialize session state
+if 'organization_id' not in st.session_state:
+    st.session_state.organization_id = 1
+if 'grid_page' not in st.session_state:
+    st.session_state.grid_page = 1
+
+try:
+    with HierarchyService() as hs:
+        e2e_options = {None: "All"}
+        e2e_options.update({e2e.id: e2e.name for e2e in hs.get_e2e_processes()})
+        erp_systems = {erp_id: (code, name) for erp_id, code, name in hs.get_erp_systems()}
+        
+        # Filters
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            e2e_id = st.selectbox("E2E Process", list(e2e_options), format_func=e2e_options.get)
+            search = st.text_input("Search scenarios")
+        with col2:
+            erp_system_ids = st.multiselect(
+                "Supported by (all of)",
+                list(erp_systems),
+                format_func=lambda erp_id: erp_systems[erp_id][1]
+            )
+            priorities = st.multiselect(
+                "Priority",
+                PRIORITY_ORDER + [UNANSWERED],
+                format_func=PRIORITY_LABELS.get
+            )
+        with col3:
+            sort_by = st.selectbox("Sort by", SORT_COLUMNS, format_func=SORT_LABELS.get)
+            descending = st.checkbox("Descending")
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1)
+        
+        # Back to the first page whenever the filters change
+        filters = dict(
+            e2e_id=e2e_id,
+            erp_system_ids=erp_system_ids,
+            priorities=priorities,
+            search=search.strip() or None,
+            sort_by=sort_by,
+            descending=descending,
+            page_size=page_size,
+        )
+        if st.session_state.get('grid_filters') != filters:
+            st.session_state.grid_filters = filters
+            st.session_state.grid_page = 1
+        
+        grid = hs.get_scenario_grid(st.session_state.organization_id, page=st.session_state.grid_page, **filters)
+        total = grid['total']
+        
+        if not grid['rows'] and st.session_state.grid_page > 1:
+            st.session_state.grid_page = 1
+            st.rerun()
+        
+        if total == 0:
+            st.info("No scenarios match the filters.")
+        else:
+            pages = (total + page_size - 1) // page_size
+            first = (st.session_state.grid_page - 1) * page_size + 1
+            st.caption(f"Scenarios {first:,}-{first + len(grid['rows']) - 1:,} of {total:,}")
+            
+            st.dataframe(
+                [
+                    {
+                        'Sequence ID': row['sequence_id'],
+                        'Scenario': row['scenario_name'],
+                        'E2E Process': row['e2e'],
+                        'Area': row['area'],
+                        'Priority': PRIORITY_LABELS.get(row['priority'] or UNANSWERED),
+                        **{code: bool(row[code]) for code in grid['products']},
+                    }
+                    for row in grid['rows']
+                ],
+                column_config={
+                    code: st.column_config.CheckboxColumn(name, width="small")
+                    for code, name in erp_systems.values()
+                },
+                use_container_width=True,
+                hide_index=True,
+                height=min(38 + 35 * len(grid['rows']), 800)
+            )
+            
+            if pages > 1:
+                st.number_input("Page", min_value=1, max_value=pages, key='grid_page')
+
+except Exception as e:
+    st.error(f"Error loading scenario comparison: {e}")
+    import traceback
+    st.code(traceback.format_exc())
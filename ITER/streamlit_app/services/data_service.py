@@ -10,7 +10,7 @@ ITER_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ITER_DIR))
 
 from sqlalchemy.orm import Session
-from backend.app.database import SessionLocal, get_db
+from backend.app.database import SessionLocal, get_db, sync_active_database
 from backend.app.models import (
     Organization, User, E2EProcess, BusinessProcess, 
     Scenario, CustomerRequirement, ERPSystem
@@ -20,6 +20,7 @@ class DataService:
     """Service for accessing database from Streamlit."""
     
     def __init__(self):
+        sync_active_database()  # Pick up a promoted catalog swap
         self.db = SessionLocal()
     
     def __enter__(self):
@@ -8,14 +8,23 @@ from pathlib import Path
 ITER_DIR = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(ITER_DIR))
 
-from sqlalchemy.orm import Session
-from backend.app.database import SessionLocal
-from backend.app.models import ProcessHierarchy, HierarchyRequirement, ERPSystem
+from typing import Dict, List, Optional
+from sqlalchemy import select, delete, case, func, literal, and_
+from sqlalchemy.orm import Session, aliased
+from backend.app.database import SessionLocal, sync_active_database, dialect_insert
+from backend.app.models import ProcessHierarchy, HierarchyRequirement, ERPSystem, SELECTABLE_WORK_ITEM_TYPES
+from backend.app.services.catalog_manifest import get_catalog_version
+from backend.app.services.recommendation_cache import recommendation_cache, bump_requirements_revision
+from backend.app.services.requirement_rollup import sync_process_requirements
+from backend.app.services.scenario_grid import get_scenario_grid
+from backend.app.services.dashboard_metrics import get_dashboard_metrics
+from backend.app.services.hierarchy_rollups import get_evaluated_counts
 
 class HierarchyService:
     """Service for accessing process hierarchy."""
     
     def __init__(self):
+        sync_active_database()  # Pick up a promoted catalog swap
         self.db = SessionLocal()
     
     def __enter__(self):
@@ -24,6 +33,10 @@ class HierarchyService:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.db.close()
     
+    def get_catalog_version(self) -> int:
+        """Catalog version from the import manifest (use as a cache key)."""
+        return get_catalog_version(self.db)
+    
     def get_e2e_processes(self):
         """Get all E2E processes (Level 1)."""
         return self.db.query(ProcessHierarchy).filter(
@@ -62,11 +75,15 @@ class HierarchyService:
         """Recursively build tree node with children."""
         node = {
             'id': item.id,
+            'node_key': item.node_key,
             'sequence_id': item.sequence_id,
             'level': item.level,
             'name': item.name,
             'work_item_type': item.work_item_type,
             'erp_system_id': item.erp_system_id,
+            'selectable_count': item.selectable_count or 0,
+            'tree_left': item.tree_left,
+            'tree_right': item.tree_right,
             'children': []
         }
         
@@ -92,17 +109,156 @@ class HierarchyService:
             req.priority = priority
             req.selected_by = user_id
         else:
+            item = self.db.query(ProcessHierarchy).filter(ProcessHierarchy.id == hierarchy_item_id).first()
             req = HierarchyRequirement(
                 organization_id=organization_id,
                 hierarchy_item_id=hierarchy_item_id,
+                hierarchy_node_key=item.node_key if item else None,
                 priority=priority,
                 selected_by=user_id
             )
             self.db.add(req)
         
+        # Keep the process-level requirement in step (same transaction)
+        self.db.flush()
+        sync_process_requirements(self.db, organization_id, [hierarchy_item_id])
+        bump_requirements_revision(self.db, organization_id)
+        
         self.db.commit()
+        recommendation_cache.invalidate_organization(organization_id)
         return req
     
+    def get_selectable_items(self, organization_id: int, e2e_id: int = None, search: str = None) -> List[dict]:
+        """
+        Flat list of selectable items with their path and current answer (one query).
+        
+        Args:
+            e2e_id: Only items under this E2E node
+            search: Case-insensitive substring of the item or scenario name
+        
+        Returns:
+            [{id, sequence_id, path, work_item_type, name, priority}] in tree order
+        """
+        item = ProcessHierarchy
+        area, process, scenario = aliased(ProcessHierarchy), aliased(ProcessHierarchy), aliased(ProcessHierarchy)
+        query = self.db.query(
+            item.id, item.sequence_id, item.work_item_type, item.name,
+            area.name, process.name, scenario.name,
+            HierarchyRequirement.priority
+        ).outerjoin(area, area.id == item.area_node_id
+        ).outerjoin(process, process.id == item.process_node_id
+        ).outerjoin(scenario, and_(scenario.id == item.scenario_node_id, scenario.id != item.id)
+        ).outerjoin(HierarchyRequirement, and_(
+            HierarchyRequirement.hierarchy_item_id == item.id,
+            HierarchyRequirement.organization_id == organization_id
+        )).filter(
+            item.work_item_type.in_(SELECTABLE_WORK_ITEM_TYPES)
+        )
+        if e2e_id is not None:
+            query = query.filter(item.e2e_node_id == e2e_id)
+        if search:
+            query = query.filter(item.name.ilike(f"%{search}%") | scenario.name.ilike(f"%{search}%"))
+        
+        return [
+            {
+                'id': item_id,
+                'sequence_id': sequence_id,
+                'path': " → ".join(part for part in (area_name, process_name, scenario_name) if part),
+                'work_item_type': work_item_type,
+                'name': name,
+                'priority': priority,
+            }
+            for item_id, sequence_id, work_item_type, name, area_name, process_name, scenario_name, priority
+            in query.order_by(item.tree_left, item.id)
+        ]
+    
+    def get_subtree_selectable_ids(self, root_id: int) -> List[int]:
+        """Selectable items in a node's subtree (node included), via its nested-set interval."""
+        root = select(ProcessHierarchy.tree_left, ProcessHierarchy.tree_right).where(
+            ProcessHierarchy.id == root_id
+        ).subquery()
+        return [
+            item_id for (item_id,) in self.db.query(ProcessHierarchy.id).join(
+                root, ProcessHierarchy.tree_left.between(root.c.tree_left, root.c.tree_right)
+            ).filter(
+                ProcessHierarchy.work_item_type.in_(SELECTABLE_WORK_ITEM_TYPES)
+            ).order_by(ProcessHierarchy.tree_left)
+        ]
+    
+    def save_requirements(self, organization_id: int, priorities: Dict[int, Optional[str]], user_id: int = None) -> int:
+        """
+        Save many answers in one transaction.
+        
+        Args:
+            priorities: hierarchy_item_id -> priority, or None to clear the answer
+        
+        All set answers are written with a single INSERT ... SELECT ... ON CONFLICT
+        statement (node keys come from the same SELECT), all cleared ones with
+        a single DELETE.
+        
+        Returns:
+            Number of items written or cleared
+        """
+        to_set = {item_id: priority for item_id, priority in priorities.items() if priority is not None}
+        to_clear = [item_id for item_id, priority in priorities.items() if priority is None]
+        
+        if to_set:
+            distinct_priorities = set(to_set.values())
+            if len(distinct_priorities) == 1:
+                priority = literal(distinct_priorities.pop())
+            else:
+                priority = case(to_set, value=ProcessHierarchy.id)
+            rows = select(
+                literal(organization_id),
+                ProcessHierarchy.id,
+                ProcessHierarchy.node_key,
+                priority,
+                literal(user_id)
+            ).where(ProcessHierarchy.id.in_(list(to_set)))
+            stmt = dialect_insert(self.db, HierarchyRequirement).from_select(
+                ['organization_id', 'hierarchy_item_id', 'hierarchy_node_key', 'priority', 'selected_by'], rows
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['organization_id', 'hierarchy_item_id'],
+                set_={
+                    'priority': stmt.excluded.priority,
+                    'selected_by': stmt.excluded.selected_by,
+                    'updated_at': func.now(),
+                }
+            )
+            self.db.execute(stmt)
+        
+        if to_clear:
+            self.db.execute(
+                delete(HierarchyRequirement).where(
+                    HierarchyRequirement.organization_id == organization_id,
+                    HierarchyRequirement.hierarchy_item_id.in_(to_clear)
+                )
+            )
+        
+        if priorities:
+            sync_process_requirements(self.db, organization_id, list(priorities))
+            bump_requirements_revision(self.db, organization_id)
+            self.db.commit()
+            recommendation_cache.invalidate_organization(organization_id)
+        return len(priorities)
+    
+    def get_erp_systems(self):
+        """Get all ERP systems (id, code, name)."""
+        return self.db.query(ERPSystem.id, ERPSystem.code, ERPSystem.name).order_by(ERPSystem.id).all()
+    
+    def get_scenario_grid(self, organization_id: int, **filters):
+        """One filtered, sorted page of the scenario x product grid (see scenario_grid)."""
+        return get_scenario_grid(self.db, organization_id, **filters)
+    
+    def get_dashboard_metrics(self, organization_id: int):
+        """Answer counts and completion per E2E process and area (see dashboard_metrics)."""
+        return get_dashboard_metrics(self.db, organization_id)
+    
+    def get_evaluated_counts(self, organization_id: int):
+        """Answered selectable items per subtree; count(tree_left, tree_right) is O(1)."""
+        return get_evaluated_counts(self.db, organization_id)
+    
     def get_all_requirements(self, organization_id: int):
         """Get all requirements for an organization."""
         return self.db.query(HierarchyRequirement).filter(
@@ -0,0 +1,100 @@
+"""
+Shared fixtures: an in-memory SQLite database and a small synthetic BPC catalog
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from backend.app.database import Base
+import backend.app.models  # noqa: F401  (registers every table)
+
+CATALOG_COLUMNS = [
+    'Title 1', 'Title 2', 'Title 3', 'Title 4', 'Title 5',
+    'Description', 'Products', 'Work Item Type', 'Process Sequence ID'
+]
+
+PRODUCTS = [
+    'Business Central',
+    'Finance, Supply Chain Management',
+    'Sales',
+    'Finance',
+    'Business Central, Finance',
+]
+
+
+def make_catalog(n_e2e=2, n_area=2, n_proc=2, n_scenario=3, n_work_items=2) -> pd.DataFrame:
+    """Catalog rows in BPC workbook layout (Title 1-5 columns)."""
+    rows = []
+    for e in range(1, n_e2e + 1):
+        rows.append({'Title 1': f'{e * 10} E2E {e}'})
+        for a in range(1, n_area + 1):
+            rows.append({'Title 2': f'{e * 10}.{a:02d} Area {a}', 'Process Sequence ID': f'{e * 10}.{a:02d}'})
+            for p in range(1, n_proc + 1):
+                code = f'{e * 10}.{a:02d}.{p * 10:03d}'
+                rows.append({'Title 3': f'{code} Process {p}', 'Process Sequence ID': code + '.000'})
+                for s in range(1, n_scenario + 1):
+                    sequence_id = f'{code}.{99 + s}'
+                    rows.append({
+                        'Title 4': f'{sequence_id} Scenario {s}',
+                        'Process Sequence ID': sequence_id,
+                        'Work Item Type': 'Scenario',
+                        'Products': PRODUCTS[(e + a + p + s) % len(PRODUCTS)],
+                    })
+                    for w in range(n_work_items):
+                        rows.append({
+                            'Title 5': f'Task {w}',
+                            'Process Sequence ID': sequence_id,
+                            'Work Item Type': ['Task', 'Configuration deliverable', 'Workshop'][w % 3],
+                        })
+    return pd.DataFrame(rows, columns=CATALOG_COLUMNS)
+
+
+def make_session_factory(url: str = "sqlite://"):
+    """Session factory on a fresh database with every table created."""
+    if url == "sqlite://":
+        engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    else:
+        engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Session on an empty in-memory database."""
+    session = make_session_factory()()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def import_catalog(monkeypatch, tmp_path, capsys):
+    """
+    Import a catalog DataFrame with scripts/import_hierarchy.py.
+
+    The workbook read is replaced by the DataFrame; the file only exists for
+    the content hash.
+    """
+    import import_hierarchy
+    import seed_database
+
+    def run(session, df: pd.DataFrame, **kwargs):
+        workbook = tmp_path / "catalog.xlsx"
+        workbook.write_bytes(df.to_csv().encode())
+        monkeypatch.setattr(import_hierarchy.pd, "read_excel", lambda path: df)
+        seed_database.seed_erp_systems(session)
+        result = import_hierarchy.import_hierarchy(workbook, session, **kwargs)
+        capsys.readouterr()
+        return result
+
+    return run
@@ -0,0 +1,132 @@
+"""
+Catalog reloads: answers follow their row by node key, and a blue/green swap keeps user data
+"""
+
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from backend.app import database
+from backend.app.models import ProcessHierarchy, HierarchyRequirement
+from backend.app.services import catalog_swap
+from backend.app.services.node_keys import compute_node_keys, relink_requirements
+from conftest import make_catalog, make_session_factory
+
+
+def reordered(df: pd.DataFrame) -> pd.DataFrame:
+    """Same catalog with the E2E blocks in reverse order, so every row gets a new id."""
+    blocks = (df['Title 1'].notna()).cumsum()
+    return pd.concat([df[blocks == b] for b in sorted(blocks.unique(), reverse=True)], ignore_index=True)
+
+
+def answer_by_content(db, org_id=1):
+    """Answers keyed by (sequence_id, level, name) of the row they point at."""
+    return dict(
+        ((item.sequence_id, item.level, item.name), priority)
+        for item, priority in db.query(ProcessHierarchy, HierarchyRequirement.priority)
+        .join(HierarchyRequirement, HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id)
+        .filter(HierarchyRequirement.organization_id == org_id)
+    )
+
+
+def answer_items(db, step=3):
+    """Answer every step-th scenario or work item, cycling through the priorities."""
+    items = db.query(ProcessHierarchy).filter(ProcessHierarchy.level >= 4).order_by(ProcessHierarchy.id).all()
+    for n, item in enumerate(items[::step]):
+        db.add(HierarchyRequirement(
+            organization_id=1, hierarchy_item_id=item.id, hierarchy_node_key=item.node_key,
+            priority=['must', 'should', 'could', 'wont'][n % 4]
+        ))
+    db.commit()
+
+
+def test_twins_get_ordinals_in_catalog_order():
+    rows = [(1, '10.01.010.100', 5, 'Task', 'Setup'), (2, '10.01.010.100', 5, 'Task', ' setup '), (3, None, 1, None, 'E2E')]
+    keys = compute_node_keys(rows)
+
+    assert len(set(keys.values())) == 3
+    # The first twin keeps the plain key, whatever its id
+    assert compute_node_keys([rows[1], rows[0]])[2] == keys[1]
+
+
+def test_relink_follows_node_keys_after_reload(db, import_catalog):
+    df = make_catalog()
+    import_catalog(db, df)
+    answer_items(db)
+    expected = answer_by_content(db)
+    old_ids = dict(db.query(ProcessHierarchy.node_key, ProcessHierarchy.id))
+
+    # Reload the catalog in another order: ids shift along chains
+    db.query(ProcessHierarchy).delete()
+    db.commit()
+    import_catalog(db, reordered(df), force=True)
+    assert dict(db.query(ProcessHierarchy.node_key, ProcessHierarchy.id)) != old_ids
+
+    assert answer_by_content(db) == expected
+    assert relink_requirements(db) == 0
+
+
+@pytest.fixture
+def database_dir(tmp_path, monkeypatch):
+    """Active database and pointer file in tmp_path."""
+    pointer = tmp_path / "active_db.txt"
+    monkeypatch.setattr(database, "DATABASE_DIR", tmp_path)
+    monkeypatch.setattr(database, "ACTIVE_DATABASE_FILE", pointer)
+    monkeypatch.setattr(catalog_swap, "DATABASE_DIR", tmp_path)
+    monkeypatch.setattr(catalog_swap, "ACTIVE_DATABASE_FILE", pointer)
+    return tmp_path
+
+
+def test_swap_relinks_answers_and_retires_previous_database(database_dir, import_catalog):
+    df = make_catalog()
+    active_path = database_dir / database.DEFAULT_DATABASE_NAME
+    active = make_session_factory(f"sqlite:///{active_path}")()
+    import_catalog(active, df)
+    answer_items(active)
+
+    # The staged catalog is reordered and renames one answered scenario
+    renamed = active.query(ProcessHierarchy).join(
+        HierarchyRequirement, HierarchyRequirement.hierarchy_item_id == ProcessHierarchy.id
+    ).filter(ProcessHierarchy.level == 4).first()
+    renamed_key = (renamed.sequence_id, renamed.level, renamed.name)
+    new_df = reordered(df)
+    new_df.loc[new_df['Title 4'] == renamed.name, 'Title 4'] += ' (renamed)'
+
+    staging = catalog_swap.create_staging_database()
+    db = staging.session()
+    import_catalog(db, new_df)
+    db.close()
+    catalog_swap.validate_staging(staging)
+
+    # Answered in the active database while the staged import ran
+    late = active.query(ProcessHierarchy).filter(ProcessHierarchy.level == 5).order_by(ProcessHierarchy.id.desc()).first()
+    late_id = late.id
+    active.add(HierarchyRequirement(organization_id=1, hierarchy_item_id=late.id, hierarchy_node_key=late.node_key, priority='must'))
+    active.commit()
+    expected = answer_by_content(active)
+    active.close()
+
+    stats = catalog_swap.promote_staging(staging)
+
+    assert database.get_active_database_path() == staging.path
+    assert stats['previous'] == active_path
+    assert stats['requirements_dropped'] == 1
+    promoted = staging.session()
+    expected.pop(renamed_key)
+    assert answer_by_content(promoted) == expected
+    promoted.close()
+    staging.dispose()
+
+    # A writer still bound to the previous file fails instead of writing where nobody reads
+    update = "UPDATE hierarchy_requirements SET priority = 'wont' WHERE hierarchy_item_id = ?"
+    conn = sqlite3.connect(active_path)
+    with pytest.raises(sqlite3.IntegrityError, match="retired"):
+        conn.execute(update, (late_id,))
+    conn.close()
+
+    # Manual rollback
+    catalog_swap.reactivate_database(active_path)
+    conn = sqlite3.connect(active_path)
+    conn.execute(update, (late_id,))
+    conn.close()
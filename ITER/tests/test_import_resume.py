@@ -0,0 +1,78 @@
+"""
+import_hierarchy checkpoints: a resumed run ends with the same catalog as an uninterrupted one
+"""
+
+import pandas as pd
+import pytest
+
+import import_hierarchy
+from backend.app.models import ProcessHierarchy, ScenarioProduct, ERPSystem, ImportRun
+from conftest import make_catalog, make_session_factory
+
+
+def catalog_with_duplicate() -> pd.DataFrame:
+    """Catalog whose last row repeats an early scenario (merged into the existing item)."""
+    df = make_catalog()
+    first_scenario = df[df['Work Item Type'] == 'Scenario'].iloc[[0]]
+    return pd.concat([df, first_scenario], ignore_index=True)
+
+
+def snapshot(db):
+    """Catalog content independent of ids: items and scenario/product links."""
+    items = {
+        (item.sequence_id, item.level, item.work_item_type, item.name)
+        for item in db.query(ProcessHierarchy)
+    }
+    links = set(
+        db.query(ProcessHierarchy.sequence_id, ERPSystem.code)
+        .join(ScenarioProduct, ScenarioProduct.hierarchy_item_id == ProcessHierarchy.id)
+        .join(ERPSystem, ERPSystem.id == ScenarioProduct.erp_system_id)
+    )
+    return items, links
+
+
+def latest_run(db) -> ImportRun:
+    return db.query(ImportRun).order_by(ImportRun.id.desc()).first()
+
+
+def test_uninterrupted_import_counts_merged_rows(db, import_catalog):
+    import_catalog(db, catalog_with_duplicate())
+
+    run = latest_run(db)
+    assert run.status == "completed"
+    assert run.merged_count == 1
+
+
+@pytest.mark.parametrize("crash_at", [7, 12, 13, 29, 44, 71])
+def test_resume_after_crash_matches_clean_import(monkeypatch, import_catalog, crash_at):
+    df = catalog_with_duplicate()
+
+    clean = make_session_factory()()
+    import_catalog(clean, df)
+    expected = snapshot(clean)
+
+    monkeypatch.setattr(import_hierarchy, "CHECKPOINT_EVERY", 5)
+    db = make_session_factory()()
+
+    # Crash while reading row crash_at
+    get_level = import_hierarchy.get_hierarchy_level
+    calls = {'n': 0}
+
+    def crashing_get_level(row):
+        calls['n'] += 1
+        if calls['n'] == crash_at + 1:
+            raise RuntimeError("simulated crash")
+        return get_level(row)
+
+    monkeypatch.setattr(import_hierarchy, "get_hierarchy_level", crashing_get_level)
+    import_catalog(db, df)
+    assert latest_run(db).status == "failed"
+    assert latest_run(db).last_row_index is not None
+
+    monkeypatch.setattr(import_hierarchy, "get_hierarchy_level", get_level)
+    import_catalog(db, df, resume=True)
+
+    run = latest_run(db)
+    assert run.status == "completed"
+    assert run.merged_count == 1
+    assert snapshot(db) == expected
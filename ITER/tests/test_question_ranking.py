@@ -0,0 +1,32 @@
+"""
+QuestionRanker: answering a question closes the whole scenario
+"""
+
+from backend.app.models import ProcessHierarchy, HierarchyRequirement, Organization
+from backend.app.services.hierarchy_recommendation_service import HierarchyRecommendationService
+from conftest import make_catalog
+
+
+def test_answering_all_open_items_removes_the_question(db, import_catalog):
+    import_catalog(db, make_catalog(n_work_items=3))
+    db.add(Organization(name="Test"))
+    db.flush()
+
+    # Some answers so the primary ERPs have scores to move
+    scenarios = db.query(ProcessHierarchy).filter(ProcessHierarchy.level == 4).order_by(ProcessHierarchy.id).all()
+    for scenario, priority in zip(scenarios[:6], ['must', 'should', 'could'] * 2):
+        db.add(HierarchyRequirement(organization_id=1, hierarchy_item_id=scenario.id, priority=priority))
+    db.commit()
+
+    ranker = HierarchyRecommendationService(db).build_question_ranker(1)
+    questions = ranker.rank(50)
+    assert questions
+
+    question = questions[0]
+    assert question['item_id'] == question['item_ids'][0]
+    assert len(question['item_ids']) == question['unanswered_items']
+
+    for item_id in question['item_ids']:
+        ranker.apply_answer(item_id, None, 'must')
+
+    assert question['scenario_id'] not in {q['scenario_id'] for q in ranker.rank(50)}
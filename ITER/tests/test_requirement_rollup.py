@@ -0,0 +1,66 @@
+"""
+sync_process_requirements: derived process-level rows follow the work-item answers
+"""
+
+from sqlalchemy import event
+
+from backend.app.models import (
+    ProcessHierarchy, HierarchyRequirement, Organization, E2EProcess, BusinessProcess, CustomerRequirement
+)
+from backend.app.services.requirement_rollup import sync_process_requirements, DERIVED_SOURCE
+from conftest import make_catalog
+
+
+def seed(db, import_catalog, n_orgs):
+    import_catalog(db, make_catalog())
+    e2e = E2EProcess(code="test", name="Test")
+    db.add(e2e)
+    db.flush()
+    processes = db.query(ProcessHierarchy).filter(ProcessHierarchy.level == 3).all()
+    for process in processes:
+        db.add(BusinessProcess(process_code=process.sequence_id[:-4], name=process.name, e2e_process_id=e2e.id))
+    for n in range(n_orgs):
+        db.add(Organization(name=f"Org {n}"))
+    db.flush()
+
+    scenarios = db.query(ProcessHierarchy).filter(ProcessHierarchy.level == 4).all()
+    for org_id in range(1, n_orgs + 1):
+        for scenario in scenarios:
+            db.add(HierarchyRequirement(organization_id=org_id, hierarchy_item_id=scenario.id, priority='should'))
+    db.commit()
+    return processes
+
+
+def test_full_sync_deletes_stale_rows_set_based(db, import_catalog):
+    processes = seed(db, import_catalog, n_orgs=5)
+    sync_process_requirements(db)
+    db.commit()
+    assert db.query(CustomerRequirement).count() == 5 * len(processes)
+
+    # Organization 2 clears everything; a direct row of org 3 must survive
+    db.query(HierarchyRequirement).filter(HierarchyRequirement.organization_id.in_([2, 3])).delete()
+    db.query(CustomerRequirement).filter(CustomerRequirement.organization_id == 3).update({'source': 'direct'})
+    db.commit()
+
+    delete_parameters = []
+
+    @event.listens_for(db.bind, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("DELETE"):
+            delete_parameters.append(parameters)
+
+    try:
+        result = sync_process_requirements(db)
+        db.commit()
+    finally:
+        event.remove(db.bind, "before_cursor_execute", record)
+
+    assert result['deleted'] == len(processes)
+    assert 2 not in {row.organization_id for row in db.query(CustomerRequirement)}
+    assert db.query(CustomerRequirement).filter(CustomerRequirement.organization_id == 3).count() == len(processes)
+    assert db.query(CustomerRequirement).filter(CustomerRequirement.source == DERIVED_SOURCE).count() == 3 * len(processes)
+
+    # One DELETE binding only the query's constants (a per-row NOT IN would
+    # bind two parameters for each of the derived rows)
+    assert len(delete_parameters) == 1
+    assert len(delete_parameters[0]) < 2 * 3 * len(processes)
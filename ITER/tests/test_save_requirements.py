@@ -0,0 +1,153 @@
+"""
+HierarchyService.save_requirements: bulk set, overwrite and clear in one transaction
+"""
+
+import pytest
+
+from backend.app.models import (
+    ProcessHierarchy, HierarchyRequirement, Organization, E2EProcess, BusinessProcess,
+    CustomerRequirement, SELECTABLE_WORK_ITEM_TYPES
+)
+from backend.app.services.requirement_rollup import DERIVED_SOURCE
+from backend.app.services.recommendation_cache import (
+    recommendation_cache, requirements_revision, bump_requirements_revision
+)
+from backend.app.services.hierarchy_recommendation_service import HierarchyRecommendationService
+from conftest import make_catalog
+from streamlit_app.services import hierarchy_service
+
+
+@pytest.fixture
+def hs(db, import_catalog, monkeypatch):
+    """HierarchyService on the test session, with an imported catalog and one organization."""
+    import_catalog(db, make_catalog())
+    db.add(Organization(name="Test"))
+
+    # Business processes for the process-level rollup
+    e2e = E2EProcess(code="test", name="Test")
+    db.add(e2e)
+    db.flush()
+    for process in db.query(ProcessHierarchy).filter(ProcessHierarchy.level == 3):
+        db.add(BusinessProcess(process_code=process.sequence_id[:-4], name=process.name, e2e_process_id=e2e.id))
+    db.commit()
+
+    monkeypatch.setattr(hierarchy_service, "sync_active_database", lambda: None)
+    monkeypatch.setattr(hierarchy_service, "SessionLocal", lambda: db)
+    return hierarchy_service.HierarchyService()
+
+
+def answers(db, org_id=1):
+    return dict(
+        db.query(HierarchyRequirement.hierarchy_item_id, HierarchyRequirement.priority)
+        .filter(HierarchyRequirement.organization_id == org_id)
+    )
+
+
+def selectable_ids(db, limit=None):
+    query = db.query(ProcessHierarchy.id).filter(
+        ProcessHierarchy.work_item_type.in_(SELECTABLE_WORK_ITEM_TYPES)
+    ).order_by(ProcessHierarchy.id)
+    return [item_id for (item_id,) in query.limit(limit)]
+
+
+def test_set_mixed_priorities_with_node_keys(hs, db):
+    ids = selectable_ids(db, 4)
+    hs.save_requirements(1, dict(zip(ids, ['must', 'should', 'could', 'wont'])), user_id=None)
+
+    assert answers(db) == dict(zip(ids, ['must', 'should', 'could', 'wont']))
+    keys = dict(db.query(ProcessHierarchy.id, ProcessHierarchy.node_key).filter(ProcessHierarchy.id.in_(ids)))
+    for requirement in db.query(HierarchyRequirement):
+        assert requirement.hierarchy_node_key == keys[requirement.hierarchy_item_id]
+
+
+def test_overwrite_keeps_one_row_per_item(hs, db):
+    ids = selectable_ids(db, 3)
+    hs.save_requirements(1, {item_id: 'must' for item_id in ids})
+    hs.save_requirements(1, {ids[0]: 'could'})
+
+    assert answers(db) == {ids[0]: 'could', ids[1]: 'must', ids[2]: 'must'}
+    assert db.query(HierarchyRequirement).count() == 3
+
+
+def test_clear_removes_only_cleared_items(hs, db):
+    ids = selectable_ids(db, 3)
+    hs.save_requirements(1, {item_id: 'should' for item_id in ids})
+    hs.save_requirements(1, {ids[1]: None})
+
+    assert answers(db) == {ids[0]: 'should', ids[2]: 'should'}
+
+
+def test_clear_and_set_in_one_call(hs, db):
+    ids = selectable_ids(db, 3)
+    hs.save_requirements(1, {ids[0]: 'must', ids[1]: 'must'})
+    hs.save_requirements(1, {ids[0]: None, ids[1]: 'wont', ids[2]: 'could'})
+
+    assert answers(db) == {ids[1]: 'wont', ids[2]: 'could'}
+
+
+def test_subtree_set_and_clear(hs, db):
+    area = db.query(ProcessHierarchy).filter(ProcessHierarchy.level == 2).first()
+    subtree = hs.get_subtree_selectable_ids(area.id)
+    assert len(subtree) == area.selectable_count
+
+    hs.save_requirements(1, {item_id: 'must' for item_id in subtree})
+    assert set(answers(db)) == set(subtree)
+
+    hs.save_requirements(1, {item_id: None for item_id in subtree})
+    assert answers(db) == {}
+
+
+def test_process_requirements_follow_answers_but_spare_direct_rows(hs, db):
+    process = db.query(ProcessHierarchy).filter(ProcessHierarchy.level == 3).first()
+    business_process_id = db.query(BusinessProcess.id).filter(
+        BusinessProcess.process_code == process.sequence_id[:-4]
+    ).scalar()
+    items = [
+        item_id for (item_id,) in db.query(ProcessHierarchy.id).filter(
+            ProcessHierarchy.process_node_id == process.id,
+            ProcessHierarchy.work_item_type.in_(SELECTABLE_WORK_ITEM_TYPES)
+        )
+    ]
+
+    hs.save_requirements(1, {items[0]: 'could', items[1]: 'should'})
+    derived = db.query(CustomerRequirement).one()
+    assert (derived.business_process_id, derived.priority, derived.source) == (business_process_id, 'should', DERIVED_SOURCE)
+
+    hs.save_requirements(1, {items[0]: None, items[1]: None})
+    assert db.query(CustomerRequirement).count() == 0
+
+    # A hand-entered process answer is neither overwritten nor deleted
+    db.expunge_all()
+    db.add(CustomerRequirement(organization_id=1, business_process_id=business_process_id, priority='not_needed'))
+    db.commit()
+    hs.save_requirements(1, {items[0]: 'must'})
+    hs.save_requirements(1, {items[0]: None})
+    direct = db.query(CustomerRequirement).one()
+    assert (direct.priority, direct.source) == ('not_needed', 'direct')
+
+
+def test_saves_bump_the_persisted_revision(hs, db):
+    ids = selectable_ids(db, 2)
+    assert requirements_revision(db, 1) == 0
+
+    hs.save_requirements(1, {ids[0]: 'must'})
+    hs.save_requirements(1, {ids[0]: None, ids[1]: 'could'})
+    hs.save_requirements(1, {})
+
+    assert requirements_revision(db, 1) == 2
+    assert requirements_revision(db, 2) == 0
+
+
+def test_summary_cache_sees_writes_from_other_processes(hs, db):
+    recommendation_cache.clear()
+    service = HierarchyRecommendationService(db)
+    first = service.get_final_recommendation_summary(1)
+    assert service.get_final_recommendation_summary(1) is first
+
+    # Another app process: same database, its own in-memory cache
+    item_id = selectable_ids(db, 1)[0]
+    db.add(HierarchyRequirement(organization_id=1, hierarchy_item_id=item_id, priority='must'))
+    bump_requirements_revision(db, 1)
+    db.commit()
+
+    assert service.get_final_recommendation_summary(1) is not first